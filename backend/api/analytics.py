@@ -1,32 +1,137 @@
-from fastapi import APIRouter, Depends
+import json
+import time
+from datetime import date, datetime
+from typing import AsyncIterator
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from core import response_cache
+from database.mongodb import get_mongo_db
+from services import ai_context, alerts_store, kpi_rollups
 from services.ai_service import ai_service
-from services.anomalies import anomaly_detector
-from pydantic import BaseModel
-from typing import List, Dict
+from pydantic import BaseModel, Field
+from typing import Dict, Literal, Optional
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
+Branch = Literal["patiobella", "eateroo"]
+
 class QueryRequest(BaseModel):
     query: str
+    # Extra caller context; it gets whatever token budget the branch KPIs leave.
     context: Dict = {}
+    branch: Optional[Branch] = None
+    days: int = Field(ai_context.CONTEXT_WINDOW_DAYS, ge=1, le=366)
 
 @router.get("/alerts")
-async def get_alerts():
-    # In a real app, this would query the database for recent data
-    mock_data = [{"item_name": "Seafood", "unit_cost": 150.0, "quantity": 5, "vendor": "Premium Fish"}]
-    mock_history = []
-    
-    alerts = await anomaly_detector.run_full_audit(mock_data, mock_history)
-    return alerts
+async def get_alerts(
+    request: Request,
+    branch: Optional[Branch] = None,
+    severity: Optional[Literal["critical", "warning", "info"]] = None,
+    since: Optional[datetime] = None,
+    acknowledged: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+):
+    """Newest-first alerts materialized by the ingestion worker.
+
+    Poll with ``since=<newest timestamp seen>`` to get only new alerts; older pages
+    come from the X-Next-Cursor header. Served from the response cache until the
+    worker publishes new alerts.
+    """
+
+    async def build() -> response_cache.Fresh:
+        try:
+            alerts, next_cursor = await alerts_store.list_alerts(
+                get_mongo_db(),
+                branch=branch,
+                severity=severity,
+                since=since,
+                cursor=cursor,
+                acknowledged=acknowledged,
+                limit=limit,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return response_cache.Fresh(alerts, {"X-Next-Cursor": next_cursor} if next_cursor else {})
+
+    return await response_cache.cached_json(request, "alerts", ["alerts"], build)
+
+def _branch_tags(branch: Optional[str]) -> list[str]:
+    return [response_cache.branch_tag(b) for b in ([branch] if branch else ai_context.BRANCHES)]
+
+async def _query_context(request: QueryRequest) -> str:
+    return await ai_context.build_context(get_mongo_db(), request.branch, request.days, extra=request.context)
 
 @router.post("/query")
 async def ask_ai(request: QueryRequest):
-    response = await ai_service.process_query(request.query, request.context)
+    response = await ai_service.process_query(request.query, await _query_context(request))
     return {"response": response}
 
 @router.get("/summary")
-async def get_summary():
-    # Mock summary data
-    summary_data = {"revenue": 124850, "growth": 12.5, "red_flags": 3}
-    summary = await ai_service.generate_insight(summary_data)
-    return {"summary": summary}
+async def get_summary(request: Request, branch: Optional[Branch] = None, days: int = Query(ai_context.CONTEXT_WINDOW_DAYS, ge=1, le=366)):
+    async def build() -> response_cache.Fresh:
+        context = await ai_context.build_context(get_mongo_db(), branch, days)
+        summary = await ai_service.generate_insight(context)
+        return response_cache.Fresh({"summary": summary}, cacheable=not summary.startswith("Error"))
+
+    return await response_cache.cached_json(request, "ai_summary", _branch_tags(branch), build)
+
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def _sse(event: str, payload: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+async def _token_events(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """``token`` frames as the model produces them, then ``done`` with server-side timings."""
+    started = time.perf_counter()
+    ttft_ms = None
+    try:
+        async for text in tokens:
+            if ttft_ms is None:
+                ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+            yield _sse("token", {"text": text})
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+        return
+    yield _sse("done", {"ttft_ms": ttft_ms, "total_ms": round((time.perf_counter() - started) * 1000, 1)})
+
+@router.post("/query/stream")
+async def ask_ai_stream(request: QueryRequest):
+    context = await _query_context(request)
+    return StreamingResponse(
+        _token_events(ai_service.stream_query(request.query, context)),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+@router.get("/summary/stream")
+async def get_summary_stream(branch: Optional[Branch] = None, days: int = Query(ai_context.CONTEXT_WINDOW_DAYS, ge=1, le=366)):
+    context = await ai_context.build_context(get_mongo_db(), branch, days)
+    return StreamingResponse(
+        _token_events(ai_service.stream_insight(context)), media_type="text/event-stream", headers=_SSE_HEADERS
+    )
+
+@router.get("/kpis/summary")
+async def get_kpi_summary(request: Request, branch: Optional[Branch] = None, days: int = Query(30, ge=1, le=366)):
+    """Dashboard headline numbers (revenue, growth vs the previous window, red flags, ...)
+    from the daily KPI rollups: one indexed range read, however much history exists."""
+
+    async def build():
+        return await kpi_rollups.load_summary(get_mongo_db(), branch, days)
+
+    return await response_cache.cached_json(request, "kpi_summary", _branch_tags(branch), build)
+
+@router.get("/kpis")
+async def list_kpis(
+    period: Literal["day", "week"] = "week",
+    branch: Optional[Branch] = None,
+    file_type: Optional[Literal["procurement", "inventory", "sales", "finance", "petty_cash"]] = None,
+    since: Optional[date] = None,
+):
+    return await kpi_rollups.list_rollups(
+        get_mongo_db(), period, branch, file_type, since.isoformat() if since else None
+    )
+
+@router.get("/metrics")
+async def ai_metrics():
+    return ai_service.metrics()
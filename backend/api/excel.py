@@ -1,11 +1,21 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from services.excel_service import excel_service
-import shutil
+from services.excel_jobs import ParseQueueFullError, excel_parse_jobs
+import asyncio
 import os
+import shutil
+import tempfile
 
 router = APIRouter(prefix="/excel", tags=["excel"])
 
-@router.post("/upload")
+
+def _spool_to_temp(src, suffix: str) -> str:
+    # Unique path per upload; the parse job deletes it when done.
+    with tempfile.NamedTemporaryFile(prefix="excel-upload-", suffix=suffix, delete=False) as buffer:
+        shutil.copyfileobj(src, buffer)
+        return buffer.name
+
+
+@router.post("/upload", status_code=202)
 async def upload_excel(
     file: UploadFile = File(...),
     branch: str = Form(...),
@@ -14,14 +24,27 @@ async def upload_excel(
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Invalid file format. Please upload an Excel file.")
 
-    temp_path = f"uploads/excel/{branch}/{file.filename}"
-    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+    temp_path = await asyncio.to_thread(_spool_to_temp, file.file, os.path.splitext(file.filename)[1])
+
+    try:
+        job = excel_parse_jobs.submit(temp_path, file.filename, branch)
+    except ParseQueueFullError as e:
+        os.unlink(temp_path)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+    # In a real app, we would save the job result to MySQL/MongoDB here
+
+    return {"job_id": job["job_id"], "status": job["status"], "status_url": f"/api/excel/jobs/{job['job_id']}"}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await excel_parse_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
-    result = await excel_service.parse_excel(temp_path, branch)
-    
-    # In a real app, we would save 'result' to MySQL/MongoDB here
-    
-    return result
+@router.get("/metrics")
+async def parser_metrics():
+    return excel_parse_jobs.metrics()
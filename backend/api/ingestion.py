@@ -1,23 +1,41 @@
 from __future__ import annotations
 
+import asyncio
+import base64
 import hashlib
+import json
 import time
+import uuid
+from datetime import datetime
 from typing import Literal, Optional
 
 import httpx
-from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl
 from sqlalchemy import text
-from sqlalchemy.orm import Session
-
-from database.mysql import get_db
-from services.gridfs_storage import gridfs_storage
-from tasks.excel_tasks import process_excel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import response_cache
+from core.cache import TTLCache
+from database import upload_repository
+from database.mongodb import get_mongo_db
+from database.mysql import AsyncSessionLocal, get_async_db
+from services import extraction_store, status_events
+from services.gridfs_storage import FileTooLargeError, gridfs_storage, iter_upload_chunks
+from tasks.excel_tasks import BatchNotQueued, process_excel, start_excel_batch
 
 router = APIRouter(prefix="/ingestion", tags=["ingestion"])
 
 Branch = Literal["patiobella", "eateroo"]
 FileType = Literal["procurement", "inventory", "sales", "finance", "petty_cash"]
+ProcessingStatus = Literal["pending", "processing", "completed", "failed", "review_needed"]
+
+MAX_BATCH_FILES = 500
+MAX_PAGE_SIZE = 200
+TOTAL_CACHE_TTL_SECONDS = 60
+_total_cache = TTLCache(maxsize=256, ttl=TOTAL_CACHE_TTL_SECONDS)
 
 MAX_BYTES = 50 * 1024 * 1024
 ALLOWED_EXT = (".xlsx", ".xls")
@@ -32,6 +50,15 @@ class UploadResponse(BaseModel):
     excel_upload_id: int
     status: str
     sha256: str
+    ai_audit_id: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    status: str
+    total: int
+    queued: int
+    items: list[UploadResponse]
 
 
 class ImportLinkRequest(BaseModel):
@@ -53,92 +80,234 @@ class UploadRow(BaseModel):
     ai_audit_id: Optional[str] = None
 
 
-@router.post("/upload", response_model=UploadResponse)
-async def upload_excel(
-    file: UploadFile = File(...),
-    branch: Branch = Form(...),
-    file_type: FileType = Form(...),
-    db: Session = Depends(get_db),
-):
+def _enqueue(excel_upload_id: int, file_id: str, branch: str, file_type: str, file_size: Optional[int] = None) -> None:
+    try:
+        # file_size only steers queue routing (see celery_app.route_task).
+        process_excel.delay(int(excel_upload_id), str(file_id), branch, file_type, file_size=file_size)
+    except Exception:
+        # If Celery/Redis not running, keep record as pending.
+        pass
+    else:
+        status_events.publish_status(int(excel_upload_id), "pending", branch=branch, file_type=file_type)
+
+
+def _reuse_upload(row, sha256: str) -> UploadResponse:
+    """Answer a repeated upload with the record (and audit) already stored for its bytes."""
+    if row["processing_status"] == "failed":
+        _enqueue(row["id"], row["mongo_gridfs_id"], row["branch"], row["file_type"], row["file_size"])
+        upload_status = "queued"
+    else:
+        upload_status = "deduplicated"
+        if row["processing_status"] in status_events.TERMINAL_STATUSES:
+            # Re-announce the stored outcome so a stream opened for this id ends right away;
+            # one still in flight gets its status from the running task.
+            status_events.publish_status(
+                int(row["id"]),
+                row["processing_status"],
+                audit_id=row["ai_audit_id"],
+                score=float(row["ai_audit_score"]) if row["ai_audit_score"] is not None else None,
+                deduplicated=True,
+            )
+    return UploadResponse(
+        file_id=str(row["mongo_gridfs_id"]),
+        excel_upload_id=int(row["id"]),
+        status=upload_status,
+        sha256=sha256,
+        ai_audit_id=row["ai_audit_id"],
+    )
+
+
+def _validate_upload(file: UploadFile) -> None:
     if not file.filename or not file.filename.lower().endswith(ALLOWED_EXT):
         raise HTTPException(status_code=400, detail="Invalid file format. Please upload .xlsx or .xls")
 
     if file.content_type and file.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail="Invalid content type")
 
-    started = time.time()
-    content = await file.read()
-
-    if len(content) > MAX_BYTES:
-        raise HTTPException(status_code=413, detail="File too large (max 50MB)")
-
-    sha256 = hashlib.sha256(content).hexdigest()
 
+async def _store_upload(
+    db: AsyncSession,
+    file: UploadFile,
+    branch: str,
+    file_type: str,
+    sha256: Optional[str] = None,
+) -> tuple[UploadResponse, Optional[int]]:
+    """Stream one upload into GridFS and excel_uploads, deduplicating by hash.
+
+    ``sha256``, when the client sends one, must match the hash of the streamed bytes.
+    Returns the response plus the file size when a new row still needs
+    parsing, or None when an existing upload was reused.
+    """
+    expected_sha256 = sha256.lower() if sha256 else None
     metadata = {
         "branch": branch,
         "file_type": file_type,
         "uploaded_by": "ceo@hugamara.com",
-        "file_hash": f"sha256:{sha256}",
         "processing_status": "pending",
     }
 
     try:
-        file_id = await gridfs_storage.save_file(
-            file_content=content,
+        file_id, sha256, file_size = await gridfs_storage.save_stream(
+            iter_upload_chunks(file),
             filename=file.filename,
             content_type=file.content_type or "application/octet-stream",
             metadata=metadata,
+            max_bytes=MAX_BYTES,
         )
+    except FileTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large (max 50MB)")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to store file: {str(e)}")
 
+    # A client-supplied hash is only checked, never trusted in place of the bytes.
+    if expected_sha256 and expected_sha256 != sha256:
+        await gridfs_storage.delete_file(file_id)
+        raise HTTPException(status_code=400, detail="sha256 does not match the uploaded file")
+
+    # The hash is only known once the stream is stored; drop the new copy on a repeat.
+    existing = await upload_repository.find_upload_by_hash(db, sha256)
+    if existing:
+        await gridfs_storage.delete_file(file_id)
+        return _reuse_upload(existing, sha256), None
+
+    stored_id = await gridfs_storage.find_file_id_by_hash(sha256, exclude_id=file_id)
+    if stored_id is not None:
+        await gridfs_storage.delete_file(file_id)
+        file_id = stored_id
+
     try:
-        db.execute(
-            text(
-                """
-                INSERT INTO excel_uploads (
-                    original_filename, branch, file_type, mongo_gridfs_id, file_hash, file_size,
-                    processing_status
-                ) VALUES (
-                    :original_filename, :branch, :file_type, :mongo_gridfs_id, :file_hash, :file_size,
-                    :processing_status
-                )
-                """
-            ),
-            {
-                "original_filename": file.filename,
-                "branch": branch,
-                "file_type": file_type,
-                "mongo_gridfs_id": str(file_id),
-                "file_hash": sha256,
-                "file_size": len(content),
-                "processing_status": "pending",
-            },
+        excel_upload_id = await upload_repository.insert_upload(
+            db,
+            original_filename=file.filename,
+            branch=branch,
+            file_type=file_type,
+            mongo_gridfs_id=str(file_id),
+            file_hash=sha256,
+            file_size=file_size,
         )
-        db.commit()
-        excel_upload_id = db.execute(text("SELECT LAST_INSERT_ID() as id")).mappings().first()["id"]
+    except IntegrityError:
+        # Same bytes committed concurrently by another request.
+        await db.rollback()
+        existing = await upload_repository.find_upload_by_hash(db, sha256)
+        if existing:
+            if str(existing["mongo_gridfs_id"]) != str(file_id):
+                await gridfs_storage.delete_file(file_id)
+            return _reuse_upload(existing, sha256), None
+        raise HTTPException(status_code=500, detail="Failed to write metadata")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to write metadata: {str(e)}")
 
-    try:
-        process_excel.delay(int(excel_upload_id), str(file_id), branch, file_type)
-    except Exception:
-        # If Celery/Redis not running, keep record as pending.
-        pass
-
-    return UploadResponse(
+    await response_cache.ainvalidate("uploads")
+    response = UploadResponse(
         file_id=str(file_id),
         excel_upload_id=int(excel_upload_id),
         status="queued",
         sha256=sha256,
     )
+    return response, file_size
+
+
+@router.post("/upload", response_model=UploadResponse)
+async def upload_excel(
+    file: UploadFile = File(...),
+    branch: Branch = Form(...),
+    file_type: FileType = Form(...),
+    sha256: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    _validate_upload(file)
+    response, file_size = await _store_upload(db, file, branch, file_type, sha256)
+    if file_size is not None:
+        _enqueue(response.excel_upload_id, response.file_id, branch, file_type, file_size)
+    return response
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def upload_batch(
+    files: list[UploadFile] = File(...),
+    branch: Branch = Form(...),
+    file_type: FileType = Form(...),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Store many workbooks and parse the new ones as a single chord.
+
+    Repeats are deduplicated exactly like /upload. Progress for the whole
+    batch is read from GET /ingestion/batch/{batch_id}.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=413, detail=f"Too many files (max {MAX_BATCH_FILES})")
+    for file in files:
+        _validate_upload(file)
+
+    items: list[UploadResponse] = []
+    to_parse: list[dict] = []
+    for file in files:
+        response, file_size = await _store_upload(db, file, branch, file_type)
+        items.append(response)
+        if file_size is not None:
+            to_parse.append(
+                {
+                    "excel_upload_id": response.excel_upload_id,
+                    "gridfs_id": response.file_id,
+                    "branch": branch,
+                    "file_type": file_type,
+                    "file_size": file_size,
+                }
+            )
+
+    batch_id = uuid.uuid4().hex
+    batch_status = "queued" if to_parse else "completed"
+    await get_mongo_db()["ingestion_batches"].insert_one(
+        {
+            "_id": batch_id,
+            "branch": branch,
+            "file_type": file_type,
+            "status": batch_status,
+            "total": len(items),
+            "queued": len(to_parse),
+            "parsed_ids": [],
+            "completed": 0,
+            "failed": 0,
+            "deduplicated": len(items) - len(to_parse),
+            "excel_upload_ids": [item["excel_upload_id"] for item in to_parse],
+            "created_at": time.time(),
+        }
+    )
+
+    queued = len(to_parse)
+    if to_parse:
+        try:
+            await asyncio.to_thread(start_excel_batch, batch_id, to_parse)
+        except BatchNotQueued as e:
+            # Celery/Redis not running: nothing was queued and the new uploads stay pending.
+            batch_status, queued = "failed", 0
+            await get_mongo_db()["ingestion_batches"].update_one(
+                {"_id": batch_id},
+                {"$set": {"status": batch_status, "queued": 0, "error": f"Batch was not queued: {e}", "finished_at": time.time()}},
+            )
+            pending = {item["excel_upload_id"] for item in to_parse}
+            for item in items:
+                if item.excel_upload_id in pending:
+                    item.status = "pending"
+
+    return BatchResponse(batch_id=batch_id, status=batch_status, total=len(items), queued=queued, items=items)
+
+
+@router.get("/batch/{batch_id}")
+async def get_batch(batch_id: str):
+    doc = await get_mongo_db()["ingestion_batches"].find_one({"_id": batch_id})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    doc["batch_id"] = doc.pop("_id")
+    doc["parsed"] = len(doc.pop("parsed_ids", None) or [])
+    return doc
 
 
 @router.post("/import-link", response_model=UploadResponse)
 async def import_from_link(
     request: ImportLinkRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         async with httpx.AsyncClient(follow_redirects=True, timeout=60) as client:
@@ -151,6 +320,10 @@ async def import_from_link(
     filename = str(request.url).split("/")[-1] or "import.xlsx"
     sha256 = hashlib.sha256(content).hexdigest()
 
+    existing = await upload_repository.find_upload_by_hash(db, sha256)
+    if existing:
+        return _reuse_upload(existing, sha256)
+
     metadata = {
         "branch": request.branch,
         "file_type": request.file_type,
@@ -159,110 +332,278 @@ async def import_from_link(
         "processing_status": "pending",
     }
 
-    file_id = await gridfs_storage.save_file(
-        file_content=content,
-        filename=filename,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        metadata=metadata,
-    )
+    file_id = await gridfs_storage.find_file_id_by_hash(sha256)
+    if file_id is None:
+        file_id = await gridfs_storage.save_file(
+            file_content=content,
+            filename=filename,
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            metadata=metadata,
+        )
 
-    db.execute(
-        text(
-            """
-            INSERT INTO excel_uploads (
-                original_filename, branch, file_type, mongo_gridfs_id, file_hash, file_size,
-                processing_status
-            ) VALUES (
-                :original_filename, :branch, :file_type, :mongo_gridfs_id, :file_hash, :file_size,
-                :processing_status
-            )
-            """
-        ),
-        {
-            "original_filename": filename,
-            "branch": request.branch,
-            "file_type": request.file_type,
-            "mongo_gridfs_id": str(file_id),
-            "file_hash": sha256,
-            "file_size": len(content),
-            "processing_status": "pending",
-        },
-    )
-    db.commit()
-    excel_upload_id = db.execute(text("SELECT LAST_INSERT_ID() as id")).mappings().first()["id"]
+    try:
+        excel_upload_id = await upload_repository.insert_upload(
+            db,
+            original_filename=filename,
+            branch=request.branch,
+            file_type=request.file_type,
+            mongo_gridfs_id=str(file_id),
+            file_hash=sha256,
+            file_size=len(content),
+        )
+    except IntegrityError:
+        await db.rollback()
+        existing = await upload_repository.find_upload_by_hash(db, sha256)
+        if not existing:
+            raise
+        return _reuse_upload(existing, sha256)
+
+    await response_cache.ainvalidate("uploads")
+    _enqueue(excel_upload_id, file_id, request.branch, request.file_type, len(content))
 
+    return UploadResponse(file_id=str(file_id), excel_upload_id=int(excel_upload_id), status="queued", sha256=sha256)
+
+
+def _encode_cursor(row) -> str:
+    raw = json.dumps([str(row["upload_date"]), int(row["id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
     try:
-        process_excel.delay(int(excel_upload_id), str(file_id), request.branch, request.file_type)
+        upload_date, upload_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(upload_date), int(upload_id)
     except Exception:
-        pass
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    return UploadResponse(file_id=str(file_id), excel_upload_id=int(excel_upload_id), status="queued", sha256=sha256)
+
+async def _cached_total(db: AsyncSession, where_sql: str, params: dict[str, object]) -> tuple[int, bool]:
+    """(total, estimated) for the filter, cached for TOTAL_CACHE_TTL_SECONDS.
+
+    Unfiltered totals on MySQL come from InnoDB's table statistics instead of a
+    COUNT(*) over the whole table; filtered ones count an index range.
+    """
+    key = (where_sql, tuple(sorted(params.items())))
+    hit = _total_cache.get(key)
+    if hit is not None:
+        return hit
+    if not where_sql and db.get_bind().dialect.name == "mysql":
+        result = await db.execute(
+            text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'excel_uploads'"
+            )
+        )
+        hit = (int(result.scalar_one() or 0), True)
+    else:
+        result = await db.execute(text(f"SELECT COUNT(*) FROM excel_uploads{where_sql}"), params)
+        hit = (int(result.scalar_one()), False)
+    _total_cache.set(key, hit)
+    return hit
 
 
 @router.get("/uploads", response_model=list[UploadRow])
 async def list_uploads(
+    request: Request,
     limit: int = 50,
     branch: Optional[Branch] = None,
     file_type: Optional[FileType] = None,
-    db: Session = Depends(get_db),
+    processing_status: Optional[ProcessingStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = "SELECT id, original_filename, branch, file_type, upload_date, file_size, ai_audit_score, processing_status, mongo_gridfs_id, ai_audit_id FROM excel_uploads"
-    where = []
-    params: dict[str, object] = {}
-    if branch:
-        where.append("branch = :branch")
-        params["branch"] = branch
-    if file_type:
-        where.append("file_type = :file_type")
-        params["file_type"] = file_type
-    if where:
-        q += " WHERE " + " AND ".join(where)
-    q += " ORDER BY upload_date DESC LIMIT :limit"
-    params["limit"] = int(limit)
-
-    rows = db.execute(text(q), params).mappings().all()
-    return [UploadRow(**{**r, "upload_date": str(r["upload_date"])}) for r in rows]
+    """Newest-first page of uploads.
+
+    Pages are keyed on (upload_date, id), so every page is an index range scan
+    no matter how deep it is. The next page's cursor comes back in the
+    X-Next-Cursor header; X-Total-Count (opt-in) is cached for
+    TOTAL_CACHE_TTL_SECONDS, and without filters it is MySQL's row estimate
+    (flagged by X-Total-Count-Estimated) rather than a COUNT(*). Pages are served
+    from the response cache until an upload is created or changes state.
+    """
+
+    async def build() -> response_cache.Fresh:
+        where = []
+        params: dict[str, object] = {}
+        if branch:
+            where.append("branch = :branch")
+            params["branch"] = branch
+        if file_type:
+            where.append("file_type = :file_type")
+            params["file_type"] = file_type
+        if processing_status:
+            where.append("processing_status = :processing_status")
+            params["processing_status"] = processing_status
+        if date_from:
+            where.append("upload_date >= :date_from")
+            params["date_from"] = date_from
+        if date_to:
+            where.append("upload_date < :date_to")
+            params["date_to"] = date_to
+        filter_sql = " WHERE " + " AND ".join(where) if where else ""
+        filter_params = dict(params)
+
+        if cursor:
+            cursor_date, cursor_id = _decode_cursor(cursor)
+            where.append("(upload_date < :cursor_date OR (upload_date = :cursor_date AND id < :cursor_id))")
+            params["cursor_date"] = cursor_date
+            params["cursor_id"] = cursor_id
+
+        page_size = max(1, min(int(limit), MAX_PAGE_SIZE))
+        q = f"SELECT {upload_repository.UPLOAD_COLUMNS} FROM excel_uploads"
+        if where:
+            q += " WHERE " + " AND ".join(where)
+        q += " ORDER BY upload_date DESC, id DESC LIMIT :limit"
+        # One extra row tells us whether another page exists.
+        params["limit"] = page_size + 1
+
+        result = await db.execute(text(q), params)
+        rows = result.mappings().all()
+        headers = {}
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+        if include_total:
+            total, estimated = await _cached_total(db, filter_sql, filter_params)
+            headers["X-Total-Count"] = str(total)
+            if estimated:
+                headers["X-Total-Count-Estimated"] = "true"
+        return response_cache.Fresh([UploadRow(**{**r, "upload_date": str(r["upload_date"])}) for r in rows], headers)
+
+    return await response_cache.cached_json(request, "uploads", ["uploads"], build)
+
+
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _load_statuses(excel_upload_ids: list[int]) -> dict[int, dict]:
+    # Own short session: the stream outlives the request, so it must not hold a pooled connection.
+    async with AsyncSessionLocal() as db:
+        return await upload_repository.get_statuses(db, excel_upload_ids)
+
+
+@router.get("/upload/{excel_upload_id}/events")
+async def upload_events(excel_upload_id: int):
+    """Server-Sent Events for one upload: stage timings as they happen, then its final status."""
+    return StreamingResponse(
+        status_events.stream_events([excel_upload_id], _load_statuses),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
+@router.get("/events")
+async def uploads_events(ids: Optional[str] = None):
+    """Server-Sent Events for several uploads (``ids=1,2,3``), or for every upload when omitted."""
+    try:
+        upload_ids = [int(i) for i in ids.split(",") if i.strip()] if ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    return StreamingResponse(
+        status_events.stream_events(upload_ids, _load_statuses), media_type="text/event-stream", headers=_SSE_HEADERS
+    )
 
 
 @router.get("/upload/{excel_upload_id}", response_model=UploadRow)
-async def get_upload(excel_upload_id: int, db: Session = Depends(get_db)):
-    row = db.execute(
-        text(
-            "SELECT id, original_filename, branch, file_type, upload_date, file_size, ai_audit_score, processing_status, mongo_gridfs_id, ai_audit_id FROM excel_uploads WHERE id=:id"
-        ),
-        {"id": excel_upload_id},
-    ).mappings().first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Upload not found")
-    return UploadRow(**{**row, "upload_date": str(row["upload_date"])})
+async def get_upload(excel_upload_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build() -> UploadRow:
+        result = await db.execute(
+            text(f"SELECT {upload_repository.UPLOAD_COLUMNS} FROM excel_uploads WHERE id=:id"),
+            {"id": excel_upload_id},
+        )
+        row = result.mappings().first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return UploadRow(**{**row, "upload_date": str(row["upload_date"])})
+
+    return await response_cache.cached_json(request, "upload", [response_cache.upload_tag(excel_upload_id)], build)
 
 
 @router.get("/audit/{excel_upload_id}")
-async def get_audit(excel_upload_id: int, db: Session = Depends(get_db)):
-    row = db.execute(
-        text("SELECT ai_audit_id, mongo_gridfs_id, ai_audit_score, processing_status FROM excel_uploads WHERE id=:id"),
-        {"id": excel_upload_id},
-    ).mappings().first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Upload not found")
-    if not row["ai_audit_id"]:
-        raise HTTPException(status_code=409, detail="Audit not ready")
+async def get_audit(excel_upload_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build() -> response_cache.Fresh:
+        result = await db.execute(
+            text("SELECT ai_audit_id, mongo_gridfs_id, ai_audit_score, processing_status FROM excel_uploads WHERE id=:id"),
+            {"id": excel_upload_id},
+        )
+        row = result.mappings().first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if not row["ai_audit_id"]:
+            raise HTTPException(status_code=409, detail="Audit not ready")
+
+        mongo_db = get_mongo_db()
+        doc = await mongo_db["excel_extractions"].find_one({"_id": __import__("bson").ObjectId(row["ai_audit_id"])})
+        if not doc:
+            raise HTTPException(status_code=404, detail="Audit not found")
+
+        doc["_id"] = str(doc["_id"])
+        doc["gridfs_file_id"] = str(doc.get("gridfs_file_id"))
+        # A finished audit only changes if the upload is re-processed, which bumps its tag.
+        return response_cache.Fresh(
+            {"upload": {"excel_upload_id": excel_upload_id, **row}, "audit": doc}, ttl=response_cache.IMMUTABLE_TTL_SECONDS
+        )
 
-    from database.mongodb import get_mongo_db
+    return await response_cache.cached_json(request, "audit", [response_cache.upload_tag(excel_upload_id)], build)
 
-    mongo_db = get_mongo_db()
-    doc = await mongo_db["excel_extractions"].find_one({"_id": __import__("bson").ObjectId(row["ai_audit_id"])})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Audit not found")
 
-    doc["_id"] = str(doc["_id"])
-    doc["gridfs_file_id"] = str(doc.get("gridfs_file_id"))
-    return {"upload": {"excel_upload_id": excel_upload_id, **row}, "audit": doc}
+@router.get("/audit/{excel_upload_id}/data")
+async def get_extraction_data(
+    excel_upload_id: int,
+    sheet: Optional[str] = None,
+    columns: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Rows ``offset..offset+limit`` of one sheet's Parquet extraction, optionally only some columns."""
+    if offset < 0 or not 1 <= limit <= extraction_store.MAX_READ_ROWS:
+        raise HTTPException(status_code=400, detail=f"limit must be 1..{extraction_store.MAX_READ_ROWS}, offset >= 0")
+
+    result = await db.execute(text("SELECT ai_audit_id FROM excel_uploads WHERE id=:id"), {"id": excel_upload_id})
+    ai_audit_id = result.scalar()
+    if not ai_audit_id:
+        raise HTTPException(status_code=409, detail="Audit not ready")
+
+    doc = await get_mongo_db()["excel_extractions"].find_one(
+        {"_id": __import__("bson").ObjectId(ai_audit_id)}, {"extracted_data.sheets": 1}
+    )
+    sheets = [s for s in ((doc or {}).get("extracted_data") or {}).get("sheets", []) if s.get("parquet_file_id")]
+    if sheet is not None:
+        sheets = [s for s in sheets if s["sheet"] == sheet]
+    if not sheets:
+        raise HTTPException(status_code=404, detail="No stored extraction for this sheet")
+    target = sheets[0]
+
+    wanted = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        table, total = await asyncio.to_thread(
+            extraction_store.read_table_slice, target["parquet_file_id"], wanted, offset, limit
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {e.args[0]}")
+
+    return {
+        "sheet": target["sheet"],
+        "columns": table.column_names,
+        "offset": offset,
+        "total_rows": total,
+        "rows": table.to_pylist(),
+    }
 
 
 @router.get("/file/{file_id}")
-async def download_file(file_id: str):
-    return await gridfs_storage.stream_file_response(file_id=file_id)
+async def download_file(file_id: str, request: Request):
+    return await gridfs_storage.stream_file_response(
+        file_id=file_id,
+        range_header=request.headers.get("range"),
+        if_none_match=request.headers.get("if-none-match"),
+        if_modified_since=request.headers.get("if-modified-since"),
+        if_range=request.headers.get("if-range"),
+    )
 
 
 @router.get("/file/{file_id}/preview")
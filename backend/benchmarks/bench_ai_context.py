@@ -0,0 +1,69 @@
+"""Prompt size: raw dict reprs (what AIService used to paste) vs the token-budgeted KPI context.
+
+Run from backend/ (offline, no Mongo needed):
+    python -m benchmarks.bench_ai_context --rows 100 1000 10000 100000
+Each size simulates a month of extracted rows and the alerts raised on them.
+"""
+import argparse
+import random
+import time
+
+from services import ai_context
+
+ITEMS = [f"item {i}" for i in range(400)]
+VENDORS = ["acme foods", "fresh farm", "city wholesale", "lake traders"]
+
+
+def synthetic(rows: int) -> tuple[dict, ai_context.BranchKPIs]:
+    records = [
+        {
+            "item": random.choice(ITEMS),
+            "vendor_name": random.choice(VENDORS),
+            "quantity": random.randint(1, 50),
+            "unit_price": round(random.uniform(500, 20000), 2),
+            "total": 0,
+        }
+        for _ in range(rows)
+    ]
+    alerts = [
+        {"severity": "critical" if i % 7 == 0 else "warning", "message": f"Price Spike: {r['item']} up 18.2% vs 30d avg"}
+        for i, r in enumerate(records[: rows // 20])
+    ]
+    raw = {"records": records, "alerts": alerts}
+    kpis = ai_context.BranchKPIs(
+        "patiobella",
+        30,
+        uploads=rows // 500 + 1,
+        revenue=rows * 1520.0,
+        food_cost=rows * 470.0,
+        labor_cost=rows * 300.0,
+        covers=rows * 0.8,
+        procurement_spend=sum(r["quantity"] * r["unit_price"] for r in records),
+        alert_counts={"critical": len(alerts) // 7, "warning": len(alerts) - len(alerts) // 7},
+        top_alerts=alerts[: ai_context.TOP_ALERTS],
+        price_deltas=[
+            {"_id": item, "low": 900.0, "low_vendor": VENDORS[0], "high": 1300.0, "high_vendor": VENDORS[1], "spread": 0.44}
+            for item in ITEMS[: ai_context.TOP_PRICE_DELTAS]
+        ],
+    )
+    return raw, kpis
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--budget", type=int, default=ai_context.CONTEXT_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'raw dict prompt':>16}  {'KPI context':>12}  render")
+    for rows in args.rows:
+        raw, kpis = synthetic(rows)
+        before = ai_context.estimate_tokens(f"Analyze this data: {raw}")
+        started = time.perf_counter()
+        text = ai_context.render_context([kpis, ai_context.BranchKPIs("eateroo", 30)], budget=args.budget)
+        elapsed = (time.perf_counter() - started) * 1e6
+        print(f"{rows:>8d}  {before:>10d} tokens  {ai_context.estimate_tokens(text):>5d} tokens  {elapsed:6.0f} us")
+
+
+if __name__ == "__main__":
+    main()
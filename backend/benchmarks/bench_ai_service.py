@@ -0,0 +1,154 @@
+"""AIService against a local stub of the chat completions API: event-loop stalls, concurrency, cache.
+
+Run from backend/ (no OpenAI key needed, the stub listens on localhost):
+    python -m benchmarks.bench_ai_service --requests 32 --latency 0.5
+The blocking baseline is the old pattern: the sync OpenAI client called inside ``async def``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def stub_app(latency: float, fail_every: int, tokens: int = 1) -> FastAPI:
+    """Fake /v1/chat/completions: ``latency`` seconds per answer, spread over ``tokens`` chunks when streaming."""
+    app = FastAPI()
+    calls = {"n": 0}
+
+    @app.post("/v1/chat/completions")
+    async def completions(body: dict):
+        calls["n"] += 1
+        n = calls["n"]
+        if fail_every and n % fail_every == 0:
+            await asyncio.sleep(latency)
+            return JSONResponse({"error": {"message": "overloaded"}}, status_code=503)
+        base = {"id": f"stub-{n}", "created": int(time.time()), "model": body["model"]}
+        if body.get("stream"):
+
+            async def chunks():
+                for i in range(tokens):
+                    await asyncio.sleep(latency / tokens)
+                    delta = {"role": "assistant", "content": f"tok{i} "}
+                    chunk = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+        await asyncio.sleep(latency)
+        content = " ".join(f"tok{i}" for i in range(tokens)) if tokens > 1 else "Stub insight."
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        }
+
+    app.state.calls = calls
+    return app
+
+
+def start_stub(latency: float, fail_every: int = 0, tokens: int = 1) -> tuple[str, FastAPI]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    app = stub_app(latency, fail_every, tokens)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1", app
+
+
+async def max_loop_lag(work) -> tuple[float, float]:
+    """Run ``work`` while a 10 ms ticker measures the worst event-loop stall."""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - started - 0.01)
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - started
+    done = True
+    await task
+    return elapsed, lag
+
+
+async def run(args, base_url: str, app: FastAPI):
+    from openai import OpenAI
+
+    from services.ai_service import INSIGHT_SYSTEM_PROMPT, ai_service
+
+    blocking = OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+
+    async def legacy_insight(data):
+        try:
+            response = blocking.chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "system", "content": INSIGHT_SYSTEM_PROMPT}, {"role": "user", "content": f"Analyze this data: {data}"}],
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            return f"Error generating insight: {str(e)}"
+
+    payloads = [{"revenue": 100_000 + i, "growth": 12.5, "red_flags": 3} for i in range(args.requests)]
+
+    results = {}
+
+    async def legacy():
+        results["sync"] = await asyncio.gather(*(legacy_insight(p) for p in payloads))
+
+    async def cold():
+        results["async"] = await asyncio.gather(*(ai_service.generate_insight(p) for p in payloads))
+
+    def failed(key):
+        return sum(r.startswith("Error") for r in results[key])
+
+    elapsed, lag = await max_loop_lag(legacy)
+    print(
+        f"sync client   {args.requests} requests: {elapsed:6.2f} s  worst loop stall {lag * 1e3:8.1f} ms"
+        f"  ({failed('sync')} failed)"
+    )
+    calls_before = app.state.calls["n"]
+    elapsed, lag = await max_loop_lag(cold)
+    print(
+        f"AsyncOpenAI   {args.requests} requests: {elapsed:6.2f} s  worst loop stall {lag * 1e3:8.1f} ms"
+        f"  ({app.state.calls['n'] - calls_before} upstream calls, {failed('async')} failed)"
+    )
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        await ai_service.generate_insight(payloads[0])
+    print(f"cached summary: {(time.perf_counter() - started) / args.repeat * 1e6:8.1f} us/call")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub completion latency in seconds")
+    parser.add_argument("--fail-every", type=int, default=0, help="make every Nth stub call return 503")
+    parser.add_argument("--repeat", type=int, default=10_000)
+    args = parser.parse_args()
+
+    base_url, app = start_stub(args.latency, args.fail_every)
+    # ai_service builds its client at import time from these.
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("AI_RETRY_BASE_SECONDS", "0.05")
+    asyncio.run(run(args, base_url, app))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Perceived latency of the AI endpoints: full completion vs first streamed token.
+
+Run from backend/ (uses the local stub from bench_ai_service, no OpenAI key needed):
+    python -m benchmarks.bench_ai_streaming --latency 4 --tokens 200
+The streamed frames are read through /api/ai/query/stream over real HTTP.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from benchmarks.bench_ai_service import start_stub
+
+
+def start_api() -> str:
+    from main import app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def run(api: str, repeat: int) -> None:
+    async with httpx.AsyncClient(base_url=api, timeout=60) as http:
+        full, first, streamed = [], [], []
+        for i in range(repeat):
+            body = {"query": f"How is Patiobella doing? #{i}", "context": {"run": "blocking"}}
+            started = time.perf_counter()
+            (await http.post("/api/ai/query", json=body)).raise_for_status()
+            full.append(time.perf_counter() - started)
+
+            body["context"] = {"run": "streaming"}
+            started = time.perf_counter()
+            async with http.stream("POST", "/api/ai/query/stream", json=body) as response:
+                async for line in response.aiter_lines():
+                    if line == "event: token" and len(first) == i:
+                        first.append(time.perf_counter() - started)
+            streamed.append(time.perf_counter() - started)
+
+        metrics = (await http.get("/api/ai/metrics")).json()
+
+    def avg(xs):
+        return sum(xs) / len(xs) * 1e3
+
+    print(f"/api/ai/query         time to answer:      {avg(full):8.1f} ms")
+    print(f"/api/ai/query/stream  time to first token: {avg(first):8.1f} ms   (complete after {avg(streamed):8.1f} ms)")
+    print(f"service ttft p50 {metrics['ttft_ms_p50']} ms, p95 {metrics['ttft_ms_p95']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=4.0, help="stub generation time in seconds")
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    base_url, _ = start_stub(args.latency, tokens=args.tokens)
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    asyncio.run(run(start_api(), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
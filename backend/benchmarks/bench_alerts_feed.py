@@ -0,0 +1,86 @@
+"""Seed the alerts collection at growing sizes and time the /api/ai/alerts queries.
+
+Run from backend/ against a scratch MongoDB (MONGODB_URL):
+    python -m benchmarks.bench_alerts_feed --sizes 10000 100000 1000000
+Latency should stay flat across sizes: every query is an index range scan of one page.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import InsertOne
+
+from database.mongodb import get_mongo_db, get_sync_mongo_db
+from services import alerts_store
+
+BRANCHES = ["patiobella", "eateroo"]
+SEVERITIES = ["critical", "warning", "info"]
+RULES = ["price_spike", "vendor_delta", "stockout_risk", "excess_stock", "line_total_mismatch"]
+BATCH = 10_000
+
+
+def seed(total: int, already: int) -> None:
+    collection = get_sync_mongo_db()[alerts_store.ALERTS_COLLECTION]
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    ops = []
+    for n in range(already, total):
+        ops.append(
+            InsertOne(
+                {
+                    "_id": alerts_store.alert_id(n // 20, f"Sheet1:{RULES[n % 5]}-{n}"),
+                    "branch": random.choice(BRANCHES),
+                    "severity": random.choice(SEVERITIES),
+                    "rule": RULES[n % 5],
+                    "message": f"synthetic alert {n}",
+                    "excel_upload_id": n // 20,
+                    "timestamp": start + timedelta(seconds=n * 30),
+                    "acknowledged": False,
+                }
+            )
+        )
+        if len(ops) == BATCH:
+            collection.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+
+
+async def time_queries(repeat: int) -> dict[str, float]:
+    db = get_mongo_db()
+    _, cursor = await alerts_store.list_alerts(db, limit=50)
+    recent = datetime.now(timezone.utc) - timedelta(hours=1)
+    cases = {
+        "latest page": {},
+        "branch + severity": {"branch": "eateroo", "severity": "critical"},
+        "next page (cursor)": {"cursor": cursor},
+        "since= poll": {"since": recent},
+    }
+    out = {}
+    for label, kwargs in cases.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await alerts_store.list_alerts(db, limit=50, **kwargs)
+        out[label] = (time.perf_counter() - started) / repeat * 1e3
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    get_sync_mongo_db()[alerts_store.ALERTS_COLLECTION].drop()
+    asyncio.run(alerts_store.ensure_indexes(get_mongo_db()))
+    seeded = 0
+    for size in sorted(args.sizes):
+        seed(size, seeded)
+        seeded = size
+        timings = asyncio.run(time_queries(args.repeat))
+        print(f"{size:>9d} alerts  " + "  ".join(f"{k}: {v:6.2f} ms" for k, v in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
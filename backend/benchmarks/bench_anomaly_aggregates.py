@@ -0,0 +1,97 @@
+"""AnomalyDetector lookups: per-item history rescans vs the rolling aggregate index.
+
+Run from backend/:  python -m benchmarks.bench_anomaly_aggregates --items 10000 --history 1000000
+The naive path is timed on --naive-sample items and extrapolated (it is O(items x history)).
+Mongo is not involved: the aggregate side is built with ItemAggregates.from_history /
+daily_rows, which is the same work the worker and the store do.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pyarrow as pa
+
+from services.anomalies import anomaly_detector
+from services.item_aggregates import WINDOW_DAYS, ItemAggregates, daily_rows
+
+VENDORS = ["acme", "fresh co", "metro", "kampala dairy", "bulkpro"]
+
+
+def build(items: int, history_rows: int):
+    rng = np.random.default_rng(11)
+    now = datetime.now(timezone.utc)
+    names = [f"item-{i}" for i in range(items)]
+    idx = rng.integers(0, items, history_rows)
+    vendors = rng.integers(0, len(VENDORS), history_rows)
+    prices = rng.random(history_rows) * 100 + 50
+    used = rng.integers(0, 20, history_rows)
+    ages = rng.integers(0, WINDOW_DAYS * 2, history_rows)
+    days = [(now - timedelta(days=int(a))).date().isoformat() for a in range(WINDOW_DAYS * 2)]
+    history = [
+        {"item_name": names[i], "vendor": VENDORS[v], "unit_cost": float(p), "quantity_used": int(u), "date": days[a]}
+        for i, v, p, u, a in zip(idx.tolist(), vendors.tolist(), prices.tolist(), used.tolist(), ages.tolist())
+    ]
+    current = [
+        {"item_name": n, "unit_cost": float(rng.random() * 150 + 50), "quantity": int(rng.integers(1, 400)), "vendor": VENDORS[i % len(VENDORS)]}
+        for i, n in enumerate(names)
+    ]
+    return current, history, now
+
+
+def naive_audit(current, history, now):
+    """What the placeholder helpers would do if filled in directly: scan history per item."""
+    cutoff = (now - timedelta(days=WINDOW_DAYS)).date().isoformat()
+    alerts = 0
+    for item in current:
+        rows = [h for h in history if h["item_name"] == item["item_name"] and h["date"] >= cutoff]
+        prices = [h["unit_cost"] for h in rows]
+        avg = sum(prices) / len(prices) if prices else None
+        others = [h["unit_cost"] for h in rows if h["vendor"] != item["vendor"]]
+        burn = sum(h["quantity_used"] for h in rows) / max(1, len({h["date"] for h in rows}))
+        alerts += bool(avg and item["unit_cost"] > avg * 1.15) + bool(others and item["unit_cost"] > min(others) * 1.2)
+        alerts += bool(burn and item["quantity"] / burn < 2)
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--history", type=int, default=1_000_000)
+    parser.add_argument("--naive-sample", type=int, default=20)
+    args = parser.parse_args()
+
+    current, history, now = build(args.items, args.history)
+    print(f"items={args.items} history rows={args.history}")
+
+    started = time.perf_counter()
+    naive_audit(current[: args.naive_sample], history, now)
+    per_item = (time.perf_counter() - started) / args.naive_sample
+    print(f"naive rescan          {per_item * 1e3:8.1f} ms/item  -> ~{per_item * args.items:8.0f} s for all items (extrapolated)")
+
+    started = time.perf_counter()
+    aggregates = ItemAggregates.from_history(history, now=now)
+    build_s = time.perf_counter() - started
+    print(f"aggregate build       {build_s:8.2f} s   ({len(aggregates)} keys, one pass; the store keeps this precomputed)")
+
+    started = time.perf_counter()
+    alerts = asyncio.run(anomaly_detector.run_full_audit(current, aggregates=aggregates))
+    audit_s = time.perf_counter() - started
+    print(f"audit with lookups    {audit_s:8.3f} s   ({audit_s / args.items * 1e6:.1f} us/item, {len(alerts)} alerts)")
+
+    table = pa.table(
+        {
+            "item": [c["item_name"] for c in current],
+            "vendor_name": [c["vendor"] for c in current],
+            "quantity": [c["quantity"] for c in current],
+            "unit_price": [c["unit_cost"] for c in current],
+        }
+    )
+    started = time.perf_counter()
+    rows = daily_rows({"Sheet1": table}, now.date().isoformat())
+    print(f"incremental delta     {time.perf_counter() - started:8.3f} s   ({len(rows)} item-day rows from a {args.items}-row sheet)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Anomaly rules: per-item dict loop vs the vectorized rule engine.
+
+Run from backend/:  python -m benchmarks.bench_anomaly_rules --rows 500000
+Both paths get the same reference stats (an ItemAggregates built from synthetic history);
+the loop reproduces the previous AnomalyDetector rules (price spike, vendor delta,
+stockout, excess stock) including its two datetime.now() calls per alert.
+
+The sub-second target holds with the worker's per-rule alert cap (--alerts-per-rule),
+which is what production runs. The uncapped run is printed for reference: building
+every alert dict makes it several times slower on this noisy synthetic sheet.
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from services import anomaly_rules
+from services.item_aggregates import ItemAggregates, ItemStats
+
+VENDORS = ["acme", "fresh co", "metro", "kampala dairy", "bulkpro"]
+
+
+def build(rows: int, items: int):
+    rng = np.random.default_rng(5)
+    stats = {
+        ("eateroo", f"item-{i}", v): ItemStats(float(rng.random() * 100 + 50), 10, float(rng.random() * 20))
+        for i in range(items)
+        for v in VENDORS[: 1 + i % len(VENDORS)]
+    }
+    quantity = rng.integers(1, 100, rows)
+    unit_cost = rng.random(rows) * 150 + 40
+    total = quantity * unit_cost * np.where(rng.random(rows) < 0.01, 1.3, 1.0)
+    frame = pd.DataFrame(
+        {
+            "item": [f"Item-{i}" for i in rng.integers(0, items, rows)],
+            "vendor_name": np.array([v.title() for v in VENDORS])[rng.integers(0, len(VENDORS), rows)],
+            "quantity": quantity,
+            "unit_price": unit_cost,
+            "total": total,
+            "closing_stock": rng.integers(0, 400, rows),
+        }
+    )
+    return ItemAggregates(stats), frame
+
+
+def _alert(severity, message):
+    return {"id": f"alert-{datetime.now().timestamp()}", "type": severity, "message": message,
+            "timestamp": datetime.now().isoformat(), "acknowledged": False}
+
+
+def legacy_loop(records, aggregates):
+    alerts = []
+    for item in records:
+        name, price, vendor = item["item_name"], item["unit_cost"], item["vendor"]
+        avg = aggregates.historical_avg("eateroo", name)
+        if avg and price > avg * 1.15:
+            alerts.append(_alert("critical", f"Price Spike: {name} up {((price / avg) - 1) * 100:.1f}% vs 30d avg"))
+        for other in aggregates.other_vendor_prices("eateroo", name, vendor):
+            if price > other * 1.20:
+                alerts.append(_alert("warning", f"Market Delta: {vendor} is 20%+ higher than others for {name}"))
+        burn = aggregates.burn_rate("eateroo", name)
+        if burn > 0 and item["stock_on_hand"] / burn < 2:
+            alerts.append(_alert("critical", f"Stockout Risk: {name} will deplete in <48 hours"))
+        if burn > 0 and item["stock_on_hand"] / burn > 15:
+            alerts.append(_alert("info", f"Excess Stock: {name} levels exceed 15-day demand"))
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--items", type=int, default=5_000)
+    parser.add_argument("--alerts-per-rule", type=int, default=200, help="cap used by the worker")
+    args = parser.parse_args()
+
+    aggregates, frame = build(args.rows, args.items)
+    records = frame.rename(columns={"item": "item_name", "vendor_name": "vendor", "unit_price": "unit_cost",
+                                    "closing_stock": "stock_on_hand"}).to_dict("records")
+    print(f"rows={args.rows} reference keys={len(aggregates)}")
+
+    started = time.perf_counter()
+    legacy = legacy_loop(records, aggregates)
+    print(f"legacy dict loop      {time.perf_counter() - started:7.2f} s  ({len(legacy)} alerts, 4 rules)")
+
+    for limit in (args.alerts_per_rule, None):
+        started = time.perf_counter()
+        alerts = anomaly_rules.evaluate(frame, aggregates=aggregates, branch="eateroo", limit_per_rule=limit)
+        label = f"engine (cap {limit})" if limit else "engine (uncapped)"
+        print(f"{label:22s}{time.perf_counter() - started:7.2f} s  ({len(alerts)} alerts, {len(anomaly_rules.RULES)} rules)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Checks ingestion queue routing and measures dispatch throughput on an in-memory broker.
+
+Run from backend/:  python -m benchmarks.bench_celery_routing --tasks 2000
+No Redis, MySQL or Mongo is needed: a no-op task stands in for process_excel's body.
+The embedded worker uses the solo pool; the memory transport's polling consumer
+stalls under the threads pool once prefetch credits run out.
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+
+from celery.contrib.testing.worker import start_worker  # noqa: E402
+
+from celery_app import HEAVY_MIN_BYTES, HEAVY_QUEUE, LIGHT_QUEUE, celery_app  # noqa: E402
+
+PROCESS_EXCEL = "tasks.excel_tasks.process_excel"
+
+
+@celery_app.task(name="benchmarks.noop")
+def noop(*args, **kwargs):
+    return None
+
+
+def check_routing() -> None:
+    router = celery_app.amqp.router
+    cases = [
+        ((1, "f", "patiobella", "procurement"), {"file_size": 10_000}, LIGHT_QUEUE),
+        ((1, "f", "patiobella", "procurement"), {"file_size": HEAVY_MIN_BYTES}, HEAVY_QUEUE),
+        ((1, "f", "eateroo", "sales"), {"file_size": 10_000}, HEAVY_QUEUE),
+        ((1, "f", "eateroo", "petty_cash"), {}, LIGHT_QUEUE),
+    ]
+    for args, kwargs, expected in cases:
+        queue = router.route({}, PROCESS_EXCEL, args, kwargs)["queue"].name
+        assert queue == expected, (args, kwargs, queue)
+        print(f"  {args[3]:>12} size={kwargs.get('file_size')!s:>8} -> {queue}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--prefetch", type=int, default=celery_app.conf.worker_prefetch_multiplier)
+    args = parser.parse_args()
+    celery_app.conf.worker_prefetch_multiplier = args.prefetch
+
+    # The memory transport polls; keep its idle interval out of the measurement.
+    celery_app.conf.broker_transport_options = {**celery_app.conf.broker_transport_options, "polling_interval": 0.001}
+
+    print("routing:")
+    check_routing()
+
+    with start_worker(celery_app, pool="solo", concurrency=1, perform_ping_check=False,
+                      queues=[LIGHT_QUEUE, HEAVY_QUEUE]):
+        started = time.perf_counter()
+        results = [
+            noop.apply_async(queue=HEAVY_QUEUE if i % 2 else LIGHT_QUEUE) for i in range(args.tasks)
+        ]
+        for r in results:
+            r.get(timeout=30, interval=0.001)
+        elapsed = time.perf_counter() - started
+    print(f"throughput: {args.tasks / elapsed:.0f} tasks/s over {args.tasks} tasks (prefetch {args.prefetch})")
+
+
+if __name__ == "__main__":
+    main()
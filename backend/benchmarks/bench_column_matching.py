@@ -0,0 +1,98 @@
+"""Column matching: legacy exact lowercase lookup vs the alias-index matcher (cold and cached).
+
+Run from backend/:  python -m benchmarks.bench_column_matching --repeat 2000
+Accuracy is measured over a labelled corpus of supplier/POS header variants.
+"""
+import argparse
+import time
+
+from services.column_matcher import ColumnMatcher
+from services.excel_processor import CURRENCY_FIELDS, FIELD_ALIASES, excel_processor_service
+
+# (file_type, headers, expected {field: header}); unlisted fields are expected to stay unmapped.
+# "Food Cost %" is a ratio, not money, so food_cost must stay unmapped on that sheet.
+CORPUS = [
+    ("procurement", ["Supplier", "Item Description", "Qty.", "Unit Price (UGX)", "Total (UGX)"],
+     {"vendor_name": "Supplier", "item": "Item Description", "quantity": "Qty.", "unit_price": "Unit Price (UGX)", "total": "Total (UGX)"}),
+    ("procurement", ["Vendor Name", "Product", "Quantity", "Price", "Line Total"],
+     {"vendor_name": "Vendor Name", "item": "Product", "quantity": "Quantity", "unit_price": "Price", "total": "Line Total"}),
+    ("procurement", ["vendor_name", "item", "quantity", "unit_price", "total"],
+     {"vendor_name": "vendor_name", "item": "item", "quantity": "quantity", "unit_price": "unit_price", "total": "total"}),
+    ("procurement", ["SUPPLIER NAME", "SKU", "QTY", "RATE", "AMOUNT", "Notes"],
+     {"vendor_name": "SUPPLIER NAME", "item": "SKU", "quantity": "QTY", "unit_price": "RATE", "total": "AMOUNT"}),
+    ("procurement", ["Date", "Suplier", "Item Name", "Units", "Cost/Unit", "Total Cost"],
+     {"vendor_name": "Suplier", "item": "Item Name", "quantity": "Units", "unit_price": "Cost/Unit", "total": "Total Cost"}),
+    ("inventory", ["Item", "Opening Bal.", "Stock In", "Stock Out", "Closing Bal", "UOM"],
+     {"item": "Item", "opening_stock": "Opening Bal.", "received": "Stock In", "issued": "Stock Out", "closing_stock": "Closing Bal", "unit": "UOM"}),
+    ("inventory", ["Product Name", "Opening Stock", "Received", "Issued", "Closing Stock", "Unit"],
+     {"item": "Product Name", "opening_stock": "Opening Stock", "received": "Received", "issued": "Issued", "closing_stock": "Closing Stock", "unit": "Unit"}),
+    ("inventory", ["Description", "Opening Qty", "Qty Received", "Usage", "Stock on Hand", "Unit of Measure"],
+     {"item": "Description", "opening_stock": "Opening Qty", "received": "Qty Received", "issued": "Usage", "closing_stock": "Stock on Hand", "unit": "Unit of Measure"}),
+    ("sales", ["Business Date", "Net Sales (UGX)", "Guests", "Avg Spend", "Food Cost %", "Labour Cost"],
+     {"date": "Business Date", "revenue": "Net Sales (UGX)", "covers": "Guests", "avg_check": "Avg Spend", "labor_cost": "Labour Cost"}),
+    ("sales", ["Date", "Revenue", "Covers", "Average Check", "Food Cost", "Wages"],
+     {"date": "Date", "revenue": "Revenue", "covers": "Covers", "avg_check": "Average Check", "food_cost": "Food Cost", "labor_cost": "Wages"}),
+    ("sales", ["Date", "Net Sales", "Food Cost", "Labour Pct", "Covers"],
+     {"date": "Date", "revenue": "Net Sales", "food_cost": "Food Cost", "covers": "Covers"}),
+    ("sales", ["DAY", "TAKINGS", "PAX", "Spend per Head"],
+     {"date": "DAY", "revenue": "TAKINGS", "covers": "PAX", "avg_check": "Spend per Head"}),
+    ("finance", ["Invoice #", "Supplier", "Inv. Date", "Due Date", "Invoice Total", "Amount Paid"],
+     {"invoice_number": "Invoice #", "vendor_name": "Supplier", "invoice_date": "Inv. Date", "due_date": "Due Date", "total_amount": "Invoice Total", "paid_amount": "Amount Paid"}),
+    ("finance", ["Invoice No.", "Vendor", "Invoice Date", "Payment Due", "Total Amount (UGX)", "Paid"],
+     {"invoice_number": "Invoice No.", "vendor_name": "Vendor", "invoice_date": "Invoice Date", "due_date": "Payment Due", "total_amount": "Total Amount (UGX)", "paid_amount": "Paid"}),
+    ("petty_cash", ["Date", "Details", "Amount (UGX)", "Dr/Cr"],
+     {"date": "Date", "description": "Details", "amount": "Amount (UGX)", "direction": "Dr/Cr"}),
+    ("petty_cash", ["Txn Date", "Narration", "Amt", "Type", "Approved By"],
+     {"date": "Txn Date", "description": "Narration", "amount": "Amt", "direction": "Type"}),
+]
+
+
+def legacy_match(columns, schema):
+    lower_cols = [c.lower().strip() for c in columns]
+    return {s: columns[lower_cols.index(s)] for s in schema if s in lower_cols}
+
+
+def new_match(matcher):
+    def run(columns, schema):
+        return {m["mapped_to"]: m["original"] for m in matcher.match(columns, schema) if m["original"] is not None}
+
+    return run
+
+
+def accuracy(match) -> float:
+    correct = total = 0
+    for file_type, columns, expected in CORPUS:
+        schema = excel_processor_service.get_schema_for_type("eateroo", file_type)
+        got = match(columns, schema)
+        for field in schema:
+            total += 1
+            correct += got.get(field) == expected.get(field)
+    return correct / total
+
+
+def timed(match, repeat: int) -> float:
+    schemas = [(c, excel_processor_service.get_schema_for_type("eateroo", t)) for t, c, _ in CORPUS]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for columns, schema in schemas:
+            match(columns, schema)
+    return (time.perf_counter() - started) / (repeat * len(schemas)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"corpus: {len(CORPUS)} header sets")
+    print(f"legacy exact match     accuracy={accuracy(legacy_match):6.1%}  {timed(legacy_match, args.repeat):8.1f} us/sheet")
+
+    cold = ColumnMatcher(FIELD_ALIASES, cache_size=0, currency_fields=CURRENCY_FIELDS)
+    print(f"alias index (uncached) accuracy={accuracy(new_match(cold)):6.1%}  {timed(new_match(cold), max(1, args.repeat // 20)):8.1f} us/sheet")
+
+    warm = ColumnMatcher(FIELD_ALIASES, currency_fields=CURRENCY_FIELDS)
+    print(f"alias index (cached)   accuracy={accuracy(new_match(warm)):6.1%}  {timed(new_match(warm), args.repeat):8.1f} us/sheet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Extraction storage: JSON records (what excel_extractions embedded) vs zstd Parquet.
+
+Run from backend/:  python -m benchmarks.bench_extraction_storage --rows 200000
+Parquet is written to and read from memory with the same settings the worker uses for
+GridFS, so the numbers exclude network time. The column/range read mirrors
+GET /api/ingestion/audit/{id}/data?columns=item,total&offset=...&limit=100.
+"""
+import argparse
+import io
+import json
+import time
+
+import bson
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from services.extraction_store import PARQUET_COMPRESSION, ROW_GROUP_ROWS, frame_to_table
+
+
+def build_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    return pd.DataFrame(
+        {
+            "vendor_name": rng.choice(["Acme Foods", "Fresh Co", "Metro Wholesale", "Kampala Dairy"], rows),
+            "item": [f"item-{i % 2000}" for i in range(rows)],
+            "quantity": rng.integers(1, 200, rows),
+            "unit_price": rng.random(rows) * 40_000,
+            "total": rng.random(rows) * 2_000_000,
+            "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        }
+    )
+
+
+def timed(fn, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    df = build_frame(args.rows)
+    records = df.to_dict(orient="records")
+    offset = args.rows // 2
+
+    json_bytes, json_write = timed(lambda: json.dumps(records, default=str).encode())
+    bson_bytes = sum(len(bson.encode(r)) for r in records[:1000]) * args.rows / 1000
+    _, json_read = timed(lambda: json.loads(json_bytes))
+    _, json_slice = timed(lambda: [{k: r[k] for k in ("item", "total")} for r in json.loads(json_bytes)[offset:offset + 100]])
+
+    def write_parquet():
+        buf = io.BytesIO()
+        pq.write_table(frame_to_table(df), buf, compression=PARQUET_COMPRESSION, row_group_size=ROW_GROUP_ROWS)
+        return buf.getvalue()
+
+    parquet_bytes, parquet_write = timed(write_parquet)
+    _, parquet_read = timed(lambda: pq.read_table(io.BytesIO(parquet_bytes)))
+
+    def parquet_slice():
+        pf = pq.ParquetFile(io.BytesIO(parquet_bytes))
+        group = offset // ROW_GROUP_ROWS
+        return pf.read_row_groups([group], columns=["item", "total"]).slice(offset - group * ROW_GROUP_ROWS, 100)
+
+    _, parquet_slice_t = timed(parquet_slice)
+
+    print(f"rows: {args.rows}")
+    print(f"{'':22s}{'size MB':>10s}{'write s':>10s}{'full read s':>13s}{'2 cols x 100 rows ms':>22s}")
+    print(f"{'JSON records':22s}{len(json_bytes) / 1e6:10.1f}{json_write:10.2f}{json_read:13.2f}{json_slice * 1e3:22.1f}")
+    print(f"{'  (as BSON, est.)':22s}{bson_bytes / 1e6:10.1f}")
+    print(f"{'Parquet ' + PARQUET_COMPRESSION:22s}{len(parquet_bytes) / 1e6:10.1f}{parquet_write:10.2f}{parquet_read:13.2f}{parquet_slice_t * 1e3:22.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Dashboard summary cost as history grows: rollup read vs aggregating every extraction.
+
+Run from backend/ against a scratch MongoDB (MONGODB_URL):
+    python -m benchmarks.bench_kpi_summary --months 1 6 12 24 --uploads-per-day 20
+The rollup read should stay flat; the naive aggregation grows with the months seeded.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from database.mongodb import get_mongo_db, get_sync_mongo_db
+from services import kpi_rollups
+
+BRANCHES = ["patiobella", "eateroo"]
+FILE_TYPES = ["sales", "procurement", "inventory", "finance", "petty_cash"]
+
+
+def seed_day(day: date, uploads: int, next_id: int) -> int:
+    db = get_sync_mongo_db()
+    buckets: set = set()
+    extractions = []
+    for _ in range(uploads):
+        branch, file_type = random.choice(BRANCHES), random.choice(FILE_TYPES)
+        rows = random.randint(50, 400)
+        if file_type == "sales":
+            table = pa.table({"date": [day.isoformat()] * rows, "revenue": [random.uniform(500, 5000) for _ in range(rows)]})
+        else:
+            table = pa.table({"total": [random.uniform(100, 900) for _ in range(rows)]})
+        contribution = kpi_rollups.contribution_rows([table], day.isoformat(), [{"type": "critical"}] * random.randint(0, 3))
+        buckets |= kpi_rollups.record_upload(db, next_id, branch, file_type, contribution, refresh=False)
+        # What the naive summary would scan: one extraction doc with per-sheet stats.
+        extractions.append(
+            {
+                "excel_upload_id": next_id,
+                "branch": branch,
+                "file_type": file_type,
+                "day": day.isoformat(),
+                "sheets": [{"stats": {"columns": {c: {"sum": pc.sum(table[c]).as_py()} for c in table.column_names if c != "date"}}}],
+            }
+        )
+        next_id += 1
+    db["bench_extractions"].insert_many(extractions)
+    kpi_rollups.refresh_rollups(db, buckets)
+    return next_id
+
+
+async def naive_summary(db, since: str) -> dict:
+    pipeline = [
+        {"$match": {"day": {"$gte": since}}},
+        {"$unwind": "$sheets"},
+        {"$group": {"_id": None, "revenue": {"$sum": "$sheets.stats.columns.revenue.sum"}, "spend": {"$sum": "$sheets.stats.columns.total.sum"}}},
+    ]
+    return await db["bench_extractions"].aggregate(pipeline).to_list(length=1)
+
+
+async def time_reads(today: date, repeat: int) -> tuple[float, float]:
+    db = get_mongo_db()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await kpi_rollups.load_summary(db, days=30, today=today)
+    rollup = (time.perf_counter() - started) / repeat * 1e3
+    started = time.perf_counter()
+    for _ in range(repeat):
+        # Without a rollup store the only safe answer scans everything (no window index).
+        await naive_summary(db, "0000-00-00")
+    naive = (time.perf_counter() - started) / repeat * 1e3
+    return rollup, naive
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, nargs="+", default=[1, 6, 12, 24])
+    parser.add_argument("--uploads-per-day", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = get_sync_mongo_db()
+    for name in (kpi_rollups.DAILY_COLLECTION, kpi_rollups.ROLLUP_COLLECTION, "bench_extractions"):
+        db[name].drop()
+    asyncio.run(kpi_rollups.ensure_indexes(get_mongo_db()))
+
+    today = date.today()
+    seeded_days, next_id = 0, 1
+    for months in sorted(args.months):
+        while seeded_days < months * 30:
+            next_id = seed_day(today - timedelta(days=seeded_days), args.uploads_per_day, next_id)
+            seeded_days += 1
+        rollup, naive = asyncio.run(time_reads(today, args.repeat))
+        print(f"{months:>3d} months ({next_id - 1:>6d} uploads)  rollup summary {rollup:7.2f} ms   naive aggregate {naive:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
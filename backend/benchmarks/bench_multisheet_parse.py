@@ -0,0 +1,78 @@
+"""Workbook parsing for the worker: pandas full load vs chunked openpyxl vs chunked calamine.
+
+Run from backend/:  python -m benchmarks.bench_multisheet_parse --sheets 4 --rows 50000
+Peak memory is the tracemalloc high-water mark of the parse (the workbook bytes are excluded).
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from services import excel_processor
+from services.excel_processor import iter_sheet_chunks
+
+
+def build_workbook(sheets: int, rows: int) -> bytes:
+    rng = np.random.default_rng(7)
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        for n in range(sheets):
+            pd.DataFrame(
+                {
+                    "Vendor_Name": rng.choice(["Acme", "Fresh Co", "Metro"], rows),
+                    "Item": [f"item-{i % 500}" for i in range(rows)],
+                    "Quantity": rng.integers(1, 100, rows),
+                    "Unit_Price": rng.random(rows) * 50,
+                    "Total": rng.random(rows) * 5000,
+                }
+            ).to_excel(writer, sheet_name=f"Week {n + 1}", index=False)
+    return buf.getvalue()
+
+
+def pandas_full(content: bytes) -> int:
+    frames = pd.read_excel(io.BytesIO(content), sheet_name=None)
+    return sum(len(df) for df in frames.values())
+
+
+def chunked(engine: str):
+    def run(content: bytes) -> int:
+        return sum(len(chunk) for _, chunk in iter_sheet_chunks(content, engine=engine))
+
+    return run
+
+
+def measure(fn, content: bytes):
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = fn(content)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sheets", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=50_000, help="rows per sheet")
+    args = parser.parse_args()
+
+    content = build_workbook(args.sheets, args.rows)
+    print(f"workbook: {args.sheets} sheets x {args.rows} rows, {len(content) / 1e6:.1f} MB")
+
+    runs = [("pandas read_excel (all sheets)", pandas_full), ("chunked openpyxl read_only", chunked("openpyxl"))]
+    if excel_processor.CalamineWorkbook is not None:
+        runs.append(("chunked calamine", chunked("calamine")))
+    else:
+        print("python-calamine not installed; skipping that engine")
+
+    for label, fn in runs:
+        rows, elapsed, peak = measure(fn, content)
+        print(f"{label:32s} rows={rows:>8d}  {elapsed:6.2f}s  peak={peak / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
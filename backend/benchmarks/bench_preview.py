@@ -0,0 +1,68 @@
+"""Preview latency: legacy full-sheet parse vs row-bounded read vs warm cache.
+
+Run from backend/:  python -m benchmarks.bench_preview --rows 200000
+"""
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017/hugamara_logs")
+
+from services.gridfs_storage import _preview_cache, read_preview  # noqa: E402
+
+
+def legacy_preview(content: bytes, rows: int):
+    df = pd.read_excel(io.BytesIO(content), sheet_name=0)
+    preview_df = df.head(rows)
+    return {
+        "columns": [str(c) for c in preview_df.columns.tolist()],
+        "rows": preview_df.fillna("").astype(str).values.tolist(),
+    }
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--preview-rows", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Item Name": [f"item-{i}" for i in range(args.rows)],
+        "Quantity": rng.integers(1, 500, args.rows),
+        "Unit Cost": rng.random(args.rows) * 100,
+        "Supplier": rng.choice(["Atlantic Seafood", "MeatCo", "DairyKing"], args.rows),
+    })
+    buf = io.BytesIO()
+    df.to_excel(buf, index=False)
+    content = buf.getvalue()
+    print(f"workbook: {args.rows:,} rows, {len(content) / 1e6:.1f} MB")
+
+    n = args.preview_rows
+    assert legacy_preview(content, n)["rows"] == read_preview(io.BytesIO(content), n)["rows"]
+
+    legacy_ms = timed(lambda: legacy_preview(content, n), repeat=1)
+    cold_ms = timed(lambda: read_preview(io.BytesIO(content), n))
+    _preview_cache.set(("bench", n), read_preview(io.BytesIO(content), n))
+    warm_ms = timed(lambda: _preview_cache.get(("bench", n)), repeat=1000)
+
+    print(f"legacy full parse : {legacy_ms:10.1f} ms")
+    print(f"row-bounded (cold): {cold_ms:10.1f} ms")
+    print(f"cache hit (warm)  : {warm_ms:10.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""core.response_cache on a stand-in endpoint: uncached vs cache hit vs 304 revalidation.
+
+Run from backend/ (uses REDIS_URL when reachable, the in-process fallback otherwise):
+    python -m benchmarks.bench_response_cache --requests 500 --build-ms 20 --rows 200
+``--build-ms`` stands in for the MySQL/Mongo reads behind get_audit and list_uploads.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from core import response_cache
+
+
+def make_app(build_ms: float, rows: int) -> tuple[FastAPI, dict]:
+    app = FastAPI()
+    builds = {"n": 0}
+    payload = [{"id": i, "filename": f"upload_{i}.xlsx", "status": "completed", "score": 92.5} for i in range(rows)]
+
+    async def build():
+        builds["n"] += 1
+        await asyncio.sleep(build_ms / 1000)
+        return payload
+
+    @app.get("/plain")
+    async def plain():
+        return await build()
+
+    @app.get("/cached")
+    async def cached(request: Request):
+        return await response_cache.cached_json(request, "bench", ["bench"], build)
+
+    return app, builds
+
+
+def timed(client: TestClient, n: int, path: str, headers: dict | None = None) -> tuple[float, int]:
+    started = time.perf_counter()
+    status = 0
+    for _ in range(n):
+        status = client.get(path, headers=headers or {}).status_code
+    return (time.perf_counter() - started) / n * 1000, status
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--build-ms", type=float, default=20.0)
+    parser.add_argument("--rows", type=int, default=200)
+    args = parser.parse_args()
+
+    app, builds = make_app(args.build_ms, args.rows)
+    with TestClient(app) as client:
+        asyncio.run(response_cache.ainvalidate("bench"))
+        plain_ms, _ = timed(client, args.requests, "/plain")
+        first = client.get("/cached")
+        etag = first.headers["etag"]
+        hit_ms, _ = timed(client, args.requests, "/cached")
+        not_modified_ms, status = timed(client, args.requests, "/cached", {"If-None-Match": etag})
+        builds_before = builds["n"]
+        asyncio.run(response_cache.ainvalidate("bench"))
+        after = client.get("/cached", headers={"If-None-Match": etag})
+
+    m = response_cache.metrics()
+    backend = "redis" if not m.get("redis_errors") else "in-process fallback"
+    print(f"backend: {backend}, body {len(first.content) / 1024:.1f} KiB")
+    print(f"uncached       {plain_ms:8.2f} ms/request")
+    print(f"cache hit      {hit_ms:8.2f} ms/request")
+    print(f"304 revalidate {not_modified_ms:8.2f} ms/request  (status {status})")
+    print(
+        f"after invalidate: {after.status_code} {after.headers['x-cache']}, "
+        f"rebuilt {builds['n'] - builds_before}x; hit ratio {m['hit_ratio']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Seed excel_uploads with synthetic history and report EXPLAIN plans and query timings.
+
+Run from backend/ against a scratch MySQL database that is migrated to head:
+    alembic upgrade head && python -m benchmarks.bench_upload_indexes --rows 1000000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from database.mysql import engine
+from database.upload_repository import UPLOAD_COLUMNS
+
+BRANCHES = ["patiobella", "eateroo"]
+FILE_TYPES = ["procurement", "inventory", "sales", "finance", "petty_cash"]
+STATUSES = ["completed", "review_needed", "failed", "pending"]
+BATCH = 10_000
+
+QUERIES = {
+    "list (no filter)": (f"SELECT {UPLOAD_COLUMNS} FROM excel_uploads ORDER BY upload_date DESC LIMIT 50", {}),
+    "list branch": (
+        f"SELECT {UPLOAD_COLUMNS} FROM excel_uploads WHERE branch = :branch ORDER BY upload_date DESC LIMIT 50",
+        {"branch": "eateroo"},
+    ),
+    "list branch+type": (
+        f"SELECT {UPLOAD_COLUMNS} FROM excel_uploads WHERE branch = :branch AND file_type = :file_type "
+        "ORDER BY upload_date DESC LIMIT 50",
+        {"branch": "eateroo", "file_type": "inventory"},
+    ),
+    "by id": (f"SELECT {UPLOAD_COLUMNS} FROM excel_uploads WHERE id = :id", {"id": 4242}),
+    "by file_hash": ("SELECT id FROM excel_uploads WHERE file_hash = :file_hash", {"file_hash": "missing"}),
+    "audit by upload": (
+        "SELECT id FROM extraction_audit_log WHERE excel_upload_id = :id",
+        {"id": 4242},
+    ),
+}
+
+
+def seed(rows: int) -> None:
+    start = datetime(2022, 1, 1)
+    insert = text(
+        "INSERT INTO excel_uploads (original_filename, branch, file_type, upload_date, mongo_gridfs_id, "
+        "file_hash, file_size, processing_status) VALUES (:original_filename, :branch, :file_type, "
+        ":upload_date, :mongo_gridfs_id, :file_hash, :file_size, :processing_status)"
+    )
+    with engine.begin() as conn:
+        for offset in range(0, rows, BATCH):
+            conn.execute(
+                insert,
+                [
+                    {
+                        "original_filename": f"sheet-{offset + i}.xlsx",
+                        "branch": random.choice(BRANCHES),
+                        "file_type": random.choice(FILE_TYPES),
+                        "upload_date": start + timedelta(minutes=offset + i),
+                        "mongo_gridfs_id": uuid.uuid4().hex[:24],
+                        "file_hash": uuid.uuid4().hex + uuid.uuid4().hex,
+                        "file_size": random.randint(10_000, 5_000_000),
+                        "processing_status": random.choice(STATUSES),
+                    }
+                    for i in range(min(BATCH, rows - offset))
+                ],
+            )
+            print(f"seeded {offset + BATCH:,}/{rows:,}", end="\r")
+    print()
+
+
+def report(repeat: int) -> None:
+    with engine.connect() as conn:
+        for label, (sql, params) in QUERIES.items():
+            plan = conn.execute(text("EXPLAIN " + sql), params).mappings().all()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(text(sql), params).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            print(f"\n== {label}: median {timings[len(timings) // 2]:.2f}ms, max {timings[-1]:.2f}ms")
+            for row in plan:
+                print(f"   type={row['type']} key={row['key']} rows={row['rows']} extra={row['Extra']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+    if not args.skip_seed:
+        seed(args.rows)
+    report(args.repeat)
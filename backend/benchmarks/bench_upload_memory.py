@@ -0,0 +1,96 @@
+"""Peak Python heap per upload: buffered (legacy) vs streaming GridFS ingestion.
+
+Run from backend/:  python -m benchmarks.bench_upload_memory
+GridFS is replaced by a sink bucket so only the API-side buffering is measured.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import tracemalloc
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017/hugamara_logs")
+
+from services import gridfs_storage as storage_module  # noqa: E402
+from services.gridfs_storage import GridFSStorage, iter_upload_chunks  # noqa: E402
+
+SIZES_MB = [5, 20, 50]
+
+
+class DiskUpload:
+    """Mimics a spooled UploadFile backed by a file on disk."""
+
+    def __init__(self, path: str):
+        self._fh = open(path, "rb")
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._fh.read(size)
+
+    def close(self):
+        self._fh.close()
+
+
+class SinkGridIn:
+    _id = "sink"
+
+    async def write(self, chunk: bytes):
+        pass
+
+    async def set(self, name, value):
+        pass
+
+    async def close(self):
+        pass
+
+    async def abort(self):
+        pass
+
+
+class SinkBucket:
+    def open_upload_stream(self, filename, metadata=None, content_type=None):
+        return SinkGridIn()
+
+    async def upload_from_stream(self, filename, source, metadata=None, content_type=None):
+        while source.read(255 * 1024):
+            pass
+        return "sink"
+
+
+async def legacy(upload: DiskUpload, storage: GridFSStorage):
+    content = await upload.read()
+    hashlib.sha256(content).hexdigest()
+    await storage.save_file(content, "bench.xlsx", "application/octet-stream", {})
+
+
+async def streaming(upload: DiskUpload, storage: GridFSStorage):
+    await storage.save_stream(iter_upload_chunks(upload), "bench.xlsx", "application/octet-stream", {})
+
+
+def measure(fn, path: str) -> float:
+    storage = GridFSStorage()
+    upload = DiskUpload(path)
+    tracemalloc.start()
+    asyncio.run(fn(upload, storage))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    upload.close()
+    return peak / (1024 * 1024)
+
+
+def main():
+    storage_module.get_gridfs_bucket = lambda *a, **k: SinkBucket()
+    print(f"{'size':>8} {'legacy peak':>14} {'stream peak':>14}")
+    for mb in SIZES_MB:
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            for _ in range(mb):
+                tmp.write(os.urandom(1024 * 1024))
+            path = tmp.name
+        try:
+            print(f"{mb:>6}MB {measure(legacy, path):>12.1f}MB {measure(streaming, path):>12.1f}MB")
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Per-task Mongo overhead in the Celery worker: asyncio.run + Motor vs a pooled PyMongo client.
+
+Needs a reachable MongoDB.  Run from backend/:
+    MONGODB_URL=mongodb://localhost:27017/hugamara_bench python -m benchmarks.bench_worker_mongo --tasks 500
+Each simulated task downloads one GridFS file and inserts one extraction document.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+
+from database.mongodb import MONGODB_URL, _default_db, get_sync_gridfs_bucket
+from tasks.excel_tasks import _download_gridfs_bytes, _insert_extraction_doc
+
+
+def legacy_task(file_id: ObjectId) -> None:
+    # What process_excel used to do: a fresh event loop (and so a fresh Motor client) per call.
+    async def download():
+        client = AsyncIOMotorClient(MONGODB_URL)
+        try:
+            stream = await AsyncIOMotorGridFSBucket(_default_db(client), bucket_name="excel_files").open_download_stream(file_id)
+            return await stream.read()
+        finally:
+            client.close()
+
+    async def insert():
+        client = AsyncIOMotorClient(MONGODB_URL)
+        try:
+            await _default_db(client)["bench_extractions"].insert_one({"bench": True})
+        finally:
+            client.close()
+
+    asyncio.run(download())
+    asyncio.run(insert())
+
+
+def pooled_task(file_id: ObjectId) -> None:
+    _download_gridfs_bytes(str(file_id))
+    _insert_extraction_doc({"bench": True})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=500)
+    args = parser.parse_args()
+
+    file_id = get_sync_gridfs_bucket().upload_from_stream("bench.xlsx", os.urandom(64 * 1024))
+    try:
+        for label, fn in (("asyncio.run + Motor", legacy_task), ("pooled PyMongo", pooled_task)):
+            started = time.perf_counter()
+            for _ in range(args.tasks):
+                fn(file_id)
+            elapsed = time.perf_counter() - started
+            print(f"{label:>20}: {args.tasks / elapsed:8.1f} tasks/s ({elapsed / args.tasks * 1000:.2f} ms/task)")
+    finally:
+        get_sync_gridfs_bucket().delete(file_id)
+
+
+if __name__ == "__main__":
+    main()
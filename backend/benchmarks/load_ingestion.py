@@ -0,0 +1,85 @@
+"""Concurrent list/upload load test against a running API; reports latency percentiles.
+
+Run from backend/:  python -m benchmarks.load_ingestion --base-url http://localhost:8000 --concurrency 50
+Each upload uses unique bytes so deduplication does not short-circuit it.
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import time
+
+import httpx
+import pandas as pd
+
+
+def _workbook(rows: int) -> bytes:
+    df = pd.DataFrame({
+        "date": pd.date_range("2026-01-01", periods=rows, freq="h").astype(str),
+        "revenue": range(rows),
+        "covers": range(rows),
+    })
+    buf = io.BytesIO()
+    df.to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _list(client: httpx.AsyncClient) -> None:
+    resp = await client.get("/api/ingestion/uploads", params={"limit": 50, "branch": "patiobella"})
+    resp.raise_for_status()
+
+
+async def _upload(client: httpx.AsyncClient, template: bytes) -> None:
+    # Trailing bytes after the zip end record keep the workbook readable but change the hash.
+    content = template + os.urandom(16)
+    files = {"file": ("load.xlsx", content, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    resp = await client.post("/api/ingestion/upload", files=files, data={"branch": "patiobella", "file_type": "sales"})
+    resp.raise_for_status()
+
+
+async def run(base_url: str, concurrency: int, requests: int, upload_ratio: float, rows: int) -> None:
+    template = _workbook(rows)
+    timings: dict[str, list[float]] = {"list": [], "upload": []}
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        async def one(i: int) -> None:
+            kind = "upload" if (i % 100) < upload_ratio * 100 else "list"
+            async with sem:
+                started = time.perf_counter()
+                if kind == "upload":
+                    await _upload(client, template)
+                else:
+                    await _list(client)
+                timings[kind].append((time.perf_counter() - started) * 1000)
+
+        wall = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - wall
+
+    print(f"{requests} requests, concurrency {concurrency}, {requests / wall:.1f} req/s")
+    for kind, samples in timings.items():
+        if not samples:
+            continue
+        print(
+            f"{kind:>7}: n={len(samples)} p50={statistics.median(samples):.1f}ms "
+            f"p95={_percentile(samples, 0.95):.1f}ms p99={_percentile(samples, 0.99):.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--upload-ratio", type=float, default=0.1)
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.requests, args.upload_ratio, args.rows))
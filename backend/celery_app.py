@@ -1,13 +1,51 @@
 import os
 
 from celery import Celery
+from kombu import Queue
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
+
+# Queues: heavy workbooks go to their own workers so they never sit in front of small ones.
+#   celery -A celery_app worker -Q ingestion.heavy --concurrency 2
+#   celery -A celery_app worker -Q ingestion.light,celery
+DEFAULT_QUEUE = "celery"
+LIGHT_QUEUE = os.getenv("CELERY_LIGHT_QUEUE", "ingestion.light")
+HEAVY_QUEUE = os.getenv("CELERY_HEAVY_QUEUE", "ingestion.heavy")
+HEAVY_FILE_TYPES = {t.strip() for t in os.getenv("CELERY_HEAVY_FILE_TYPES", "sales,inventory").split(",") if t.strip()}
+HEAVY_MIN_BYTES = int(os.getenv("CELERY_HEAVY_MIN_BYTES", str(5 * 1024 * 1024)))
+
+PREFETCH_MULTIPLIER = int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "1"))
+ACKS_LATE = os.getenv("CELERY_ACKS_LATE", "true").lower() == "true"
+RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", str(24 * 3600)))
+SOFT_TIME_LIMIT = int(os.getenv("CELERY_SOFT_TIME_LIMIT", "600"))
+HARD_TIME_LIMIT = int(os.getenv("CELERY_HARD_TIME_LIMIT", "900"))
+
+INGESTION_TASKS = {"tasks.excel_tasks.process_excel", "tasks.excel_tasks.parse_excel_batch_item"}
+
+
+def ingestion_queue_for(file_type: str | None, file_size: int | None) -> str:
+    if (file_size or 0) >= HEAVY_MIN_BYTES or file_type in HEAVY_FILE_TYPES:
+        return HEAVY_QUEUE
+    return LIGHT_QUEUE
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    if name not in INGESTION_TASKS:
+        return None
+    # process_excel(excel_upload_id, gridfs_id, branch, file_type, file_size=None);
+    # batch items are always sent with keyword arguments (args may then be None).
+    args, kwargs = args or (), kwargs or {}
+    file_type = kwargs.get("file_type") or (args[3] if len(args) > 3 else None)
+    file_size = kwargs.get("file_size") or (args[4] if len(args) > 4 else None)
+    return {"queue": ingestion_queue_for(file_type, file_size)}
+
 
 celery_app = Celery(
     "hugamara",
-    broker=REDIS_URL,
-    backend=REDIS_URL,
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND,
 )
 
 celery_app.conf.update(
@@ -16,4 +54,15 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    task_default_queue=DEFAULT_QUEUE,
+    task_queues=(Queue(DEFAULT_QUEUE), Queue(LIGHT_QUEUE), Queue(HEAVY_QUEUE)),
+    task_routes=(route_task,),
+    worker_prefetch_multiplier=PREFETCH_MULTIPLIER,
+    task_acks_late=ACKS_LATE,
+    task_reject_on_worker_lost=ACKS_LATE,
+    result_expires=RESULT_EXPIRES,
+    task_soft_time_limit=SOFT_TIME_LIMIT,
+    task_time_limit=HARD_TIME_LIMIT,
+    # With late acks an unacked task is redelivered after this long; keep it past the hard limit.
+    broker_transport_options={"visibility_timeout": max(3600, HARD_TIME_LIMIT * 2)},
 )
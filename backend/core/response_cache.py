@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from core.cache import TTLCache
+
+# Shared cache for read-mostly JSON endpoints, with weak ETags and tag invalidation.
+#
+# Entries live in Redis so every API process shares them. Each entry is stored with the
+# versions of the tags it depends on (upload:42, uploads, alerts, branch:patiobella);
+# invalidating a tag is one INCR, after which every entry stored under the old version
+# is a miss. The Celery pipeline fires those invalidations whenever an upload changes
+# state, so TTLs only bound staleness for writes that bypass it.
+#
+# When Redis is unreachable the same logic runs against a small in-process cache with a
+# short TTL, since invalidations from the worker cannot reach it. After a Redis error,
+# reads skip Redis for REDIS_RETRY_SECONDS, so an outage costs one timeout per window
+# rather than one per request. Invalidations always try Redis.
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+# Completed audits never change unless the upload is re-processed, which bumps its tag.
+IMMUTABLE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_IMMUTABLE_TTL_SECONDS", "86400"))
+FALLBACK_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_FALLBACK_TTL_SECONDS", "10"))
+REDIS_TIMEOUT_SECONDS = float(os.getenv("RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS", "0.5"))
+REDIS_RETRY_SECONDS = float(os.getenv("RESPONSE_CACHE_REDIS_RETRY_SECONDS", "15"))
+KEY_PREFIX = "respcache:"
+TAG_PREFIX = "respcache:tag:"
+
+_sync_client: redis.Redis | None = None
+_sync_client_pid: int | None = None
+_async_client: aioredis.Redis | None = None
+_local = TTLCache(maxsize=1024, ttl=FALLBACK_TTL_SECONDS)
+_local_tags: dict[str, int] = defaultdict(int)
+_counters: dict[str, Counter] = defaultdict(Counter)
+_redis_down_until = 0.0
+
+
+def get_sync_redis() -> redis.Redis:
+    global _sync_client, _sync_client_pid
+    if _sync_client is None or _sync_client_pid != os.getpid():
+        _sync_client = redis.Redis.from_url(RESPONSE_CACHE_REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+        _sync_client_pid = os.getpid()
+    return _sync_client
+
+
+def get_async_redis() -> aioredis.Redis:
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.from_url(
+            RESPONSE_CACHE_REDIS_URL, socket_timeout=REDIS_TIMEOUT_SECONDS, socket_connect_timeout=REDIS_TIMEOUT_SECONDS
+        )
+    return _async_client
+
+
+def _redis_usable() -> bool:
+    if time.monotonic() < _redis_down_until:
+        _counters["_all"]["redis_skipped"] += 1
+        return False
+    return True
+
+
+def _redis_failed() -> None:
+    global _redis_down_until
+    _counters["_all"]["redis_errors"] += 1
+    _redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+
+def _redis_recovered() -> None:
+    global _redis_down_until
+    _redis_down_until = 0.0
+
+
+def upload_tag(excel_upload_id: int) -> str:
+    return f"upload:{excel_upload_id}"
+
+
+def branch_tag(branch: str) -> str:
+    return f"branch:{branch}"
+
+
+def _tag_keys(tags: Iterable[str]) -> list[str]:
+    return [f"{TAG_PREFIX}{t}" for t in tags]
+
+
+def invalidate(*tags: str) -> None:
+    """Blocking invalidation for the worker; best effort, like status push."""
+    tags = tuple(dict.fromkeys(tags))
+    if not tags:
+        return
+    for t in tags:
+        _local_tags[t] += 1
+    _counters["_all"]["invalidations"] += len(tags)
+    try:
+        pipe = get_sync_redis().pipeline(transaction=False)
+        for key in _tag_keys(tags):
+            pipe.incr(key)
+        pipe.execute()
+    except redis.RedisError:
+        _redis_failed()
+
+
+async def ainvalidate(*tags: str) -> None:
+    tags = tuple(dict.fromkeys(tags))
+    if not tags:
+        return
+    for t in tags:
+        _local_tags[t] += 1
+    _counters["_all"]["invalidations"] += len(tags)
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        for key in _tag_keys(tags):
+            pipe.incr(key)
+        await pipe.execute()
+    except redis.RedisError:
+        _redis_failed()
+    else:
+        _redis_recovered()
+
+
+async def tag_versions(tags: list[str]) -> list[int]:
+    """Current version of each tag (0 when never invalidated); local versions without Redis."""
+    if not tags:
+        return []
+    if not _redis_usable():
+        return [_local_tags[t] for t in tags]
+    try:
+        values = await get_async_redis().mget(_tag_keys(tags))
+    except redis.RedisError:
+        _redis_failed()
+        return [_local_tags[t] for t in tags]
+    return [int(v or 0) for v in values]
+
+
+@dataclass
+class Fresh:
+    """What a builder returns when the response needs headers or a TTL of its own."""
+
+    payload: Any
+    headers: dict[str, str] = field(default_factory=dict)
+    ttl: Optional[int] = None
+    # False for answers that should not be replayed (e.g. an upstream error message).
+    cacheable: bool = True
+
+
+def weak_etag(body: bytes) -> str:
+    return f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+def _matches(etag: str, if_none_match: str | None) -> bool:
+    # Weak comparison (RFC 9110 8.8.3.2): the W/ prefix is ignored on both sides.
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def _cache_key(namespace: str, request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()
+    return f"{KEY_PREFIX}{namespace}:{digest}"
+
+
+async def _load(key: str, tags: list[str]) -> tuple[Optional[dict[str, Any]], list[int], bool]:
+    """(entry, current tag versions, redis ok) in one round trip."""
+    if not _redis_usable():
+        return _local.get(key), [_local_tags[t] for t in tags], False
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        pipe.get(key)
+        if tags:
+            pipe.mget(_tag_keys(tags))
+        results = await pipe.execute()
+    except redis.RedisError:
+        _redis_failed()
+        return _local.get(key), [_local_tags[t] for t in tags], False
+    versions = [int(v or 0) for v in results[1]] if tags else []
+    return (json.loads(results[0]) if results[0] else None), versions, True
+
+
+async def _store(key: str, entry: dict[str, Any], ttl: int, redis_ok: bool) -> None:
+    if redis_ok:
+        try:
+            await get_async_redis().set(key, json.dumps(entry), ex=ttl)
+            return
+        except redis.RedisError:
+            _redis_failed()
+    _local.set(key, entry)
+
+
+def _respond(entry: dict[str, Any], request: Request, state: str) -> Response:
+    headers = {**entry["headers"], "ETag": entry["etag"], "Cache-Control": "private, no-cache", "X-Cache": state}
+    if _matches(entry["etag"], request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+
+async def cached_json(
+    request: Request,
+    namespace: str,
+    tags: list[str],
+    build: Callable[[], Awaitable[Any]],
+    ttl: int = RESPONSE_CACHE_TTL_SECONDS,
+) -> Response:
+    """Serve ``build()``'s JSON from the cache while ``tags`` are unchanged.
+
+    ``build`` returns the payload, or a ``Fresh`` carrying extra headers and a TTL.
+    Exceptions (404, 409, ...) pass through uncached. Clients revalidate with
+    If-None-Match and get a 304 without the payload being rebuilt.
+    """
+    key = _cache_key(namespace, request)
+    # Versions are read before building: an invalidation that lands while we build
+    # leaves this entry already stale instead of caching pre-invalidation data.
+    entry, versions, redis_ok = await _load(key, tags)
+    if entry is not None and entry["versions"] == versions:
+        _counters[namespace]["hits"] += 1
+        response = _respond(entry, request, "HIT")
+        if response.status_code == 304:
+            _counters[namespace]["not_modified"] += 1
+        return response
+
+    _counters[namespace]["misses"] += 1
+    result = await build()
+    fresh = result if isinstance(result, Fresh) else Fresh(result)
+    body = json.dumps(jsonable_encoder(fresh.payload), separators=(",", ":"), default=str)
+    entry = {"etag": weak_etag(body.encode()), "body": body, "headers": fresh.headers, "versions": versions}
+    if fresh.cacheable:
+        await _store(key, entry, fresh.ttl or ttl, redis_ok)
+    response = _respond(entry, request, "MISS")
+    if response.status_code == 304:
+        _counters[namespace]["not_modified"] += 1
+    return response
+
+
+def metrics() -> dict[str, Any]:
+    """Per-process counters by namespace, plus the hit ratio over all namespaces."""
+    totals = Counter()
+    for name, c in _counters.items():
+        if name != "_all":
+            totals.update(c)
+    lookups = totals["hits"] + totals["misses"]
+    return {
+        "namespaces": {name: dict(c) for name, c in _counters.items() if name != "_all"},
+        **dict(totals),
+        **dict(_counters["_all"]),
+        "hit_ratio": round(totals["hits"] / lookups, 3) if lookups else None,
+        "local_entries": len(_local),
+        "redis_backoff": time.monotonic() < _redis_down_until,
+    }
@@ -1,11 +1,19 @@
 import os
+from gridfs import GridFSBucket
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo import MongoClient
+from pymongo.database import Database
 
 MONGODB_URL = os.getenv("MONGODB_URL")
 if not MONGODB_URL:
     raise RuntimeError("MONGODB_URL is not set")
 
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "20"))
+
 _client: AsyncIOMotorClient | None = None
+# Celery workers use a blocking PyMongo client, one per forked process.
+_sync_client: MongoClient | None = None
+_sync_client_pid: int | None = None
 
 
 def get_mongo_client() -> AsyncIOMotorClient:
@@ -21,14 +29,34 @@ def get_mongo_db_name() -> str:
     return os.getenv("MONGODB_DB", "hugamara_logs")
 
 
-def get_mongo_db():
-    client = get_mongo_client()
+def _default_db(client):
     try:
         return client.get_default_database()
     except Exception:
         return client[get_mongo_db_name()]
 
 
+def get_mongo_db():
+    return _default_db(get_mongo_client())
+
+
 def get_gridfs_bucket(bucket_name: str = "excel_files") -> AsyncIOMotorGridFSBucket:
     db = get_mongo_db()
     return AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+
+
+def get_sync_mongo_client() -> MongoClient:
+    """Process-local PyMongo client; PyMongo clients must not be shared across fork()."""
+    global _sync_client, _sync_client_pid
+    if _sync_client is None or _sync_client_pid != os.getpid():
+        _sync_client = MongoClient(MONGODB_URL, maxPoolSize=MONGODB_MAX_POOL_SIZE)
+        _sync_client_pid = os.getpid()
+    return _sync_client
+
+
+def get_sync_mongo_db() -> Database:
+    return _default_db(get_sync_mongo_client())
+
+
+def get_sync_gridfs_bucket(bucket_name: str = "excel_files") -> GridFSBucket:
+    return GridFSBucket(get_sync_mongo_db(), bucket_name=bucket_name)
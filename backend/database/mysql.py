@@ -1,14 +1,60 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Pool tuning, shared by the sync (Celery) and async (API) engines.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+_SYNC_DRIVERS = {"mysql": "mysql+pymysql", "sqlite": "sqlite"}
+_ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def _with_driver(url: str, drivers: dict[str, str]) -> str:
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect not in drivers:
+        return url
+    return f"{drivers[dialect]}{sep}{rest}"
+
+
+def _pool_options(url: str) -> dict:
+    # SQLite (local stand-in for tests) uses a single-file pool without these knobs.
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
+SYNC_DATABASE_URL = _with_driver(DATABASE_URL, _SYNC_DRIVERS)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _with_driver(DATABASE_URL, _ASYNC_DRIVERS)
+
+engine = create_engine(SYNC_DATABASE_URL, pool_pre_ping=True, **_pool_options(SYNC_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Worker-side status transitions are single statements; running them on autocommit
+# connections avoids a separate COMMIT round-trip for each one.
+autocommit_engine = create_engine(
+    SYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    isolation_level="AUTOCOMMIT",
+    **_pool_options(SYNC_DATABASE_URL),
+)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True, **_pool_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -16,3 +62,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,5 +1,7 @@
 -- Hugamara CEO Portal v5.0.0 Database Schema
 -- MySQL Schema for Core Ledger & Audit
+-- excel_uploads / extraction_audit_log are versioned by Alembic (backend/migrations);
+-- keep the definitions below in step with the latest revision.
 
 CREATE DATABASE IF NOT EXISTS hugamara;
 USE hugamara;
@@ -22,7 +24,10 @@ CREATE TABLE IF NOT EXISTS excel_uploads (
     reviewed_by INT,
     reviewed_at TIMESTAMP NULL,
     notes TEXT,
-    INDEX idx_branch_date (branch, upload_date),
+    INDEX idx_uploads_branch_type_date (branch, file_type, upload_date, id),
+    INDEX idx_uploads_branch_date (branch, upload_date, id),
+    INDEX idx_uploads_type_date (file_type, upload_date, id),
+    INDEX idx_uploads_date (upload_date, id),
     INDEX idx_status (processing_status)
 );
 
@@ -35,6 +40,7 @@ CREATE TABLE IF NOT EXISTS extraction_audit_log (
     anomalies_detected JSON,
     warnings JSON,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_audit_upload (excel_upload_id),
     FOREIGN KEY (excel_upload_id) REFERENCES excel_uploads(id)
 );
 
@@ -0,0 +1,186 @@
+"""SQL for excel_uploads and extraction_audit_log, shared by the API and the Celery worker.
+
+API helpers take an AsyncSession; worker helpers take a sync Connection from
+``autocommit_engine`` so every status transition is a single round-trip.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+UPLOAD_COLUMNS = (
+    "id, original_filename, branch, file_type, upload_date, file_size, ai_audit_score, "
+    "processing_status, mongo_gridfs_id, ai_audit_id"
+)
+
+_INSERT_UPLOAD = text(
+    """
+    INSERT INTO excel_uploads (
+        original_filename, branch, file_type, mongo_gridfs_id, file_hash, file_size,
+        processing_status
+    ) VALUES (
+        :original_filename, :branch, :file_type, :mongo_gridfs_id, :file_hash, :file_size,
+        :processing_status
+    )
+    """
+)
+
+_MARK_STATUS = text(
+    "UPDATE excel_uploads SET processing_status=:status WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+_MARK_STATUS_FROM = text(
+    "UPDATE excel_uploads SET processing_status=:status WHERE id IN :ids AND processing_status=:from_status"
+).bindparams(bindparam("ids", expanding=True))
+
+_GET_STATUSES = text(
+    "SELECT id, processing_status, ai_audit_id, ai_audit_score FROM excel_uploads WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+# One audit row per upload (uq_audit_upload); a retried task overwrites its own row.
+# MySQL and the SQLite stand-in (database.mysql) spell the upsert differently.
+_UPSERT_AUDIT_LOG = {
+    "mysql": text(
+        """
+        INSERT INTO extraction_audit_log (excel_upload_id, audit_score, column_mappings, anomalies_detected, warnings)
+        VALUES (:excel_upload_id, :audit_score, :column_mappings, :anomalies_detected, :warnings)
+        ON DUPLICATE KEY UPDATE
+            audit_score=VALUES(audit_score),
+            column_mappings=VALUES(column_mappings),
+            anomalies_detected=VALUES(anomalies_detected),
+            warnings=VALUES(warnings),
+            created_at=CURRENT_TIMESTAMP
+        """
+    ),
+    "sqlite": text(
+        """
+        INSERT INTO extraction_audit_log (excel_upload_id, audit_score, column_mappings, anomalies_detected, warnings)
+        VALUES (:excel_upload_id, :audit_score, :column_mappings, :anomalies_detected, :warnings)
+        ON CONFLICT (excel_upload_id) DO UPDATE SET
+            audit_score=excluded.audit_score,
+            column_mappings=excluded.column_mappings,
+            anomalies_detected=excluded.anomalies_detected,
+            warnings=excluded.warnings,
+            created_at=CURRENT_TIMESTAMP
+        """
+    ),
+}
+
+_FINALIZE_UPLOAD = text(
+    """
+    UPDATE excel_uploads
+    SET ai_audit_score=:score, ai_audit_id=:audit_id, processing_status=:status, processing_time=:processing_time
+    WHERE id=:id
+    """
+)
+
+
+async def insert_upload(
+    db: AsyncSession,
+    *,
+    original_filename: str,
+    branch: str,
+    file_type: str,
+    mongo_gridfs_id: str,
+    file_hash: str,
+    file_size: int,
+    processing_status: str = "pending",
+) -> int:
+    result = await db.execute(
+        _INSERT_UPLOAD,
+        {
+            "original_filename": original_filename,
+            "branch": branch,
+            "file_type": file_type,
+            "mongo_gridfs_id": str(mongo_gridfs_id),
+            "file_hash": file_hash,
+            "file_size": file_size,
+            "processing_status": processing_status,
+        },
+    )
+    await db.commit()
+    return int(result.lastrowid)
+
+
+async def find_upload_by_hash(db: AsyncSession, file_hash: str):
+    result = await db.execute(
+        text(
+            "SELECT id, branch, file_type, file_size, mongo_gridfs_id, ai_audit_id, ai_audit_score, processing_status "
+            "FROM excel_uploads WHERE file_hash=:file_hash LIMIT 1"
+        ),
+        {"file_hash": file_hash},
+    )
+    return result.mappings().first()
+
+
+async def get_statuses(db: AsyncSession, excel_upload_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+    """Current processing status (plus audit id and score) per upload; unknown ids are absent."""
+    ids = [int(i) for i in excel_upload_ids]
+    if not ids:
+        return {}
+    result = await db.execute(_GET_STATUSES, {"ids": ids})
+    return {
+        int(r["id"]): {
+            "processing_status": r["processing_status"],
+            "audit_id": r["ai_audit_id"],
+            "score": float(r["ai_audit_score"]) if r["ai_audit_score"] is not None else None,
+        }
+        for r in result.mappings()
+    }
+
+
+def mark_status(
+    conn: Connection, excel_upload_ids: Iterable[int], status: str, from_status: str | None = None
+) -> int:
+    """Move any number of uploads to ``status`` in one statement.
+
+    With ``from_status``, only the uploads still in that status are moved.
+    """
+    ids = [int(i) for i in excel_upload_ids]
+    if not ids:
+        return 0
+    if from_status is not None:
+        return conn.execute(_MARK_STATUS_FROM, {"status": status, "ids": ids, "from_status": from_status}).rowcount
+    return conn.execute(_MARK_STATUS, {"status": status, "ids": ids}).rowcount
+
+
+def finalize_uploads(conn: Connection, outcomes: list[dict[str, Any]]) -> None:
+    """Write the audit-log rows and final upload state for one or many processed files.
+
+    Each outcome carries ``excel_upload_id``, ``audit_id``, ``score``, ``status``,
+    ``processing_time`` and the audit's ``column_mappings``/``anomalies``/``warnings``.
+    The audit rows go out as a single multi-row upsert; the upload row is written
+    last, so a crash in between leaves the upload retryable rather than half-done.
+    """
+    if not outcomes:
+        return
+    conn.execute(
+        _UPSERT_AUDIT_LOG[conn.dialect.name],
+        [
+            {
+                "excel_upload_id": o["excel_upload_id"],
+                "audit_score": float(o["score"] or 0),
+                "column_mappings": json.dumps(o.get("column_mappings") or []),
+                "anomalies_detected": json.dumps(o.get("anomalies") or []),
+                "warnings": json.dumps(o.get("warnings") or []),
+            }
+            for o in outcomes
+        ],
+    )
+    conn.execute(
+        _FINALIZE_UPLOAD,
+        [
+            {
+                "id": o["excel_upload_id"],
+                "score": float(o["score"] or 0),
+                "audit_id": o["audit_id"],
+                "status": o["status"],
+                "processing_time": o["processing_time"],
+            }
+            for o in outcomes
+        ],
+    )
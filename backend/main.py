@@ -1,6 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from core import response_cache
 from api import auth, excel, analytics, ingestion
+from database.mysql import async_engine
+from database.mongodb import get_mongo_db
+from services import ai_context, alerts_store, item_aggregates, kpi_rollups
+from services.ai_service import ai_service
+from services.excel_jobs import excel_parse_jobs
+from services.gridfs_storage import gridfs_storage
 
 # Register Celery tasks
 import tasks.excel_tasks  # noqa: F401
@@ -13,6 +20,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated", "ETag", "X-Cache"],
 )
 
 app.include_router(auth.router, prefix="/api")
@@ -20,10 +28,31 @@ app.include_router(excel.router, prefix="/api")
 app.include_router(analytics.router, prefix="/api")
 app.include_router(ingestion.router, prefix="/api")
 
+@app.on_event("startup")
+async def ensure_indexes():
+    try:
+        await gridfs_storage.ensure_indexes()
+        await item_aggregates.ensure_indexes(get_mongo_db())
+        await alerts_store.ensure_indexes(get_mongo_db())
+        await ai_context.ensure_indexes(get_mongo_db())
+        await kpi_rollups.ensure_indexes(get_mongo_db())
+    except Exception as e:
+        print(f"WARNING: could not ensure MongoDB indexes: {e}")
+
+@app.on_event("shutdown")
+async def release_resources():
+    await async_engine.dispose()
+    excel_parse_jobs.shutdown()
+    await ai_service.close()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Hugamara CEO Portal API"}
 
+@app.get("/api/cache/metrics")
+async def cache_metrics():
+    return response_cache.metrics()
+
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy"}
@@ -0,0 +1,64 @@
+"""excel_uploads and extraction_audit_log
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases already built from database/schema.sql keep their tables; only
+missing ones are created.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BRANCHES = ("patiobella", "eateroo")
+FILE_TYPES = ("procurement", "inventory", "sales", "finance", "petty_cash")
+STATUSES = ("pending", "processing", "completed", "failed", "review_needed")
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "excel_uploads" not in existing:
+        op.create_table(
+            "excel_uploads",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("original_filename", sa.String(255), nullable=False),
+            sa.Column("branch", sa.Enum(*BRANCHES, name="branch"), nullable=False),
+            sa.Column("file_type", sa.Enum(*FILE_TYPES, name="file_type"), nullable=False),
+            sa.Column("upload_date", sa.TIMESTAMP, server_default=sa.func.current_timestamp()),
+            sa.Column("uploaded_by", sa.Integer),
+            sa.Column("mongo_gridfs_id", sa.String(100), nullable=False),
+            sa.Column("file_hash", sa.String(64)),
+            sa.Column("file_size", sa.Integer),
+            sa.Column("ai_audit_score", sa.Numeric(3, 1)),
+            sa.Column("ai_audit_id", sa.String(100)),
+            sa.Column("processing_status", sa.Enum(*STATUSES, name="processing_status")),
+            sa.Column("processing_time", sa.Integer),
+            sa.Column("reviewed_by", sa.Integer),
+            sa.Column("reviewed_at", sa.TIMESTAMP, nullable=True),
+            sa.Column("notes", sa.Text),
+            sa.UniqueConstraint("file_hash", name="file_hash"),
+        )
+        op.create_index("idx_status", "excel_uploads", ["processing_status"])
+
+    if "extraction_audit_log" not in existing:
+        op.create_table(
+            "extraction_audit_log",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("excel_upload_id", sa.Integer, sa.ForeignKey("excel_uploads.id")),
+            sa.Column("audit_score", sa.Numeric(3, 1)),
+            sa.Column("column_mappings", sa.JSON),
+            sa.Column("anomalies_detected", sa.JSON),
+            sa.Column("warnings", sa.JSON),
+            sa.Column("created_at", sa.TIMESTAMP, server_default=sa.func.current_timestamp()),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("extraction_audit_log")
+    op.drop_table("excel_uploads")
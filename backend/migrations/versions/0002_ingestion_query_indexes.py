@@ -0,0 +1,70 @@
+"""Indexes matching the ingestion queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+list_uploads filters on branch and/or file_type and orders by
+(upload_date, id); each filter combination gets a composite index that
+ends in the sort key, so MySQL reads the newest rows in index order
+instead of filesorting. idx_branch_date from schema.sql is a prefix of
+idx_uploads_branch_date and is dropped.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+UPLOAD_INDEXES = {
+    "idx_uploads_branch_type_date": ["branch", "file_type", "upload_date", "id"],
+    "idx_uploads_branch_date": ["branch", "upload_date", "id"],
+    "idx_uploads_type_date": ["file_type", "upload_date", "id"],
+    "idx_uploads_date": ["upload_date", "id"],
+}
+
+# The derived table lets MySQL delete from the table the subquery reads.
+DEDUPE_AUDIT_LOG = """
+    DELETE FROM extraction_audit_log
+    WHERE excel_upload_id IS NOT NULL
+      AND id NOT IN (
+          SELECT id FROM (
+              SELECT MAX(id) AS id FROM extraction_audit_log GROUP BY excel_upload_id
+          ) AS newest
+      )
+"""
+
+
+def _index_names(table: str) -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    names = {ix["name"] for ix in inspector.get_indexes(table)}
+    names |= {uc["name"] for uc in inspector.get_unique_constraints(table)}
+    return names
+
+
+def upgrade() -> None:
+    upload_indexes = _index_names("excel_uploads")
+    for name, columns in UPLOAD_INDEXES.items():
+        if name not in upload_indexes:
+            op.create_index(name, "excel_uploads", columns)
+    if "idx_branch_date" in upload_indexes:
+        op.drop_index("idx_branch_date", table_name="excel_uploads")
+    if "file_hash" not in upload_indexes:
+        op.create_index("file_hash", "excel_uploads", ["file_hash"], unique=True)
+
+    # One audit row per upload; also serves the foreign key lookup. Re-processed uploads
+    # used to get a new row each time, so keep only the newest before adding it.
+    if "uq_audit_upload" not in _index_names("extraction_audit_log"):
+        op.execute(DEDUPE_AUDIT_LOG)
+        op.create_index("uq_audit_upload", "extraction_audit_log", ["excel_upload_id"], unique=True)
+
+
+def downgrade() -> None:
+    # MySQL needs some index on the foreign key column before the unique one can go.
+    op.create_index("idx_audit_upload", "extraction_audit_log", ["excel_upload_id"])
+    op.drop_index("uq_audit_upload", table_name="extraction_audit_log")
+    op.create_index("idx_branch_date", "excel_uploads", ["branch", "upload_date"])
+    for name in UPLOAD_INDEXES:
+        op.drop_index(name, table_name="excel_uploads")
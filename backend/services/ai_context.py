@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterable, get_args
+
+from core import response_cache
+from core.cache import TTLCache
+from services import alerts_store, item_aggregates
+from services.excel_processor import Branch
+
+# Business context for AI prompts: a few precomputed KPIs per branch rendered as compact
+# text under a token budget, instead of pasting whatever dicts the caller holds.
+#
+# KPIs are cached per (branch, window, generation), the generation being the version of
+# the branch's response-cache tag. The worker bumps it when an upload for the branch
+# completes, so every API process drops its stale entry on the next read; the TTL only
+# bounds staleness when Redis is unreachable.
+EXTRACTIONS_COLLECTION = "excel_extractions"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "800"))
+CONTEXT_WINDOW_DAYS = int(os.getenv("AI_CONTEXT_WINDOW_DAYS", "30"))
+KPI_CACHE_TTL_SECONDS = float(os.getenv("AI_KPI_CACHE_TTL_SECONDS", "300"))
+TOP_ALERTS = 5
+TOP_PRICE_DELTAS = 5
+MAX_LINE_CHARS = 160
+BRANCHES: tuple[str, ...] = get_args(Branch)
+
+# Sums taken from the per-sheet column stats stored with each extraction.
+_STAT_FIELDS = ("revenue", "food_cost", "labor_cost", "covers")
+_kpi_cache = TTLCache(maxsize=64, ttl=KPI_CACHE_TTL_SECONDS)
+
+
+@dataclass
+class BranchKPIs:
+    branch: str
+    days: int
+    uploads: int = 0
+    revenue: float = 0.0
+    food_cost: float = 0.0
+    labor_cost: float = 0.0
+    covers: float = 0.0
+    procurement_spend: float = 0.0
+    alert_counts: dict[str, int] = field(default_factory=dict)
+    top_alerts: list[dict[str, Any]] = field(default_factory=list)
+    price_deltas: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def food_cost_pct(self) -> float | None:
+        return self.food_cost / self.revenue * 100 if self.revenue else None
+
+    @property
+    def labor_cost_pct(self) -> float | None:
+        return self.labor_cost / self.revenue * 100 if self.revenue else None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough count (about four characters per token for English and numbers)."""
+    return (len(text) + 3) // 4
+
+
+async def _generations(branches: list[str]) -> list[int]:
+    return await response_cache.tag_versions([response_cache.branch_tag(b) for b in branches])
+
+
+async def _extraction_totals(db, branch: str, since: float) -> dict[str, Any]:
+    # Per-sheet stats are written next to the Parquet pointer, on extracted_data.sheets
+    # (the top-level "sheets" is the audit breakdown and has none).
+    sums = {f: {"$sum": f"$extracted_data.sheets.stats.columns.{f}.sum"} for f in _STAT_FIELDS}
+    pipeline = [
+        {"$match": {"branch": branch, "created_at": {"$gte": since}}},
+        {"$unwind": "$extracted_data.sheets"},
+        {
+            "$group": {
+                "_id": None,
+                "uploads": {"$addToSet": "$excel_upload_id"},
+                "procurement_spend": {
+                    "$sum": {
+                        "$cond": [
+                            {"$eq": ["$file_type", "procurement"]},
+                            "$extracted_data.sheets.stats.columns.total.sum",
+                            0,
+                        ]
+                    }
+                },
+                **sums,
+            }
+        },
+    ]
+    rows = await db[EXTRACTIONS_COLLECTION].aggregate(pipeline).to_list(length=1)
+    return rows[0] if rows else {}
+
+
+async def _alert_summary(db, branch: str, since: float) -> tuple[dict[str, int], list[dict[str, Any]]]:
+    since_dt = datetime.fromtimestamp(since, timezone.utc)
+    match = {"branch": branch, "timestamp": {"$gte": since_dt}}
+    counts = {
+        row["_id"]: row["n"]
+        async for row in db[alerts_store.ALERTS_COLLECTION].aggregate(
+            [{"$match": match}, {"$group": {"_id": "$severity", "n": {"$sum": 1}}}]
+        )
+    }
+    top: list[dict[str, Any]] = []
+    for severity in ("critical", "warning"):
+        if len(top) >= TOP_ALERTS:
+            break
+        top += (
+            await db[alerts_store.ALERTS_COLLECTION]
+            .find({**match, "severity": severity}, {"severity": 1, "message": 1})
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(TOP_ALERTS - len(top))
+            .to_list(length=TOP_ALERTS)
+        )
+    return counts, top
+
+
+async def _price_deltas(db, branch: str) -> list[dict[str, Any]]:
+    """Items with the widest spread between their cheapest and dearest vendor."""
+    pipeline = [
+        {"$match": {"branch": branch, "mean_price": {"$gt": 0}}},
+        {"$sort": {"mean_price": 1}},
+        {
+            "$group": {
+                "_id": "$item",
+                "low": {"$first": "$mean_price"},
+                "low_vendor": {"$first": "$vendor"},
+                "high": {"$last": "$mean_price"},
+                "high_vendor": {"$last": "$vendor"},
+                "vendors": {"$sum": 1},
+            }
+        },
+        {"$match": {"vendors": {"$gt": 1}}},
+        {"$addFields": {"spread": {"$divide": [{"$subtract": ["$high", "$low"]}, "$low"]}}},
+        {"$sort": {"spread": -1}},
+        {"$limit": TOP_PRICE_DELTAS},
+    ]
+    return await db[item_aggregates.AGGREGATE_COLLECTION].aggregate(pipeline).to_list(length=TOP_PRICE_DELTAS)
+
+
+async def compute_branch_kpis(db, branch: str, days: int = CONTEXT_WINDOW_DAYS) -> BranchKPIs:
+    since = time.time() - days * 86400
+    totals = await _extraction_totals(db, branch, since)
+    counts, top = await _alert_summary(db, branch, since)
+    return BranchKPIs(
+        branch=branch,
+        days=days,
+        uploads=len(totals.get("uploads") or []),
+        procurement_spend=totals.get("procurement_spend") or 0.0,
+        **{f: totals.get(f) or 0.0 for f in _STAT_FIELDS},
+        alert_counts=counts,
+        top_alerts=top,
+        price_deltas=await _price_deltas(db, branch),
+    )
+
+
+async def get_branch_kpis(db, branches: Iterable[str] | None = None, days: int = CONTEXT_WINDOW_DAYS) -> list[BranchKPIs]:
+    branches = list(branches or BRANCHES)
+    out = []
+    for branch, generation in zip(branches, await _generations(branches)):
+        key = (branch, days, generation)
+        kpis = _kpi_cache.get(key)
+        if kpis is None:
+            kpis = await compute_branch_kpis(db, branch, days)
+            _kpi_cache.set(key, kpis)
+        out.append(kpis)
+    return out
+
+
+def _clip(text: str, limit: int = MAX_LINE_CHARS) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _num(value: float) -> str:
+    return f"{value:,.0f}" if abs(value) >= 100 else f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def render_branch(k: BranchKPIs) -> tuple[list[str], list[str]]:
+    """Headline lines (always kept) and detail lines (in priority order, dropped from the end)."""
+    figures = [f"uploads {k.uploads}", f"revenue {_num(k.revenue)}"]
+    if k.food_cost_pct is not None:
+        figures.append(f"food cost {k.food_cost_pct:.1f}%")
+    if k.labor_cost_pct is not None:
+        figures.append(f"labor cost {k.labor_cost_pct:.1f}%")
+    if k.covers:
+        figures.append(f"covers {_num(k.covers)}")
+    if k.procurement_spend:
+        figures.append(f"procurement {_num(k.procurement_spend)}")
+    counts = ", ".join(f"{s} {k.alert_counts[s]}" for s in ("critical", "warning", "info") if k.alert_counts.get(s))
+    head = [f"[{k.branch}, last {k.days}d] " + "; ".join(figures), f"alerts: {counts or 'none'}"]
+
+    detail = [f"- {a['severity']}: {_clip(a['message'])}" for a in k.top_alerts]
+    detail += [
+        _clip(
+            f"- price gap {d['_id']}: {d['low_vendor'] or '?'} {_num(d['low'])} vs "
+            f"{d['high_vendor'] or '?'} {_num(d['high'])} (+{d['spread'] * 100:.0f}%)"
+        )
+        for d in k.price_deltas
+    ]
+    return head, detail
+
+
+def render_context(kpis: list[BranchKPIs], extra: dict[str, Any] | None = None, budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Compact text of the KPIs within ``budget`` tokens.
+
+    Headlines for every branch are always kept; detail lines are added round-robin
+    across branches in priority order while they fit, and caller-supplied ``extra``
+    takes what is left.
+    """
+    heads, details = zip(*(render_branch(k) for k in kpis)) if kpis else ((), ())
+    lines = [line for head in heads for line in head]
+    used = estimate_tokens("\n".join(lines))
+    per_branch = [list(d) for d in details]
+    chosen: list[list[str]] = [[] for _ in per_branch]
+    full: set[int] = set()
+    for depth in range(max((len(d) for d in per_branch), default=0)):
+        for i, d in enumerate(per_branch):
+            if i in full or depth >= len(d):
+                continue
+            cost = estimate_tokens(d[depth]) + 1
+            if used + cost > budget:
+                full.add(i)  # keep priority order: nothing after a line that did not fit
+                continue
+            chosen[i].append(d[depth])
+            used += cost
+
+    out = []
+    for head, picked in zip(heads, chosen):
+        out += [head[0], head[1], *picked]
+    if extra:
+        remaining = (budget - used) * 4 - len("extra: ")
+        if remaining >= 32:
+            out.append("extra: " + _clip(json.dumps(extra, sort_keys=True, separators=(",", ":"), default=str), remaining))
+    return "\n".join(out)
+
+
+async def build_context(
+    db,
+    branch: str | None = None,
+    days: int = CONTEXT_WINDOW_DAYS,
+    extra: dict[str, Any] | None = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+) -> str:
+    kpis = await get_branch_kpis(db, [branch] if branch else None, days)
+    return render_context(kpis, extra, budget)
+
+
+async def ensure_indexes(db) -> None:
+    await db[EXTRACTIONS_COLLECTION].create_index([("branch", 1), ("created_at", -1)])
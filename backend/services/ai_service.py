@@ -1,47 +1,209 @@
+import asyncio
+import hashlib
+import json
 import os
-from openai import OpenAI
-from typing import List, Dict
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from core.cache import TTLCache
+
+AI_MODEL = os.getenv("AI_MODEL", "gpt-4")
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "30"))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+AI_RETRY_BASE_SECONDS = float(os.getenv("AI_RETRY_BASE_SECONDS", "0.5"))
+AI_CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", "600"))
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "512"))
+
+INSIGHT_SYSTEM_PROMPT = "You are the AI assistant for Hugamara Hospitality Group CEO. Analyze the provided data and provide a concise, professional executive insight."
+QUERY_SYSTEM_PROMPT = "You are Hugamara AI. Answer the CEO's query based on the current business context. Be precise and professional."
+MOCK_INSIGHT = "Executive AI Forecast: Sales are trending upward by 12%. Recommend optimizing seafood stock in Patiobella."
+MOCK_QUERY_RESPONSE = "As Hugamara AI, I've analyzed your request. Currently, Patiobella shows a 15% margin lead over Eateroo. I recommend investigating Vendor A's recent price spike."
+
+# Transient failures worth another attempt; anything else (auth, bad request) is final.
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
 
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     print("WARNING: OPENAI_API_KEY not found. AI features will operate in mock mode.")
     client = None
 else:
-    client = OpenAI(api_key=api_key)
+    # One pooled HTTP client for the process. Retries are done in AIService._create rather
+    # than in the SDK so a request waiting out its backoff does not hold a concurrency slot.
+    client = AsyncOpenAI(
+        api_key=api_key,
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+        timeout=httpx.Timeout(AI_TIMEOUT_SECONDS, connect=5.0),
+        max_retries=0,
+        http_client=openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=AI_MAX_CONCURRENCY * 2, max_keepalive_connections=AI_MAX_CONCURRENCY),
+        ),
+    )
+
+
+def normalize_payload(data: Any) -> str:
+    """Key-order independent serialization, so equal data always hashes the same."""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def cache_key(model: str, system_prompt: str, content: str) -> str:
+    return hashlib.sha256(f"{model}\x00{system_prompt}\x00{content}".encode()).hexdigest()
+
 
 class AIService:
+    def __init__(self, model: str = AI_MODEL):
+        self.model = model
+        self.cache = TTLCache(maxsize=AI_CACHE_SIZE, ttl=AI_CACHE_TTL_SECONDS)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._counters = {"completions": 0, "streams": 0, "cache_hits": 0, "errors": 0}
+        self._ttft_ms: deque = deque(maxlen=200)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the running loop, not the importing one.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+        return self._semaphore
+
+    async def _create(self, messages: list, stream: bool = False):
+        """One chat completion call under the semaphore, with exponential backoff on transient errors.
+
+        The slot is released between attempts so waiting out a backoff does not hold it.
+        With ``stream=True`` the slot stays held and the caller releases it once the stream
+        is drained; only opening the stream is retried, a failure after tokens went out is final.
+        """
+        for attempt in range(AI_MAX_RETRIES + 1):
+            await self.semaphore.acquire()
+            try:
+                response = await client.chat.completions.create(model=self.model, messages=messages, stream=stream)
+            except RETRYABLE_ERRORS:
+                self.semaphore.release()
+                if attempt == AI_MAX_RETRIES:
+                    raise
+            except BaseException:
+                self.semaphore.release()
+                raise
+            else:
+                if not stream:
+                    self.semaphore.release()
+                return response
+            await asyncio.sleep(AI_RETRY_BASE_SECONDS * 2**attempt * (1 + random.random()))
+
+    async def _complete(self, system_prompt: str, content: str) -> str:
+        """Cached chat completion."""
+        key = cache_key(self.model, system_prompt, content)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._counters["cache_hits"] += 1
+            return cached
+
+        self._counters["completions"] += 1
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": content}]
+        response = await self._create(messages)
+        text = response.choices[0].message.content
+        self.cache.set(key, text)
+        return text
+
+    async def _stream(self, system_prompt: str, content: str) -> AsyncIterator[str]:
+        """Yield completion text as it is generated; the full answer lands in the same cache."""
+        key = cache_key(self.model, system_prompt, content)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._counters["cache_hits"] += 1
+            yield cached
+            return
+
+        self._counters["streams"] += 1
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": content}]
+        parts = []
+        started = time.perf_counter()
+        stream = await self._create(messages, stream=True)
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        self._ttft_ms.append((time.perf_counter() - started) * 1000)
+                    parts.append(delta)
+                    yield delta
+        finally:
+            self.semaphore.release()
+            await stream.close()
+        # Only a stream that ran to completion is cached.
+        self.cache.set(key, "".join(parts))
+
     @staticmethod
-    async def generate_insight(data: Dict) -> str:
+    def _as_text(context: Union[str, Dict]) -> str:
+        # Prompts normally get the compact text from services.ai_context; dicts are still accepted.
+        return context if isinstance(context, str) else normalize_payload(context)
+
+    def _insight_content(self, data: Union[str, Dict]) -> str:
+        return f"Analyze this data:\n{self._as_text(data)}"
+
+    def _query_content(self, query: str, context: Union[str, Dict]) -> str:
+        return f"Context:\n{self._as_text(context)}\nQuery: {' '.join(query.split())}"
+
+    async def generate_insight(self, data: Union[str, Dict]) -> str:
         """Generates an executive summary based on raw data."""
         if not client:
-            return "Executive AI Forecast: Sales are trending upward by 12%. Recommend optimizing seafood stock in Patiobella."
+            return MOCK_INSIGHT
         try:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are the AI assistant for Hugamara Hospitality Group CEO. Analyze the provided data and provide a concise, professional executive insight."},
-                    {"role": "user", "content": f"Analyze this data: {data}"}
-                ]
-            )
-            return response.choices[0].message.content
+            return await self._complete(INSIGHT_SYSTEM_PROMPT, self._insight_content(data))
         except Exception as e:
+            self._counters["errors"] += 1
             return f"Error generating insight: {str(e)}"
 
-    @staticmethod
-    async def process_query(query: str, context: Dict) -> str:
+    async def process_query(self, query: str, context: Union[str, Dict]) -> str:
         """Processes a natural language query from the CEO."""
         if not client:
-            return "As Hugamara AI, I've analyzed your request. Currently, Patiobella shows a 15% margin lead over Eateroo. I recommend investigating Vendor A's recent price spike."
+            return MOCK_QUERY_RESPONSE
         try:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are Hugamara AI. Answer the CEO's query based on the current business context. Be precise and professional."},
-                    {"role": "user", "content": f"Context: {context}\nQuery: {query}"}
-                ]
-            )
-            return response.choices[0].message.content
+            return await self._complete(QUERY_SYSTEM_PROMPT, self._query_content(query, context))
         except Exception as e:
+            self._counters["errors"] += 1
             return f"Error processing query: {str(e)}"
 
+    async def stream_insight(self, data: Union[str, Dict]) -> AsyncIterator[str]:
+        """Token stream of ``generate_insight``; errors propagate to the caller."""
+        if not client:
+            yield MOCK_INSIGHT
+            return
+        async for text in self._stream(INSIGHT_SYSTEM_PROMPT, self._insight_content(data)):
+            yield text
+
+    async def stream_query(self, query: str, context: Union[str, Dict]) -> AsyncIterator[str]:
+        """Token stream of ``process_query``; errors propagate to the caller."""
+        if not client:
+            yield MOCK_QUERY_RESPONSE
+            return
+        async for text in self._stream(QUERY_SYSTEM_PROMPT, self._query_content(query, context)):
+            yield text
+
+    def metrics(self) -> Dict[str, Any]:
+        ttft = sorted(self._ttft_ms)
+        return {
+            **self._counters,
+            "cache_size": len(self.cache),
+            "ttft_ms_p50": round(ttft[len(ttft) // 2], 1) if ttft else None,
+            "ttft_ms_p95": round(ttft[int(len(ttft) * 0.95)], 1) if ttft else None,
+        }
+
+    async def close(self) -> None:
+        if client is not None:
+            await client.close()
+
+
 ai_service = AIService()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any
+
+from pymongo import DESCENDING, UpdateOne
+from pymongo.database import Database
+
+# Alerts are materialized once per processed upload; /api/ai/alerts only reads this
+# collection, so request cost depends on the page size, not on how much data exists.
+ALERTS_COLLECTION = "alerts"
+MAX_ALERT_PAGE_SIZE = 200
+
+
+def alert_id(excel_upload_id: int, rule_alert_id: str) -> str:
+    """Stable id: the same upload re-processed produces the same alert ids."""
+    return hashlib.sha1(f"{excel_upload_id}:{rule_alert_id}".encode()).hexdigest()[:24]
+
+
+def publish_alerts(
+    db: Database, excel_upload_id: int, branch: str, file_type: str, anomalies: list[dict[str, Any]]
+) -> int:
+    """Upsert an upload's alerts and drop the ones a re-run no longer raises.
+
+    ``acknowledged`` is only set on insert, so re-processing keeps acknowledgements.
+    """
+    now = datetime.now(timezone.utc)
+    ops = []
+    ids = []
+    for a in anomalies:
+        _id = alert_id(excel_upload_id, a["id"])
+        ids.append(_id)
+        doc = {k: v for k, v in a.items() if k not in ("id", "acknowledged", "timestamp")}
+        doc.update(
+            {
+                "branch": branch,
+                "file_type": file_type,
+                "excel_upload_id": excel_upload_id,
+                "severity": a.get("type"),
+                "timestamp": now,
+            }
+        )
+        ops.append(UpdateOne({"_id": _id}, {"$set": doc, "$setOnInsert": {"acknowledged": False}}, upsert=True))
+    collection = db[ALERTS_COLLECTION]
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    collection.delete_many({"excel_upload_id": excel_upload_id, "_id": {"$nin": ids}})
+    return len(ops)
+
+
+def encode_cursor(doc: dict[str, Any]) -> str:
+    raw = json.dumps([doc["timestamp"].isoformat(), doc["_id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        timestamp, _id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(timestamp), str(_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def serialize(doc: dict[str, Any]) -> dict[str, Any]:
+    ts = doc["timestamp"]
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return {**{k: v for k, v in doc.items() if k != "_id"}, "id": doc["_id"], "type": doc.get("severity"), "timestamp": ts.isoformat()}
+
+
+async def list_alerts(
+    db,
+    branch: str | None = None,
+    severity: str | None = None,
+    since: datetime | None = None,
+    cursor: str | None = None,
+    acknowledged: bool | None = None,
+    limit: int = 50,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Newest-first page keyed on (timestamp, _id); returns the page and the next cursor."""
+    query: dict[str, Any] = {}
+    if branch:
+        query["branch"] = branch
+    if severity:
+        query["severity"] = severity
+    if acknowledged is not None:
+        query["acknowledged"] = acknowledged
+    if since:
+        query["timestamp"] = {"$gt": since}
+    if cursor:
+        ts, _id = decode_cursor(cursor)
+        query["$or"] = [{"timestamp": {"$lt": ts}}, {"timestamp": ts, "_id": {"$lt": _id}}]
+
+    page_size = max(1, min(int(limit), MAX_ALERT_PAGE_SIZE))
+    docs = (
+        await db[ALERTS_COLLECTION]
+        .find(query)
+        .sort([("timestamp", DESCENDING), ("_id", DESCENDING)])
+        .limit(page_size + 1)
+        .to_list(length=page_size + 1)
+    )
+    next_cursor = None
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        next_cursor = encode_cursor(docs[-1])
+    return [serialize(d) for d in docs], next_cursor
+
+
+async def ensure_indexes(db) -> None:
+    await db[ALERTS_COLLECTION].create_index([("branch", 1), ("severity", 1), ("timestamp", -1), ("_id", -1)])
+    await db[ALERTS_COLLECTION].create_index([("branch", 1), ("timestamp", -1), ("_id", -1)])
+    await db[ALERTS_COLLECTION].create_index([("timestamp", -1), ("_id", -1)])
+    await db[ALERTS_COLLECTION].create_index("excel_upload_id")
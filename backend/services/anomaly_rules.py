@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import string
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from services.item_aggregates import ItemAggregates, normalize_item
+
+# Canonical frame columns the rules are written against. Extraction tables use schema
+# field names; these are mapped onto the canonical ones before evaluation.
+SCHEMA_COLUMNS = {
+    "item": "item_name",
+    "vendor_name": "vendor",
+    "unit_price": "unit_cost",
+    "closing_stock": "stock_on_hand",
+}
+NUMERIC_COLUMNS = ("unit_cost", "quantity", "total", "stock_on_hand", "opening_stock", "received", "issued")
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    severity: str
+    requires: tuple[str, ...]
+    predicate: Callable[[pd.DataFrame], Any]
+    message: str
+
+    def fields(self) -> list[str]:
+        return [f for _, f, _, _ in string.Formatter().parse(self.message) if f]
+
+
+RULES: list[Rule] = []
+
+
+def rule(name: str, severity: str, requires: Iterable[str], message: str):
+    """Register ``predicate(frame) -> bool mask``; ``message`` is formatted with each matching row."""
+
+    def register(predicate: Callable[[pd.DataFrame], Any]):
+        RULES.append(Rule(name, severity, tuple(requires), predicate, message))
+        return predicate
+
+    return register
+
+
+# --- Price variance ----------------------------------------------------------------
+
+@rule("price_spike", "critical", ("unit_cost", "avg_30"), "Price Spike: {item_name} up {pct_vs_avg:.1f}% vs 30d avg")
+def _price_spike(f):
+    return f["unit_cost"] > f["avg_30"] * 1.15
+
+
+@rule("vendor_delta", "warning", ("unit_cost", "min_other"), "Market Delta: {vendor} is 20%+ higher than others for {item_name}")
+def _vendor_delta(f):
+    return f["unit_cost"] > f["min_other"] * 1.20
+
+
+# --- Inventory ---------------------------------------------------------------------
+
+@rule("stockout_risk", "critical", ("stock_on_hand", "burn_rate"), "Stockout Risk: {item_name} will deplete in <48 hours")
+def _stockout_risk(f):
+    return (f["burn_rate"] > 0) & (f["days_cover"] < 2)
+
+
+@rule("excess_stock", "info", ("stock_on_hand", "burn_rate"), "Excess Stock: {item_name} levels exceed 15-day demand")
+def _excess_stock(f):
+    return (f["burn_rate"] > 0) & (f["days_cover"] > 15)
+
+
+@rule(
+    "stock_variance", "warning", ("opening_stock", "received", "issued", "stock_on_hand"),
+    "Stock Variance: {item_name} closing {stock_on_hand:,.0f} vs {expected_stock:,.0f} expected",
+)
+def _stock_variance(f):
+    return (f["stock_on_hand"] - f["expected_stock"]).abs() > np.maximum(1, f["expected_stock"].abs() * 0.02)
+
+
+# --- Procurement -------------------------------------------------------------------
+
+@rule(
+    "line_total_mismatch", "warning", ("quantity", "unit_cost", "total"),
+    "Invoice Mismatch: {item_name} from {vendor} totals {total:,.0f} vs {expected_total:,.0f} expected",
+)
+def _line_total_mismatch(f):
+    return (f["total"] - f["expected_total"]).abs() > np.maximum(1, f["total"].abs() * 0.02)
+
+
+@rule("non_positive_price", "warning", ("unit_cost",), "Zero Price: {item_name} from {vendor} has a non-positive unit cost")
+def _non_positive_price(f):
+    return f["unit_cost"] <= 0
+
+
+@rule(
+    "duplicate_line", "warning", ("item_name", "vendor", "quantity", "unit_cost"),
+    "Duplicate Line: {item_name} from {vendor} appears more than once",
+)
+def _duplicate_line(f):
+    # seen_line: the same line already appeared in an earlier chunk of the sheet.
+    repeated = f.duplicated(["item_code", "vendor_code", "quantity", "unit_cost"], keep="first") | f.get("seen_line", False)
+    return repeated & (f["item_code"] >= 0)
+
+
+def _key_codes(values: pd.Series) -> tuple[np.ndarray, list[str]]:
+    """Integer code of each row's normalized value (-1 when blank) and the list of keys by code.
+
+    Each distinct raw value is normalized once; rows only ever touch integers.
+    """
+    codes, uniques = pd.factorize(values)
+    keys: dict[str, int] = {}
+    mapping = np.full(len(uniques) + 1, -1, dtype=np.int64)  # last slot: factorize's -1 (missing)
+    for i, raw in enumerate(uniques):
+        key = normalize_item(raw)
+        if key:
+            mapping[i] = keys.setdefault(key, len(keys))
+    return mapping[codes], list(keys)
+
+
+def _mark_seen_lines(f: pd.DataFrame, item_keys: list[str], vendor_keys: list[str], seen_lines: set) -> None:
+    """Flag rows whose (item, vendor, quantity, unit_cost) is in ``seen_lines``, then add this frame's lines."""
+    items = np.array([*item_keys, ""], dtype=object)[f["item_code"].to_numpy()]
+    vendors = np.array([*vendor_keys, ""], dtype=object)[f["vendor_code"].to_numpy()]
+    quantity = f["quantity"].astype(object).where(f["quantity"].notna(), None)
+    unit_cost = f["unit_cost"].astype(object).where(f["unit_cost"].notna(), None)
+    lines = list(zip(items, vendors, quantity, unit_cost))
+    f["seen_line"] = np.fromiter((line in seen_lines for line in lines), dtype=bool, count=len(lines))
+    seen_lines.update(line for line, code in zip(lines, f["item_code"]) if code >= 0)
+
+
+def prepare_frame(
+    df: pd.DataFrame, aggregates: ItemAggregates | None = None, branch: str = "", seen_lines: set | None = None
+) -> pd.DataFrame:
+    """Canonical columns plus the reference stats and derived values the rules compare against.
+
+    ``seen_lines`` carries line keys between the chunks of one sheet (see SheetEvaluation).
+    """
+    f = df.rename(columns={k: v for k, v in SCHEMA_COLUMNS.items() if k in df.columns and v not in df.columns})
+    f = f.reset_index(drop=True)
+    for col in NUMERIC_COLUMNS:
+        if col in f.columns:
+            f[col] = pd.to_numeric(f[col], errors="coerce")
+    for col in ("item_name", "vendor"):
+        if col not in f.columns:
+            f[col] = None
+    item_codes, item_keys = _key_codes(f["item_name"])
+    vendor_codes, vendor_keys = _key_codes(f["vendor"])
+    f["item_code"], f["vendor_code"] = item_codes, vendor_codes
+
+    if aggregates is not None and len(aggregates):
+        if "branch" in f.columns:
+            branch_codes, branches = pd.factorize(f["branch"].fillna(branch).astype(str))
+        else:
+            branch_codes, branches = np.zeros(len(f), dtype=np.int64), [branch]
+        # One reference lookup per distinct (branch, item) pair, broadcast back by code.
+        pair_codes, pairs = pd.factorize(branch_codes * (len(item_keys) + 1) + (item_codes + 1))
+        vendor_index = {v: i for i, v in enumerate(vendor_keys)}
+        refs = []
+        for pair in pairs:
+            b, i = divmod(int(pair), len(item_keys) + 1)
+            avg, burn, cheapest, cheapest_vendor, second = (
+                aggregates.reference(branches[b], item_keys[i - 1]) if i else (None, 0.0, None, None, None)
+            )
+            refs.append((avg, burn, cheapest, vendor_index.get(cheapest_vendor, -2), second))
+        ref = np.array(refs, dtype=float)[pair_codes]
+        f["avg_30"], f["burn_rate"] = ref[:, 0], ref[:, 1]
+        f["min_other"] = np.where(ref[:, 3] == vendor_codes, ref[:, 4], ref[:, 2])
+        if "unit_cost" in f.columns:
+            f["pct_vs_avg"] = (f["unit_cost"] / f["avg_30"] - 1) * 100
+        if "stock_on_hand" in f.columns:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                f["days_cover"] = f["stock_on_hand"] / f["burn_rate"]
+
+    if {"quantity", "unit_cost"} <= set(f.columns):
+        f["expected_total"] = f["quantity"] * f["unit_cost"]
+        if seen_lines is not None:
+            _mark_seen_lines(f, item_keys, vendor_keys, seen_lines)
+    if {"opening_stock", "received", "issued"} <= set(f.columns):
+        f["expected_stock"] = f["opening_stock"] + f["received"] - f["issued"]
+    return f
+
+
+def evaluate(
+    df: pd.DataFrame,
+    aggregates: ItemAggregates | None = None,
+    branch: str = "",
+    rules: Iterable[Rule] | None = None,
+    limit_per_rule: int | None = None,
+    extra: dict[str, Any] | None = None,
+    scope: str = "",
+    row_offset: int = 0,
+    seen_lines: set | None = None,
+) -> list[dict[str, Any]]:
+    """Run every applicable rule as one vectorized mask over ``df``; returns alert dicts.
+
+    Alert ids are ``{scope}{rule}-{row}``, rows counted from ``row_offset``: the same
+    input always yields the same ids.
+
+    The masks are vectorized but each alert is still a Python dict, so the cost grows
+    with the number of alerts, not just rows. ``limit_per_rule`` is part of the
+    performance contract: with the worker's cap (ANOMALY_ALERTS_PER_RULE) 500k rows
+    evaluate in well under a second; uncapped, a noisy sheet yielding ~700k alerts takes
+    a few seconds (benchmarks/bench_anomaly_rules.py).
+    """
+    if df.empty:
+        return []
+    f = prepare_frame(df, aggregates, branch, seen_lines)
+    timestamp = datetime.now().isoformat()
+    alerts: list[dict[str, Any]] = []
+    for r in RULES if rules is None else rules:
+        if any(col not in f.columns for col in r.requires):
+            continue
+        mask = r.predicate(f)
+        mask = np.asarray(mask.fillna(False) if isinstance(mask, pd.Series) else mask, dtype=bool)
+        rows = np.flatnonzero(mask)
+        if limit_per_rule is not None:
+            rows = rows[:limit_per_rule]
+        if not len(rows):
+            continue
+        fields = r.fields()
+        matched = f.iloc[rows]
+        columns = [matched[name].tolist() for name in fields]
+        # tolist() hands back plain Python values, which BSON and json can both encode.
+        items, vendors = matched["item_name"].tolist(), matched["vendor"].tolist()
+        for n, row in enumerate(rows):
+            values = {name: col[n] for name, col in zip(fields, columns)}
+            alerts.append(
+                {
+                    "id": f"{scope}{r.name}-{row + row_offset}",
+                    "type": r.severity,
+                    "rule": r.name,
+                    "message": r.message.format_map(values),
+                    "item": items[n],
+                    "vendor": vendors[n],
+                    "row": int(row) + row_offset,
+                    "timestamp": timestamp,
+                    "acknowledged": False,
+                    **(extra or {}),
+                }
+            )
+    return alerts
+
+
+class SheetEvaluation:
+    """``evaluate`` over a sheet that arrives in chunks.
+
+    Row ids continue across chunks, ``limit_per_rule`` holds for the whole sheet and
+    duplicate lines are also matched against earlier chunks. The line keys seen so far
+    are the only state kept between chunks.
+    """
+
+    def __init__(
+        self,
+        aggregates: ItemAggregates | None = None,
+        branch: str = "",
+        limit_per_rule: int | None = None,
+        extra: dict[str, Any] | None = None,
+        scope: str = "",
+    ):
+        self.aggregates = aggregates
+        self.branch = branch
+        self.limit_per_rule = limit_per_rule
+        self.extra = extra
+        self.scope = scope
+        self.rows = 0
+        self._seen_lines: set = set()
+        self._counts: Counter = Counter()
+
+    def add(self, df: pd.DataFrame) -> list[dict[str, Any]]:
+        alerts = evaluate(
+            df,
+            aggregates=self.aggregates,
+            branch=self.branch,
+            limit_per_rule=self.limit_per_rule,
+            extra=self.extra,
+            scope=self.scope,
+            row_offset=self.rows,
+            seen_lines=self._seen_lines,
+        )
+        self.rows += len(df)
+        kept = []
+        for alert in alerts:
+            if self.limit_per_rule is None or self._counts[alert["rule"]] < self.limit_per_rule:
+                self._counts[alert["rule"]] += 1
+                kept.append(alert)
+        return kept
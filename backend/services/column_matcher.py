@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Iterable
+
+from core.cache import TTLCache
+
+# Matches below this similarity are treated as "no mapping".
+MATCH_THRESHOLD = 0.72
+# Confidence reported for an exact alias hit; fuzzy hits are scaled down from it.
+EXACT_CONFIDENCE = 0.95
+MIN_EDIT_LENGTH = 5
+
+_BRACKETS = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_PERCENT_TOKENS = frozenset({"pct", "percent", "percentage"})
+_ABBREVIATIONS = {
+    "qty": "quantity",
+    "qnty": "quantity",
+    "amt": "amount",
+    "desc": "description",
+    "descr": "description",
+    "inv": "invoice",
+    "no": "number",
+    "num": "number",
+    "nbr": "number",
+    "dt": "date",
+    "px": "price",
+    "cat": "category",
+    "dept": "department",
+    "uom": "unit",
+    "supp": "supplier",
+    "bal": "balance",
+    "rev": "revenue",
+}
+
+
+def normalize_header(value) -> str:
+    """Lowercase, drop bracketed units like "(UGX)", split on punctuation and expand abbreviations."""
+    text = _BRACKETS.sub(" ", str(value).lower()).replace("#", " number ")
+    tokens = [_ABBREVIATIONS.get(t, t) for t in _NON_ALNUM.sub(" ", text).split()]
+    return " ".join(tokens)
+
+
+def is_percentage_header(value) -> bool:
+    """True for headers like "Food Cost %" or "Labour Pct"; normalize_header drops the "%"."""
+    return "%" in str(value) or bool(_PERCENT_TOKENS & set(_NON_ALNUM.sub(" ", str(value).lower()).split()))
+
+
+@dataclass(frozen=True)
+class _Alias:
+    text: str
+    tokens: frozenset[str]
+    sorted_text: str
+
+
+def _alias(text: str) -> _Alias:
+    tokens = text.split()
+    return _Alias(text, frozenset(tokens), " ".join(sorted(tokens)))
+
+
+def _similarity(column: _Alias, alias: _Alias) -> float:
+    if column.text == alias.text:
+        return 1.0
+    if not column.tokens or not alias.tokens:
+        return 0.0
+    jaccard = len(column.tokens & alias.tokens) / len(column.tokens | alias.tokens)
+    # "Unit Price UGX Incl" still contains every token of "unit price".
+    contained = 0.85 if alias.tokens <= column.tokens else 0.0
+    # Edit distance is noise on very short headers ("date" vs "rate").
+    best = max(jaccard, contained)
+    if min(len(column.text), len(alias.text)) >= MIN_EDIT_LENGTH:
+        matcher = SequenceMatcher(None, column.sorted_text, alias.sorted_text)
+        # quick_ratio() is an upper bound on ratio(); skip the full diff when it cannot win.
+        if matcher.quick_ratio() > max(best, MATCH_THRESHOLD):
+            best = max(best, matcher.ratio())
+    return best
+
+
+class ColumnMatcher:
+    """Maps spreadsheet headers to schema fields through a normalized alias index.
+
+    The index is built once per instance; resolved mappings are cached by header signature
+    (branch + target fields + column list), so a recurring supplier template costs one lookup.
+    ``currency_fields`` never map to a percentage header: "Food Cost %" is a ratio, and
+    summing it as money would corrupt every KPI built on the field.
+    """
+
+    def __init__(self, aliases: dict[str, Iterable[str]], cache_size: int = 1024, currency_fields: Iterable[str] = ()):
+        self._currency_fields = frozenset(currency_fields)
+        self._index: dict[str, tuple[_Alias, ...]] = {}
+        for field, names in aliases.items():
+            normalized = {normalize_header(field)} | {normalize_header(n) for n in names}
+            self._index[field] = tuple(_alias(n) for n in sorted(normalized) if n)
+        self._cache = TTLCache(maxsize=cache_size, ttl=None)
+
+    @staticmethod
+    def signature(columns: list, fields: Iterable[str], branch: str = "") -> str:
+        raw = "\x1f".join([branch, ",".join(fields), *map(str, columns)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def match(self, columns: list, fields: list[str], branch: str = "") -> list[dict]:
+        """One ``{original, mapped_to, confidence}`` entry per field, in ``fields`` order."""
+        key = self.signature(columns, fields, branch)
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._resolve(columns, fields)
+            self._cache.set(key, cached)
+        return [dict(m) for m in cached]
+
+    def _resolve(self, columns: list, fields: list[str]) -> tuple[dict, ...]:
+        normalized = [_alias(normalize_header(c)) for c in columns]
+        percentages = {idx for idx, c in enumerate(columns) if is_percentage_header(c)}
+        candidates = []
+        for field in fields:
+            aliases = self._index.get(field) or (_alias(normalize_header(field)),)
+            for idx, column in enumerate(normalized):
+                if idx in percentages and field in self._currency_fields:
+                    continue
+                score = max(_similarity(column, a) for a in aliases)
+                if score >= MATCH_THRESHOLD:
+                    candidates.append((score, field, idx))
+
+        # Greedy one-to-one assignment, strongest pairs first.
+        assigned: dict[str, tuple[int, float]] = {}
+        used: set[int] = set()
+        for score, field, idx in sorted(candidates, key=lambda c: (-c[0], fields.index(c[1]), c[2])):
+            if field in assigned or idx in used:
+                continue
+            assigned[field] = (idx, score)
+            used.add(idx)
+
+        mappings = []
+        for field in fields:
+            if field in assigned:
+                idx, score = assigned[field]
+                mappings.append({"original": columns[idx], "mapped_to": field, "confidence": round(EXACT_CONFIDENCE * score, 2)})
+            else:
+                mappings.append({"original": None, "mapped_to": field, "confidence": 0.0})
+        return tuple(mappings)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from core.cache import TTLCache
+
+EXCEL_PARSE_WORKERS = int(os.getenv("EXCEL_PARSE_WORKERS", "2"))
+EXCEL_PARSE_MAX_QUEUE = int(os.getenv("EXCEL_PARSE_MAX_QUEUE", "20"))
+EXCEL_JOB_TTL_SECONDS = int(os.getenv("EXCEL_JOB_TTL_SECONDS", "3600"))
+# Job state is mirrored here so a status poll can land on any uvicorn worker.
+EXCEL_JOBS_REDIS_URL = os.getenv("EXCEL_JOBS_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+JOB_KEY_PREFIX = "excel:job:"
+
+
+class ParseQueueFullError(RuntimeError):
+    pass
+
+
+def _parse_job(path: str, filename: str, branch: str) -> Dict:
+    # Runs in a pool process; imported lazily so the child only loads what it needs.
+    from services.excel_service import excel_service
+
+    result = excel_service.parse_workbook(path, filename, branch)
+    # Empty cells come back as NaN, which is not valid JSON for the job status response.
+    if "data" in result:
+        result["data"] = [
+            {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()}
+            for row in result["data"]
+        ]
+    return result
+
+
+class ExcelParseJobs:
+    """Bounded process pool for the legacy /excel/upload parser.
+
+    At most ``workers`` sheets parse at once; up to ``max_queue`` jobs (running
+    plus waiting) are accepted before new ones are refused; both limits are per API
+    process. Job state is kept in this process and copied to Redis on every change,
+    so ``get`` answers for jobs submitted to another worker; it expires ``ttl``
+    seconds after submission. Without Redis only the submitting worker knows a job.
+    """
+
+    def __init__(self, workers: int, max_queue: int, ttl: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self._jobs = TTLCache(maxsize=4096, ttl=ttl)
+        self._redis: Optional[aioredis.Redis] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._queued = 0
+        self._running = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        # Only the broken pool: a concurrent job may already have started its replacement.
+        if self._executor is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _execute(self, path: str, filename: str, branch: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        try:
+            return await loop.run_in_executor(pool, _parse_job, path, filename, branch)
+        except BrokenProcessPool:
+            # A child crashed or was OOM-killed, which breaks the whole pool; start a new one and retry once.
+            self._discard_pool(pool)
+            return await loop.run_in_executor(self._pool(), _parse_job, path, filename, branch)
+
+    def _get_redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(EXCEL_JOBS_REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._redis
+
+    async def _share(self, job: Dict[str, Any]) -> None:
+        remaining = max(1, int(job["submitted_at"] + self.ttl - time.time()))
+        try:
+            await self._get_redis().set(f"{JOB_KEY_PREFIX}{job['job_id']}", json.dumps(job, default=str), ex=remaining)
+        except redis.RedisError:
+            pass
+
+    def submit(self, path: str, filename: str, branch: str) -> Dict[str, Any]:
+        if self._queued + self._running >= self.max_queue:
+            raise ParseQueueFullError("Excel parser queue is full")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "filename": filename,
+            "branch": branch,
+            "submitted_at": time.time(),
+        }
+        self._jobs.set(job["job_id"], job)
+        self._queued += 1
+        task = asyncio.get_running_loop().create_task(self._run(job, path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Dict[str, Any], path: str) -> None:
+        try:
+            await self._share(job)
+            async with self._slots:
+                self._queued -= 1
+                self._running += 1
+                job["status"] = "running"
+                try:
+                    await self._share(job)
+                    result = await self._execute(path, job["filename"], job["branch"])
+                finally:
+                    self._running -= 1
+            job.update(status="completed", result=result)
+        except Exception as e:
+            job.update(status="failed", error=str(e) or type(e).__name__)
+        finally:
+            job["finished_at"] = time.time()
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        await self._share(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        try:
+            stored = await self._get_redis().get(f"{JOB_KEY_PREFIX}{job_id}")
+        except redis.RedisError:
+            return None
+        return json.loads(stored) if stored else None
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "queue_depth": self._queued,
+            "running": self._running,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+excel_parse_jobs = ExcelParseJobs(EXCEL_PARSE_WORKERS, EXCEL_PARSE_MAX_QUEUE, EXCEL_JOB_TTL_SECONDS)
@@ -1,16 +1,141 @@
 from __future__ import annotations
 
 import io
-import json
+import os
 from dataclasses import dataclass
-from typing import Any, Literal
+from typing import Any, Callable, Iterator, Literal
 
+import openpyxl
 import pandas as pd
+import pyarrow as pa
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # optional, faster engine
+    CalamineWorkbook = None
+
+from services import anomaly_rules
+from services.column_matcher import ColumnMatcher
+from services.extraction_store import frame_to_table
+from services.item_aggregates import ItemAggregates
 
 Branch = Literal["patiobella", "eateroo"]
 FileType = Literal["procurement", "inventory", "sales", "finance", "petty_cash"]
 
 
+EXCEL_PARSE_ENGINE = os.getenv("EXCEL_PARSE_ENGINE", "openpyxl")
+EXCEL_CHUNK_ROWS = int(os.getenv("EXCEL_CHUNK_ROWS", "5000"))
+# Alerts kept per rule and sheet, so one bad column cannot flood the audit.
+ANOMALY_ALERTS_PER_RULE = int(os.getenv("ANOMALY_ALERTS_PER_RULE", "200"))
+
+# Header variants seen on supplier and POS exports, per schema field (field names match themselves).
+FIELD_ALIASES: dict[str, list[str]] = {
+    "vendor_name": ["vendor", "supplier", "supplier name", "payee", "creditor"],
+    "item": ["item name", "product", "sku", "description", "item description", "product name"],
+    "quantity": ["qty", "units", "quantity ordered", "pcs", "count"],
+    "unit_price": ["price", "unit cost", "rate", "cost per unit", "price per unit", "cost/unit"],
+    "total": ["total cost", "line total", "amount", "total amount", "value", "extended price"],
+    "opening_stock": ["opening", "opening balance", "open stock", "start stock", "opening qty"],
+    "received": ["receipts", "stock in", "purchases", "qty received", "deliveries"],
+    "issued": ["issues", "stock out", "used", "consumed", "qty issued", "usage"],
+    "closing_stock": ["closing", "closing balance", "end stock", "closing qty", "stock on hand"],
+    "unit": ["uom", "unit of measure", "measure", "units of measure"],
+    "date": ["day", "business date", "trading date", "txn date", "transaction date"],
+    "revenue": ["sales", "net sales", "gross sales", "turnover", "takings"],
+    "covers": ["guests", "pax", "guest count", "no of covers"],
+    "avg_check": ["average check", "avg spend", "average spend", "spend per head", "check average"],
+    "food_cost": ["cost of food", "food costs", "cogs food", "f&b cost"],
+    "labor_cost": ["labour cost", "labor", "labour", "staff cost", "wages", "payroll"],
+    "invoice_number": ["invoice no", "invoice #", "inv no", "bill number", "invoice ref", "reference"],
+    "invoice_date": ["inv date", "bill date", "date of invoice"],
+    "due_date": ["payment due", "due", "due on", "date due"],
+    "total_amount": ["invoice total", "amount", "total", "gross amount", "invoice amount"],
+    "paid_amount": ["paid", "amount paid", "payments", "settled"],
+    "description": ["details", "narration", "particulars", "memo", "purpose"],
+    "amount": ["value", "sum", "total"],
+    "direction": ["type", "in/out", "dr/cr", "debit/credit", "flow"],
+}
+# Money fields; these are summed into KPIs, so a percentage column must never land in one.
+CURRENCY_FIELDS = (
+    "unit_price", "total", "revenue", "avg_check", "food_cost", "labor_cost", "total_amount", "paid_amount", "amount",
+)
+
+
+def _iter_openpyxl_sheets(content: bytes) -> Iterator[tuple[str, Iterator[tuple]]]:
+    # read_only streams rows out of the sheet XML instead of building the whole workbook.
+    wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield ws.title, ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _iter_calamine_sheets(content: bytes) -> Iterator[tuple[str, Iterator[tuple]]]:
+    wb = CalamineWorkbook.from_filelike(io.BytesIO(content))
+    for name in wb.sheet_names:
+        rows = wb.get_sheet_by_name(name).iter_rows()
+        yield name, (tuple(None if v == "" else v for v in row) for row in rows)
+
+
+def _iter_pandas_sheets(content: bytes) -> Iterator[tuple[str, Iterator[tuple]]]:
+    # Legacy .xls without calamine: xlrd has no streaming mode, load one sheet at a time.
+    with pd.ExcelFile(io.BytesIO(content)) as xls:
+        for name in xls.sheet_names:
+            df = xls.parse(name, header=None)
+            yield str(name), (tuple(None if pd.isna(v) else v for v in row) for row in df.itertuples(index=False))
+
+
+def _dedupe_headers(columns: list[str]) -> list[str]:
+    # Same scheme as pandas.read_excel: the second "Total" becomes "Total.1".
+    seen: dict[str, int] = {}
+    out = []
+    for col in columns:
+        name = col
+        while name in seen:
+            seen[col] += 1
+            name = f"{col}.{seen[col]}"
+        seen.setdefault(name, 0)
+        out.append(name)
+    return out
+
+
+def iter_sheet_chunks(
+    content: bytes, chunk_rows: int = EXCEL_CHUNK_ROWS, engine: str | None = None
+) -> Iterator[tuple[str, pd.DataFrame]]:
+    """Yield ``(sheet_name, DataFrame)`` chunks of at most ``chunk_rows`` rows for every sheet.
+
+    The first non-empty row of a sheet is its header; fully empty rows are skipped.
+    Only one chunk per sheet is materialised at a time.
+    """
+    engine = engine or EXCEL_PARSE_ENGINE
+    is_xlsx = content[:2] == b"PK"
+    if CalamineWorkbook is not None and (engine == "calamine" or not is_xlsx):
+        sheets = _iter_calamine_sheets(content)
+    elif is_xlsx:
+        sheets = _iter_openpyxl_sheets(content)
+    else:
+        sheets = _iter_pandas_sheets(content)
+
+    for sheet_name, rows in sheets:
+        columns: list[str] | None = None
+        buffer: list[tuple] = []
+        yielded = False
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            if columns is None:
+                columns = _dedupe_headers([str(v) if v is not None else f"Unnamed: {i}" for i, v in enumerate(row)])
+                continue
+            buffer.append(tuple(row[: len(columns)]) + (None,) * (len(columns) - len(row)))
+            if len(buffer) >= chunk_rows:
+                yield sheet_name, pd.DataFrame(buffer, columns=columns)
+                buffer, yielded = [], True
+        # A header-only sheet still yields one empty frame so it shows up in the audit.
+        if columns is not None and (buffer or not yielded):
+            yield sheet_name, pd.DataFrame(buffer, columns=columns)
+
+
 @dataclass
 class ExtractionResult:
     extracted_data: dict[str, Any]
@@ -18,18 +143,11 @@ class ExtractionResult:
 
 
 class ExcelProcessorService:
-    def fuzzy_match_columns(self, columns: list[str], schema: list[str]) -> list[dict[str, Any]]:
-        mappings: list[dict[str, Any]] = []
-        lower_cols = [c.lower().strip() for c in columns]
-        for s in schema:
-            s_norm = s.lower().strip()
-            if s_norm in lower_cols:
-                idx = lower_cols.index(s_norm)
-                mappings.append({"original": columns[idx], "mapped_to": s, "confidence": 0.95})
-            else:
-                # naive fallback
-                mappings.append({"original": None, "mapped_to": s, "confidence": 0.0})
-        return mappings
+    def __init__(self) -> None:
+        self.column_matcher = ColumnMatcher(FIELD_ALIASES, currency_fields=CURRENCY_FIELDS)
+
+    def fuzzy_match_columns(self, columns: list[str], schema: list[str], branch: str = "") -> list[dict[str, Any]]:
+        return self.column_matcher.match(columns, schema, branch)
 
     def get_schema_for_type(self, branch: Branch, file_type: FileType) -> list[str]:
         if file_type == "procurement":
@@ -42,10 +160,12 @@ class ExcelProcessorService:
             return ["invoice_number", "vendor_name", "invoice_date", "due_date", "total_amount", "paid_amount"]
         return ["date", "description", "amount", "direction"]
 
-    def extract_structured(self, df: pd.DataFrame, file_type: FileType) -> dict[str, Any]:
-        # minimal extraction: return first 50 rows as records
-        records = df.fillna("").head(50).to_dict(orient="records")
-        return {"records": records, "file_type": file_type}
+    def extract_structured(self, df: pd.DataFrame, mappings: list[dict[str, Any]]) -> pa.Table:
+        """Arrow table of the chunk with mapped columns renamed to their schema field."""
+        renames = {m["original"]: m["mapped_to"] for m in mappings if m.get("original")}
+        taken = set(df.columns) - set(renames)
+        renames = {k: v for k, v in renames.items() if v not in taken}
+        return frame_to_table(df.rename(columns=renames))
 
     def calculate_confidence(self, mappings: list[dict[str, Any]], extracted: dict[str, Any]) -> float:
         confs = [m.get("confidence", 0.0) for m in mappings]
@@ -53,29 +173,103 @@ class ExcelProcessorService:
         # scale to 1-10
         return round(max(1.0, min(10.0, base * 10)), 1)
 
-    def detect_anomalies(self, extracted: dict[str, Any], branch: Branch) -> list[dict[str, Any]]:
-        return []
-
     def generate_warnings(self, mappings: list[dict[str, Any]]) -> list[str]:
         missing = [m["mapped_to"] for m in mappings if not m.get("original")]
         if not missing:
             return []
         return [f"Missing column mapping for: {', '.join(missing)}"]
 
-    def process_bytes(self, content: bytes, branch: Branch, file_type: FileType) -> ExtractionResult:
-        df = pd.read_excel(io.BytesIO(content), sheet_name=0)
+    def process_bytes(
+        self,
+        content: bytes,
+        branch: Branch,
+        file_type: FileType,
+        aggregates: ItemAggregates | None = None,
+        on_chunk: Callable[[str, pa.Table], None] | None = None,
+    ) -> ExtractionResult:
+        """Parse every sheet in row chunks and fold the per-sheet audits into one result.
+
+        Each normalized chunk is run through the anomaly rules (services.anomaly_rules)
+        and handed to ``on_chunk(sheet_name, table)``, then dropped, so no sheet is ever
+        held whole. ``aggregates`` supplies the historical reference stats for the rules.
+        """
         schema = self.get_schema_for_type(branch, file_type)
-        mappings = self.fuzzy_match_columns([str(c) for c in df.columns.tolist()], schema)
-        extracted = self.extract_structured(df, file_type)
-        overall = self.calculate_confidence(mappings, extracted)
-        audit = {
-            "overall_score": overall,
-            "field_confidence": {},
-            "column_mappings": mappings,
-            "anomalies": self.detect_anomalies(extracted, branch),
-            "warnings": self.generate_warnings(mappings),
+        sheets: dict[str, dict[str, Any]] = {}
+        anomalies: list[dict[str, Any]] = []
+
+        for sheet_name, chunk in iter_sheet_chunks(content):
+            sheet = sheets.get(sheet_name)
+            if sheet is None:
+                columns = [str(c) for c in chunk.columns.tolist()]
+                sheet = sheets[sheet_name] = {
+                    "sheet": sheet_name,
+                    "columns": columns,
+                    "rows": 0,
+                    "column_mappings": self.fuzzy_match_columns(columns, schema, branch),
+                    "evaluation": anomaly_rules.SheetEvaluation(
+                        aggregates=aggregates,
+                        branch=branch,
+                        limit_per_rule=ANOMALY_ALERTS_PER_RULE,
+                        extra={"sheet": sheet_name},
+                        scope=f"{sheet_name}:",
+                    ),
+                }
+            sheet["rows"] += len(chunk)
+            table = self.extract_structured(chunk, sheet["column_mappings"])
+            if table.num_rows:
+                anomalies.extend(sheet["evaluation"].add(table.to_pandas()))
+            if on_chunk is not None:
+                on_chunk(sheet_name, table)
+
+        extracted = {
+            "file_type": file_type,
+            "sheets": [{"sheet": s["sheet"], "rows": s["rows"], "columns": s["columns"]} for s in sheets.values()],
         }
+        audit = self.aggregate_sheet_audits(list(sheets.values()), schema, extracted)
+        audit["anomalies"] = anomalies
         return ExtractionResult(extracted_data=extracted, audit=audit)
 
+    def aggregate_sheet_audits(
+        self, sheets: list[dict[str, Any]], schema: list[str], extracted: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Row-weighted overall score; column mappings come from the best-matching sheet."""
+        if not sheets:
+            mappings = self.fuzzy_match_columns([], schema)
+            return {
+                "overall_score": self.calculate_confidence(mappings, extracted),
+                "field_confidence": {},
+                "column_mappings": mappings,
+                "warnings": self.generate_warnings(mappings) + ["Workbook has no data sheets"],
+                "sheets": [],
+            }
+
+        sheet_audits = []
+        field_confidence: dict[str, float] = {}
+        for sheet in sheets:
+            score = self.calculate_confidence(sheet["column_mappings"], extracted)
+            warnings = self.generate_warnings(sheet["column_mappings"])
+            sheet_audits.append({**{k: sheet[k] for k in ("sheet", "rows", "column_mappings")}, "score": score, "warnings": warnings})
+            for m in sheet["column_mappings"]:
+                field_confidence[m["mapped_to"]] = max(field_confidence.get(m["mapped_to"], 0.0), m.get("confidence", 0.0))
+
+        # Sheets that map nothing (notes, cover tabs) do not drag the score down.
+        scored = [a for a in sheet_audits if any(m["original"] for m in a["column_mappings"])] or sheet_audits
+        total_rows = sum(a["rows"] for a in scored)
+        if total_rows:
+            overall = round(sum(a["score"] * a["rows"] for a in scored) / total_rows, 1)
+        else:
+            overall = max(a["score"] for a in scored)
+        best = max(sheet_audits, key=lambda a: (a["score"], a["rows"]))
+        warnings = best["warnings"] if len(sheet_audits) == 1 else [
+            f"[{a['sheet']}] {w}" for a in sheet_audits for w in a["warnings"]
+        ]
+        return {
+            "overall_score": overall,
+            "field_confidence": field_confidence,
+            "column_mappings": best["column_mappings"],
+            "warnings": warnings,
+            "sheets": sheet_audits,
+        }
+
 
 excel_processor_service = ExcelProcessorService()
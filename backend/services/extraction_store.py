@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, time
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from bson import ObjectId
+from gridfs import GridFSBucket
+
+from database.mongodb import get_sync_gridfs_bucket
+
+# Full sheet extractions live as zstd Parquet in their own GridFS bucket; the
+# excel_extractions document only keeps the pointer, schema and stats.
+EXTRACTION_BUCKET = os.getenv("EXTRACTION_BUCKET", "extractions")
+PARQUET_COMPRESSION = "zstd"
+# Row groups are the unit the read endpoint can skip, so keep them modest.
+ROW_GROUP_ROWS = int(os.getenv("EXTRACTION_ROW_GROUP_ROWS", "10000"))
+MAX_READ_ROWS = 5000
+
+
+def get_extraction_bucket() -> GridFSBucket:
+    return get_sync_gridfs_bucket(EXTRACTION_BUCKET)
+
+
+def frame_to_table(df: pd.DataFrame) -> pa.Table:
+    """Arrow table for one chunk; object columns that mix types are stored as strings."""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].map(lambda v: None if v is None or v != v else str(v))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def writer_schema(schema: pa.Schema) -> pa.Schema:
+    """File schema for a sheet, from its first chunk.
+
+    Widened so later chunks usually still fit: integers become float64 (a decimal
+    further down is common) and all-null columns become strings.
+    """
+    fields = []
+    for f in schema:
+        t = f.type
+        if pa.types.is_null(t) or pa.types.is_large_string(t):
+            t = pa.string()
+        elif pa.types.is_integer(t):
+            t = pa.float64()
+        fields.append(pa.field(f.name, t))
+    return pa.schema(fields)
+
+
+def _coerce(column: pa.ChunkedArray, target: pa.DataType) -> pa.ChunkedArray:
+    """Value-by-value conversion for a column the plain cast rejected; what does not parse becomes null."""
+    values = column.to_pandas()
+    try:
+        if pa.types.is_timestamp(target) or pa.types.is_date(target):
+            values = pd.to_datetime(values, errors="coerce", format="mixed")
+        elif pa.types.is_integer(target) or pa.types.is_floating(target) or pa.types.is_boolean(target):
+            values = pd.to_numeric(values, errors="coerce")
+        else:
+            return pa.chunked_array([pa.nulls(len(column), target)])
+        return pa.chunked_array([pa.array(values, from_pandas=True).cast(target, safe=False)])
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError, ValueError, TypeError):
+        return pa.chunked_array([pa.nulls(len(column), target)])
+
+
+def conform_table(table: pa.Table, schema: pa.Schema) -> tuple[pa.Table, dict[str, int]]:
+    """Cast a chunk to the file schema; also returns how many values per column became null."""
+    columns, coerced = [], {}
+    for f in schema:
+        if f.name not in table.column_names:
+            columns.append(pa.chunked_array([pa.nulls(table.num_rows, f.type)]))
+            continue
+        column = table[f.name]
+        if column.type != f.type:
+            try:
+                column = pc.cast(column, f.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                nulls = column.null_count
+                column = _coerce(column, f.type)
+                coerced[f.name] = column.null_count - nulls
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema), coerced
+
+
+def table_schema(schema: pa.Schema) -> list[dict[str, str]]:
+    return [{"name": f.name, "type": str(f.type)} for f in schema]
+
+
+def _bound(value: Any) -> Any:
+    # BSON stores datetimes but not dates or times; those keep their ISO text.
+    if isinstance(value, (date, time)) and not isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class TableStats:
+    """Per-column null counts, bounds and sums, accumulated one chunk at a time."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self._columns: dict[str, dict[str, Any]] = {}
+
+    def add(self, table: pa.Table, coerced: dict[str, int] | None = None) -> None:
+        self.rows += table.num_rows
+        for name in table.column_names:
+            column = table[name]
+            entry = self._columns.setdefault(name, {"nulls": 0})
+            entry["nulls"] += column.null_count
+            if coerced and coerced.get(name):
+                entry["coerced"] = entry.get("coerced", 0) + coerced[name]
+            t = column.type
+            numeric = pa.types.is_integer(t) or pa.types.is_floating(t)
+            if not (numeric or pa.types.is_timestamp(t) or pa.types.is_date(t) or pa.types.is_time(t)):
+                continue
+            bounds = pc.min_max(column)
+            low, high = bounds["min"].as_py(), bounds["max"].as_py()
+            entry["min"] = low if entry.get("min") is None else entry["min"] if low is None else min(entry["min"], low)
+            entry["max"] = high if entry.get("max") is None else entry["max"] if high is None else max(entry["max"], high)
+            if numeric:
+                total = pc.sum(column).as_py()
+                entry["sum"] = entry.get("sum") if total is None else (entry.get("sum") or 0) + total
+
+    def to_dict(self) -> dict[str, Any]:
+        columns = {
+            name: {k: _bound(v) if k in ("min", "max") else v for k, v in entry.items()}
+            for name, entry in self._columns.items()
+        }
+        return {"rows": self.rows, "columns": columns}
+
+
+def table_stats(table: pa.Table) -> dict[str, Any]:
+    stats = TableStats()
+    stats.add(table)
+    return stats.to_dict()
+
+
+class ParquetSheetWriter:
+    """Streams one sheet's chunks as zstd Parquet into the extraction bucket.
+
+    The schema is fixed by the first chunk (see writer_schema) and later chunks are
+    cast to it; values that cannot be cast are stored as null and counted in the
+    column's ``coerced`` stat. Each chunk becomes its own row group and goes straight
+    to the GridFS upload stream, so only the current chunk is in memory.
+    """
+
+    def __init__(self, filename: str, metadata: dict[str, Any] | None = None):
+        self._stream = get_extraction_bucket().open_upload_stream(
+            filename, metadata={"content_type": "application/vnd.apache.parquet", **(metadata or {})}
+        )
+        self._writer: pq.ParquetWriter | None = None
+        self.schema: pa.Schema | None = None
+        self.stats = TableStats()
+
+    def write(self, table: pa.Table) -> None:
+        if self._writer is None:
+            self.schema = writer_schema(table.schema)
+            self._writer = pq.ParquetWriter(self._stream, self.schema, compression=PARQUET_COMPRESSION)
+        table, coerced = conform_table(table, self.schema)
+        self._writer.write_table(table, row_group_size=ROW_GROUP_ROWS)
+        self.stats.add(table, coerced)
+
+    def close(self) -> str:
+        """Finish the file; returns its GridFS id."""
+        if self._writer is None:
+            self.write(pa.table({}))
+        self._writer.close()
+        self._stream.close()
+        return str(self._stream._id)
+
+    def abort(self) -> None:
+        """Drop a file that will not be finished (the upload failed part way)."""
+        if self._stream.closed:
+            return
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+        self._stream.abort()
+
+
+def read_columns(file_id: str, columns: list[str]) -> pa.Table:
+    """Whole-table read of whichever of ``columns`` the file has (column chunks only)."""
+    with get_extraction_bucket().open_download_stream(ObjectId(file_id)) as stream:
+        pf = pq.ParquetFile(stream)
+        return pf.read(columns=[c for c in columns if c in pf.schema_arrow.names])
+
+
+def read_table_slice(
+    file_id: str, columns: list[str] | None = None, offset: int = 0, limit: int = 100
+) -> tuple[pa.Table, int]:
+    """Read ``limit`` rows from ``offset`` for ``columns`` only.
+
+    GridOut is seekable, so pyarrow fetches the footer plus the row groups and column
+    chunks it needs rather than the whole file. Returns the slice and the total row count.
+    """
+    with get_extraction_bucket().open_download_stream(ObjectId(file_id)) as stream:
+        pf = pq.ParquetFile(stream)
+        total = pf.metadata.num_rows
+        if columns:
+            unknown = [c for c in columns if c not in pf.schema_arrow.names]
+            if unknown:
+                raise KeyError(", ".join(unknown))
+
+        groups, first_row, start = [], None, 0
+        for i in range(pf.num_row_groups):
+            rows = pf.metadata.row_group(i).num_rows
+            if start + rows > offset and start < offset + limit:
+                groups.append(i)
+                first_row = start if first_row is None else first_row
+            start += rows
+        if not groups:
+            return pf.schema_arrow.empty_table().select(columns or pf.schema_arrow.names), total
+
+        table = pf.read_row_groups(groups, columns=columns)
+        return table.slice(offset - first_row, limit), total
@@ -1,13 +1,107 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import io
-from typing import Any
+import tempfile
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, AsyncIterator
 
 import pandas as pd
 from bson import ObjectId
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 
-from database.mongodb import get_gridfs_bucket
+from core.cache import TTLCache
+from database.mongodb import get_gridfs_bucket, get_mongo_db
+
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+PREVIEW_MAX_ROWS = 200
+PREVIEW_SPOOL_BYTES = 8 * 1024 * 1024
+
+_preview_cache = TTLCache(maxsize=512, ttl=3600)
+
+
+class FileTooLargeError(ValueError):
+    pass
+
+
+async def iter_upload_chunks(upload: Any, chunk_size: int = UPLOAD_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    """Yield an UploadFile (or anything with an async read(n)) in fixed-size chunks."""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def read_preview(source: Any, rows: int) -> dict[str, Any]:
+    """First ``rows`` data rows of the first sheet; stops reading once they are parsed."""
+    df = pd.read_excel(source, sheet_name=0, nrows=rows)
+    return {
+        "columns": [str(c) for c in df.columns.tolist()],
+        "rows": df.fillna("").astype(str).values.tolist(),
+    }
+
+
+def _etag_for(stream: Any) -> str:
+    file_hash = ((getattr(stream, "metadata", None) or {}).get("file_hash") or "").removeprefix("sha256:")
+    return f'"{file_hash or stream._id}"'
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    # GridFS stores naive UTC datetimes; HTTP dates have second precision.
+    return value.replace(tzinfo=timezone.utc, microsecond=0) if value.tzinfo is None else value.replace(microsecond=0)
+
+
+def _not_modified(etag: str, upload_date: datetime | None, if_none_match: str | None, if_modified_since: str | None) -> bool:
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+    if if_modified_since and upload_date is not None:
+        try:
+            return upload_date <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(header: str, length: int) -> tuple[int, int] | None:
+    """Inclusive (start, end) for a single ``bytes=`` range; None means serve the whole file.
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not (first.isdigit() or first == "") or not (last.isdigit() or last == "") or first == last == "":
+        return None
+    if first == "":
+        if int(last) == 0:
+            raise ValueError("empty suffix range")
+        start, end = max(0, length - int(last)), length - 1
+    else:
+        start = int(first)
+        end = int(last) if last else length - 1
+    end = min(end, length - 1)
+    if start >= length or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+async def _iter_stream(stream: Any, start: int, remaining: int) -> AsyncIterator[bytes]:
+    if start:
+        stream.seek(start)
+    while remaining > 0:
+        chunk = await stream.read(min(UPLOAD_CHUNK_BYTES, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
 
 
 class GridFSStorage:
@@ -21,29 +115,149 @@ class GridFSStorage:
         )
         return file_id
 
+    async def save_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        content_type: str,
+        metadata: dict[str, Any],
+        max_bytes: int | None = None,
+    ) -> tuple[Any, str, int]:
+        """Pipe chunks straight into GridFS, hashing as they go.
+
+        Only one chunk is held in memory at a time. The SHA-256 is written into
+        ``metadata.file_hash`` once the stream is complete. Returns
+        ``(file_id, sha256_hex, size)``; raises FileTooLargeError (and aborts
+        the partial GridFS file) when ``max_bytes`` is exceeded.
+        """
+        bucket = get_gridfs_bucket()
+        grid_in = bucket.open_upload_stream(filename, metadata=metadata, content_type=content_type)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise FileTooLargeError(f"File exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                await grid_in.write(chunk)
+        except BaseException:
+            await grid_in.abort()
+            raise
+
+        sha256 = digest.hexdigest()
+        await grid_in.set("metadata", {**metadata, "file_hash": f"sha256:{sha256}"})
+        await grid_in.close()
+        return grid_in._id, sha256, size
+
+    async def find_file_id_by_hash(self, sha256: str, exclude_id: Any = None):
+        bucket = get_gridfs_bucket()
+        query: dict[str, Any] = {"metadata.file_hash": f"sha256:{sha256}"}
+        if exclude_id is not None:
+            query["_id"] = {"$ne": exclude_id}
+        cursor = bucket.find(query, limit=1)
+        async for grid_out in cursor:
+            return grid_out._id
+        return None
+
+    async def delete_file(self, file_id: Any) -> None:
+        bucket = get_gridfs_bucket()
+        await bucket.delete(file_id if isinstance(file_id, ObjectId) else ObjectId(str(file_id)))
+
+    async def ensure_indexes(self) -> None:
+        db = get_mongo_db()
+        await db["excel_files.files"].create_index("metadata.file_hash")
+
     async def open_download_stream(self, file_id: str):
         bucket = get_gridfs_bucket()
         return await bucket.open_download_stream(ObjectId(file_id))
 
-    async def stream_file_response(self, file_id: str, filename: str | None = None):
+    async def stream_file_response(
+        self,
+        file_id: str,
+        filename: str | None = None,
+        range_header: str | None = None,
+        if_none_match: str | None = None,
+        if_modified_since: str | None = None,
+        if_range: str | None = None,
+    ):
+        """Serve a GridFS file with validators and single-range support.
+
+        GridFS files are immutable, so the SHA-256 from ``metadata.file_hash``
+        is a strong ETag. Conditional requests are answered with 304 and
+        ``Range: bytes=...`` with 206 by seeking inside the download stream.
+        """
         stream = await self.open_download_stream(file_id)
         out_filename = filename or getattr(stream, "filename", "download.xlsx")
+        length = int(stream.length)
+        etag = _etag_for(stream)
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, max-age=31536000, immutable",
+            "Content-Disposition": f"attachment; filename=\"{out_filename}\"",
+        }
+        upload_date = _as_utc(getattr(stream, "upload_date", None))
+        if upload_date is not None:
+            headers["Last-Modified"] = format_datetime(upload_date, usegmt=True)
+
+        if _not_modified(etag, upload_date, if_none_match, if_modified_since):
+            return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "Content-Disposition"})
+
+        byte_range = None
+        if range_header and (not if_range or if_range.strip() == etag):
+            try:
+                byte_range = _parse_range(range_header, length)
+            except ValueError:
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{length}", "ETag": etag})
+
+        media_type = getattr(stream, "content_type", None) or "application/octet-stream"
+        if byte_range is None:
+            headers["Content-Length"] = str(length)
+            return StreamingResponse(_iter_stream(stream, 0, length), media_type=media_type, headers=headers)
 
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+        headers["Content-Length"] = str(end - start + 1)
         return StreamingResponse(
-            stream,
-            media_type=getattr(stream, "content_type", "application/octet-stream"),
-            headers={"Content-Disposition": f"attachment; filename=\"{out_filename}\""},
+            _iter_stream(stream, start, end - start + 1),
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
         )
 
     async def get_file_preview(self, file_id: str, rows: int = 10):
+        rows = max(1, min(int(rows), PREVIEW_MAX_ROWS))
+        key = (file_id, rows)
+        cached = _preview_cache.get(key)
+        if cached is not None:
+            return cached
+
         stream = await self.open_download_stream(file_id)
-        content = await stream.read()
-        df = pd.read_excel(io.BytesIO(content), sheet_name=0)
-        preview_df = df.head(rows)
-        return {
-            "columns": [str(c) for c in preview_df.columns.tolist()],
-            "rows": preview_df.fillna("").astype(str).values.tolist(),
-        }
+        # GridFS files never change, so a preview computed once is kept on the file document.
+        persisted = ((getattr(stream, "metadata", None) or {}).get("previews") or {}).get(str(rows))
+        if persisted is not None:
+            _preview_cache.set(key, persisted)
+            return persisted
+
+        with tempfile.SpooledTemporaryFile(max_size=PREVIEW_SPOOL_BYTES) as spool:
+            while True:
+                chunk = await stream.readchunk()
+                if not chunk:
+                    break
+                spool.write(chunk)
+            spool.seek(0)
+            preview = await asyncio.to_thread(read_preview, spool, rows)
+
+        _preview_cache.set(key, preview)
+        try:
+            await get_mongo_db()["excel_files.files"].update_one(
+                {"_id": stream._id},
+                {"$set": {f"metadata.previews.{rows}": preview}},
+            )
+        except Exception:
+            pass
+        return preview
 
 
 gridfs_storage = GridFSStorage()
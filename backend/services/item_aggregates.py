@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+import pandas as pd
+import pyarrow as pa
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.database import Database
+
+from core.cache import TTLCache
+
+# Rolling price / consumption aggregates per (branch, item, vendor).
+#
+# Every completed extraction writes its per-day contribution to item_daily, keyed by
+# upload so a retried task overwrites rather than double-counts. The touched keys are
+# then re-aggregated over the window into item_aggregates, one small document per key,
+# which is what the anomaly rules read.
+WINDOW_DAYS = int(os.getenv("ANOMALY_WINDOW_DAYS", "30"))
+DAILY_COLLECTION = "item_daily"
+AGGREGATE_COLLECTION = "item_aggregates"
+
+# How long a worker reuses a branch's aggregates as the anomaly reference.
+REFERENCE_TTL_SECONDS = float(os.getenv("ANOMALY_REFERENCE_TTL_SECONDS", "60"))
+
+_DATE_COLUMNS = ("date", "invoice_date")
+_reference_cache = TTLCache(maxsize=16, ttl=REFERENCE_TTL_SECONDS)
+
+
+def normalize_item(name: Any) -> str:
+    if name is None or (isinstance(name, float) and name != name):
+        return ""
+    return " ".join(str(name).lower().split())
+
+
+def aggregate_key(branch: str, item: str, vendor: str) -> str:
+    return f"{branch}|{item}|{vendor}"
+
+
+@dataclass(frozen=True)
+class ItemStats:
+    mean_price: float | None
+    price_count: int
+    burn_rate: float  # units consumed per observed day in the window
+
+
+class ItemAggregates:
+    """Read side for the anomaly rules: every lookup is a dict hit."""
+
+    def __init__(self, stats: dict[tuple[str, str, str], ItemStats]):
+        self._stats = stats
+        self._vendors: dict[tuple[str, str], dict[str, ItemStats]] = defaultdict(dict)
+        self._burn: dict[tuple[str, str], float] = defaultdict(float)
+        self._reference: dict[tuple[str, str], tuple] = {}
+        totals: dict[tuple[str, str], list[float]] = defaultdict(lambda: [0.0, 0])
+        for (branch, item, vendor), s in stats.items():
+            self._vendors[(branch, item)][vendor] = s
+            self._burn[(branch, item)] += s.burn_rate
+            if s.mean_price is not None:
+                totals[(branch, item)][0] += s.mean_price * s.price_count
+                totals[(branch, item)][1] += s.price_count
+        self._item_mean = {k: t[0] / t[1] for k, t in totals.items() if t[1]}
+
+    def reference(self, branch: str, item_key: str) -> tuple:
+        """``(avg_30, burn_rate, cheapest_price, cheapest_vendor, second_cheapest)`` for a normalized item."""
+        ref = self._reference.get((branch, item_key))
+        if ref is None:
+            vendors = self._vendors.get((branch, item_key), {})
+            priced = sorted((s.mean_price, v) for v, s in vendors.items() if s.mean_price is not None)
+            cheapest, cheapest_vendor = priced[0] if priced else (None, None)
+            second = priced[1][0] if len(priced) > 1 else None
+            ref = self._reference[(branch, item_key)] = (
+                self._item_mean.get((branch, item_key)),
+                self._burn.get((branch, item_key), 0.0),
+                cheapest,
+                cheapest_vendor,
+                second,
+            )
+        return ref
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def historical_avg(self, branch: str, item: str) -> float | None:
+        """Window mean unit price across all vendors of the item."""
+        return self._item_mean.get((branch, normalize_item(item)))
+
+    def other_vendor_prices(self, branch: str, item: str, vendor: str) -> list[float]:
+        vendors = self._vendors.get((branch, normalize_item(item)), {})
+        own = normalize_item(vendor)
+        return [s.mean_price for v, s in vendors.items() if v != own and s.mean_price is not None]
+
+    def burn_rate(self, branch: str, item: str) -> float:
+        return self._burn.get((branch, normalize_item(item)), 0.0)
+
+    @classmethod
+    def from_docs(cls, docs: Iterable[dict[str, Any]]) -> "ItemAggregates":
+        return cls(
+            {
+                (d["branch"], d["item"], d["vendor"]): ItemStats(d.get("mean_price"), d.get("price_count", 0), d.get("burn_rate", 0.0))
+                for d in docs
+            }
+        )
+
+    @classmethod
+    def from_history(cls, history: Iterable[dict[str, Any]], now: datetime | None = None) -> "ItemAggregates":
+        """Single pass over raw history rows (``item_name``, ``vendor``, ``unit_cost``,
+        ``quantity_used``, optional ``branch`` and ``date``), for callers without the store."""
+        cutoff = ((now or datetime.now(timezone.utc)) - timedelta(days=WINDOW_DAYS)).date().isoformat()
+        acc: dict[tuple[str, str, str], list] = {}
+        for row in history:
+            day = row.get("date")
+            day = day.isoformat()[:10] if hasattr(day, "isoformat") else (str(day)[:10] if day else None)
+            if day is not None and day < cutoff:
+                continue
+            key = (row.get("branch", ""), normalize_item(row.get("item_name")), normalize_item(row.get("vendor")))
+            entry = acc.get(key)
+            if entry is None:
+                entry = acc[key] = [0.0, 0, 0.0, set()]
+            price = row.get("unit_cost")
+            if price is not None:
+                entry[0] += price
+                entry[1] += 1
+            used = row.get("quantity_used")
+            if used:
+                entry[2] += used
+            entry[3].add(day)
+        return cls(
+            {
+                key: ItemStats(p_sum / p_cnt if p_cnt else None, p_cnt, used / max(1, len(days)))
+                for key, (p_sum, p_cnt, used, days) in acc.items()
+            }
+        )
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    if name in df.columns:
+        return pd.to_numeric(df[name], errors="coerce")
+    return pd.Series(float("nan"), index=df.index)
+
+
+class DailyRows:
+    """Per (item, vendor, day) price sum/count and consumption from normalized sheet tables.
+
+    Procurement sheets contribute prices (``unit_price``, else ``total / quantity``);
+    inventory sheets contribute consumption (``issued``). Rows without an item are ignored.
+    Tables are reduced as they are added, so a sheet can be fed chunk by chunk.
+    """
+
+    def __init__(self, day: str):
+        self.day = day
+        self._parts: list[pd.DataFrame] = []
+
+    def add(self, table: pa.Table) -> None:
+        if "item" not in table.column_names or not table.num_rows:
+            return
+        df = table.to_pandas()
+        price = _column(df, "unit_price")
+        price = price.fillna(_column(df, "total") / _column(df, "quantity").where(lambda q: q != 0))
+        dates = next((df[c] for c in _DATE_COLUMNS if c in df.columns), None)
+        frame = pd.DataFrame(
+            {
+                "item": df["item"].map(normalize_item),
+                "vendor": df["vendor_name"].map(normalize_item) if "vendor_name" in df.columns else "",
+                "day": pd.to_datetime(dates, errors="coerce").dt.strftime("%Y-%m-%d").fillna(self.day) if dates is not None else self.day,
+                "price": price,
+                "used": _column(df, "issued"),
+            }
+        )
+        frame = frame[frame["item"] != ""]
+        self._parts.append(
+            frame.groupby(["item", "vendor", "day"], sort=False).agg(
+                price_sum=("price", "sum"), price_count=("price", "count"), qty_used=("used", "sum")
+            )
+        )
+
+    def rows(self) -> list[dict[str, Any]]:
+        if not self._parts:
+            return []
+        grouped = pd.concat(self._parts).groupby(level=[0, 1, 2], sort=False).sum()
+        return [
+            {"item": item, "vendor": vendor, "day": d, "price_sum": float(p_sum), "price_count": int(p_cnt), "qty_used": float(used)}
+            for (item, vendor, d), p_sum, p_cnt, used in zip(
+                grouped.index, grouped["price_sum"], grouped["price_count"], grouped["qty_used"]
+            )
+        ]
+
+
+def daily_rows(tables: dict[str, pa.Table], day: str) -> list[dict[str, Any]]:
+    """DailyRows over whole sheet tables."""
+    acc = DailyRows(day)
+    for table in tables.values():
+        acc.add(table)
+    return acc.rows()
+
+
+def record_extraction(db: Database, excel_upload_id: int, branch: str, rows: list[dict[str, Any]]) -> int:
+    """Upsert this upload's daily contributions and refresh the aggregates they touch."""
+    if not rows:
+        return 0
+    ops = []
+    keys = set()
+    for r in rows:
+        key = aggregate_key(branch, r["item"], r["vendor"])
+        keys.add(key)
+        ops.append(
+            ReplaceOne(
+                {"_id": f"{excel_upload_id}|{key}|{r['day']}"},
+                {**r, "key": key, "branch": branch, "excel_upload_id": excel_upload_id},
+                upsert=True,
+            )
+        )
+    db[DAILY_COLLECTION].bulk_write(ops, ordered=False)
+    return refresh_aggregates(db, keys)
+
+
+def refresh_aggregates(db: Database, keys: Iterable[str] | None = None, now: datetime | None = None) -> int:
+    """Recompute window stats for ``keys`` (all keys when None) from item_daily."""
+    cutoff = ((now or datetime.now(timezone.utc)) - timedelta(days=WINDOW_DAYS)).date().isoformat()
+    keys = None if keys is None else list(keys)
+    match: dict[str, Any] = {"day": {"$gte": cutoff}}
+    if keys is not None:
+        match["key"] = {"$in": keys}
+    pipeline = [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": "$key",
+                "branch": {"$first": "$branch"},
+                "item": {"$first": "$item"},
+                "vendor": {"$first": "$vendor"},
+                "price_sum": {"$sum": "$price_sum"},
+                "price_count": {"$sum": "$price_count"},
+                "qty_used": {"$sum": "$qty_used"},
+                "days": {"$addToSet": "$day"},
+            }
+        },
+    ]
+    updated_at = datetime.now(timezone.utc)
+    ops: list = []
+    seen = set()
+    for g in db[DAILY_COLLECTION].aggregate(pipeline):
+        seen.add(g["_id"])
+        ops.append(
+            ReplaceOne(
+                {"_id": g["_id"]},
+                {
+                    "branch": g["branch"],
+                    "item": g["item"],
+                    "vendor": g["vendor"],
+                    "mean_price": g["price_sum"] / g["price_count"] if g["price_count"] else None,
+                    "price_count": g["price_count"],
+                    "burn_rate": g["qty_used"] / max(1, len(g["days"])),
+                    "window_days": WINDOW_DAYS,
+                    "updated_at": updated_at,
+                },
+                upsert=True,
+            )
+        )
+    # Keys whose history aged out of the window.
+    stale = (set(keys) if keys is not None else set(db[AGGREGATE_COLLECTION].distinct("_id"))) - seen
+    ops.extend(DeleteOne({"_id": k}) for k in stale)
+    if ops:
+        db[AGGREGATE_COLLECTION].bulk_write(ops, ordered=False)
+    return len(seen)
+
+
+def load_branch_aggregates(db: Database, branch: str) -> ItemAggregates:
+    """Blocking read of one branch's aggregates, cached per process for REFERENCE_TTL_SECONDS."""
+    aggregates = _reference_cache.get(branch)
+    if aggregates is None:
+        aggregates = ItemAggregates.from_docs(db[AGGREGATE_COLLECTION].find({"branch": branch}))
+        _reference_cache.set(branch, aggregates)
+    return aggregates
+
+
+async def load_item_aggregates(db, branch: str | None = None) -> ItemAggregates:
+    """Motor read of the aggregate store for the API."""
+    query = {"branch": branch} if branch else {}
+    return ItemAggregates.from_docs([d async for d in db[AGGREGATE_COLLECTION].find(query)])
+
+
+async def ensure_indexes(db) -> None:
+    await db[DAILY_COLLECTION].create_index([("key", 1), ("day", 1)])
+    await db[AGGREGATE_COLLECTION].create_index([("branch", 1), ("item", 1)])
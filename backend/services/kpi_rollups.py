@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable
+
+import pandas as pd
+import pyarrow as pa
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.database import Database
+
+# Dashboard KPIs rolled up per (period, start, branch, file_type), period "day" or "week".
+#
+# Same shape as item_aggregates: each finalized upload writes its per-day contribution
+# to kpi_daily (keyed by upload, so a retry or re-run replaces rather than adds), then
+# only the day and week buckets it touched are re-summed into kpi_rollups. The summary
+# endpoint reads kpi_rollups alone, so its cost depends on the window, not on history.
+DAILY_COLLECTION = "kpi_daily"
+ROLLUP_COLLECTION = "kpi_rollups"
+PERIODS = ("day", "week")
+
+# Rollup metric -> schema column summed from the normalized sheet tables. Schema fields
+# are specific to a file_type (``total`` is procurement, ``amount`` petty cash, ...).
+METRIC_COLUMNS = {
+    "revenue": "revenue",
+    "food_cost": "food_cost",
+    "labor_cost": "labor_cost",
+    "covers": "covers",
+    "procurement_spend": "total",
+    "invoiced": "total_amount",
+    "paid": "paid_amount",
+    "petty_cash": "amount",
+}
+# Counted once, on the processing day, rather than spread over the rows' dates.
+UPLOAD_METRICS = ("uploads", "alerts", "red_flags")
+METRICS = (*METRIC_COLUMNS, *UPLOAD_METRICS)
+DATE_COLUMNS = ("date", "invoice_date")
+
+
+def week_start(day: str) -> str:
+    """ISO date of the Monday starting ``day``'s week."""
+    d = date.fromisoformat(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+def rollup_id(period: str, start: str, branch: str, file_type: str) -> str:
+    return f"{period}|{start}|{branch}|{file_type}"
+
+
+class DailyContribution:
+    """Per-day metric sums for one upload.
+
+    Rows are bucketed by their own ``date``/``invoice_date`` when they have one and
+    by ``day`` (the processing day) otherwise; the alert counts always land on ``day``.
+    Tables are reduced as they are added, so a sheet can be fed chunk by chunk.
+    """
+
+    def __init__(self, day: str):
+        self.day = day
+        self._parts: list[pd.DataFrame] = []
+
+    def add(self, table: pa.Table) -> None:
+        if not table.num_rows:
+            return
+        present = {m: c for m, c in METRIC_COLUMNS.items() if c in table.column_names}
+        date_col = next((c for c in DATE_COLUMNS if c in table.column_names), None)
+        if not present and date_col is None:
+            self._parts.append(pd.DataFrame({"rows": [table.num_rows]}, index=pd.Index([self.day], name="day")))
+            return
+        df = table.select([*dict.fromkeys([*present.values(), *([date_col] if date_col else [])])]).to_pandas()
+        frame = pd.DataFrame({m: pd.to_numeric(df[c], errors="coerce") for m, c in present.items()}, index=df.index)
+        if date_col:
+            days = pd.to_datetime(df[date_col], errors="coerce").dt.strftime("%Y-%m-%d")
+            frame["day"] = days.fillna(self.day)
+        else:
+            frame["day"] = self.day
+        frame["rows"] = 1
+        self._parts.append(frame.groupby("day", sort=False).sum(min_count=1))
+
+    def rows(self, anomalies: list[dict[str, Any]] | None = None) -> list[dict[str, Any]]:
+        totals: dict[str, dict[str, Any]] = {}
+        if self._parts:
+            grouped = pd.concat(self._parts).groupby(level=0, sort=True).sum(min_count=1)
+            for d, row in grouped.iterrows():
+                totals[d] = {k: (int(v) if k == "rows" else float(v)) for k, v in row.items() if pd.notna(v)}
+        anomalies = anomalies or []
+        processing = totals.setdefault(self.day, {"rows": 0})
+        processing["uploads"] = 1
+        processing["alerts"] = len(anomalies)
+        processing["red_flags"] = sum(1 for a in anomalies if a.get("type") == "critical")
+        return [{"day": d, **values} for d, values in sorted(totals.items())]
+
+
+def contribution_rows(
+    tables: Iterable[pa.Table], day: str, anomalies: list[dict[str, Any]] | None = None
+) -> list[dict[str, Any]]:
+    """DailyContribution over whole sheet tables."""
+    acc = DailyContribution(day)
+    for table in tables:
+        acc.add(table)
+    return acc.rows(anomalies)
+
+
+def record_upload(
+    db: Database, excel_upload_id: int, branch: str, file_type: str, rows: list[dict[str, Any]], refresh: bool = True
+) -> set[tuple[str, str, str, str]]:
+    """Replace this upload's contributions and re-sum the buckets they touch (old and new).
+
+    Returns the touched ``(period, start, branch, file_type)`` buckets; with
+    ``refresh=False`` the caller re-sums them later in one go (see backfill).
+    """
+    daily = db[DAILY_COLLECTION]
+    previous = daily.distinct("day", {"excel_upload_id": excel_upload_id})
+    daily.delete_many({"excel_upload_id": excel_upload_id})
+    if rows:
+        daily.insert_many(
+            [
+                {
+                    "_id": f"{excel_upload_id}|{r['day']}",
+                    **r,
+                    "week": week_start(r["day"]),
+                    "branch": branch,
+                    "file_type": file_type,
+                    "excel_upload_id": excel_upload_id,
+                }
+                for r in rows
+            ],
+            ordered=False,
+        )
+    days = set(previous) | {r["day"] for r in rows}
+    buckets = {("day", d, branch, file_type) for d in days} | {("week", week_start(d), branch, file_type) for d in days}
+    if refresh:
+        refresh_rollups(db, buckets)
+    return buckets
+
+
+def refresh_rollups(db: Database, buckets: Iterable[tuple[str, str, str, str]]) -> int:
+    """Re-sum the given buckets from kpi_daily; buckets left without contributions are removed."""
+    by_scope: dict[tuple[str, str, str], list[str]] = {}
+    for period, start, branch, file_type in buckets:
+        by_scope.setdefault((period, branch, file_type), []).append(start)
+
+    updated_at = datetime.now(timezone.utc)
+    ops: list = []
+    for (period, branch, file_type), starts in by_scope.items():
+        field = "day" if period == "day" else "week"
+        pipeline = [
+            {"$match": {"branch": branch, "file_type": file_type, field: {"$in": starts}}},
+            {
+                "$group": {
+                    "_id": f"${field}",
+                    "rows": {"$sum": "$rows"},
+                    **{m: {"$sum": f"${m}"} for m in METRICS},
+                }
+            },
+        ]
+        seen = set()
+        for g in db[DAILY_COLLECTION].aggregate(pipeline):
+            seen.add(g["_id"])
+            ops.append(
+                ReplaceOne(
+                    {"_id": rollup_id(period, g["_id"], branch, file_type)},
+                    {
+                        "period": period,
+                        "start": g["_id"],
+                        "branch": branch,
+                        "file_type": file_type,
+                        "rows": g["rows"],
+                        **{m: g[m] for m in METRICS},
+                        "updated_at": updated_at,
+                    },
+                    upsert=True,
+                )
+            )
+        ops.extend(DeleteOne({"_id": rollup_id(period, s, branch, file_type)}) for s in set(starts) - seen)
+    if ops:
+        db[ROLLUP_COLLECTION].bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def summarize(docs: Iterable[dict[str, Any]], current_start: str) -> dict[str, Any]:
+    """Dashboard figures from daily rollups: totals for the window starting ``current_start``,
+    growth against the equally long window before it, and per-file-type totals."""
+    current = dict.fromkeys(METRICS, 0.0)
+    previous_revenue = 0.0
+    by_file_type: dict[str, dict[str, float]] = {}
+    series: dict[str, float] = {}
+    for d in docs:
+        if d["start"] < current_start:
+            previous_revenue += d.get("revenue") or 0.0
+            continue
+        per_type = by_file_type.setdefault(d["file_type"], {"rows": 0})
+        per_type["rows"] += d.get("rows") or 0
+        for m in METRICS:
+            value = d.get(m) or 0.0
+            current[m] += value
+            if value:
+                per_type[m] = per_type.get(m, 0.0) + value
+        if d.get("revenue"):
+            series[d["start"]] = series.get(d["start"], 0.0) + d["revenue"]
+
+    revenue = current["revenue"]
+    return {
+        "revenue": round(revenue, 2),
+        "growth": round((revenue / previous_revenue - 1) * 100, 1) if previous_revenue else None,
+        "red_flags": int(current["red_flags"]),
+        "alerts": int(current["alerts"]),
+        "uploads": int(current["uploads"]),
+        "food_cost_pct": round(current["food_cost"] / revenue * 100, 1) if revenue else None,
+        "labor_cost_pct": round(current["labor_cost"] / revenue * 100, 1) if revenue else None,
+        "covers": current["covers"],
+        "procurement_spend": round(current["procurement_spend"], 2),
+        "by_file_type": by_file_type,
+        "revenue_series": [{"day": k, "revenue": v} for k, v in sorted(series.items())],
+    }
+
+
+async def load_summary(db, branch: str | None = None, days: int = 30, today: date | None = None) -> dict[str, Any]:
+    """One indexed range read of daily rollups covering this window and the one before."""
+    today = today or datetime.now(timezone.utc).date()
+    current_start = (today - timedelta(days=days - 1)).isoformat()
+    query: dict[str, Any] = {
+        "period": "day",
+        "start": {"$gte": (today - timedelta(days=2 * days - 1)).isoformat(), "$lte": today.isoformat()},
+    }
+    if branch:
+        query["branch"] = branch
+    docs = await db[ROLLUP_COLLECTION].find(query, {"updated_at": 0}).to_list(length=None)
+    return {"branch": branch, "days": days, "from": current_start, "to": today.isoformat(), **summarize(docs, current_start)}
+
+
+async def list_rollups(
+    db, period: str = "week", branch: str | None = None, file_type: str | None = None, since: str | None = None
+) -> list[dict[str, Any]]:
+    query: dict[str, Any] = {"period": period}
+    if branch:
+        query["branch"] = branch
+    if file_type:
+        query["file_type"] = file_type
+    if since:
+        query["start"] = {"$gte": since}
+    docs = await db[ROLLUP_COLLECTION].find(query, {"updated_at": 0}).sort("start", 1).to_list(length=None)
+    return [{k: v for k, v in d.items() if k != "_id"} for d in docs]
+
+
+async def ensure_indexes(db) -> None:
+    await db[DAILY_COLLECTION].create_index("excel_upload_id")
+    await db[DAILY_COLLECTION].create_index([("branch", 1), ("file_type", 1), ("day", 1)])
+    await db[DAILY_COLLECTION].create_index([("branch", 1), ("file_type", 1), ("week", 1)])
+    await db[ROLLUP_COLLECTION].create_index([("period", 1), ("branch", 1), ("start", 1)])
+    await db[ROLLUP_COLLECTION].create_index([("period", 1), ("start", 1)])
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable
+
+import redis
+import redis.asyncio as aioredis
+
+# Upload status push: the worker publishes every stage transition to Redis pub/sub and
+# keeps the latest event per upload under a key, so a client that connects late still
+# gets the current state without touching MySQL.
+STATUS_REDIS_URL = os.getenv("STATUS_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CHANNEL_PREFIX = "ingestion:upload:"
+ALL_UPLOADS_CHANNEL = "ingestion:uploads"
+LAST_EVENT_TTL_SECONDS = int(os.getenv("STATUS_LAST_EVENT_TTL_SECONDS", "3600"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+TERMINAL_STATUSES = {"completed", "review_needed", "failed"}
+
+_sync_client: redis.Redis | None = None
+_sync_client_pid: int | None = None
+_async_client: aioredis.Redis | None = None
+
+
+def channel_for(excel_upload_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{excel_upload_id}"
+
+
+def _last_key(excel_upload_id: int) -> str:
+    return f"{CHANNEL_PREFIX}{excel_upload_id}:last"
+
+
+def get_sync_redis() -> redis.Redis:
+    """Process-local client, same fork rule as the worker's Mongo client."""
+    global _sync_client, _sync_client_pid
+    if _sync_client is None or _sync_client_pid != os.getpid():
+        _sync_client = redis.Redis.from_url(STATUS_REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+        _sync_client_pid = os.getpid()
+    return _sync_client
+
+
+def get_async_redis() -> aioredis.Redis:
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.from_url(STATUS_REDIS_URL, socket_connect_timeout=2)
+    return _async_client
+
+
+def publish(excel_upload_id: int, event: dict[str, Any]) -> None:
+    """Fan one event out to the upload's channel and the all-uploads channel.
+
+    Status push is best effort: a Redis outage must never fail ingestion itself.
+    """
+    payload = json.dumps({"excel_upload_id": excel_upload_id, "ts": time.time(), **event}, default=str)
+    try:
+        pipe = get_sync_redis().pipeline(transaction=False)
+        pipe.publish(channel_for(excel_upload_id), payload)
+        pipe.publish(ALL_UPLOADS_CHANNEL, payload)
+        if event.get("type") == "status":
+            pipe.set(_last_key(excel_upload_id), payload, ex=LAST_EVENT_TTL_SECONDS)
+        pipe.execute()
+    except redis.RedisError:
+        pass
+
+
+def publish_status(excel_upload_id: int, processing_status: str, **extra: Any) -> None:
+    publish(excel_upload_id, {"type": "status", "processing_status": processing_status, **extra})
+
+
+class StageTimer:
+    """Times the pipeline stages of one upload and publishes each one as it completes."""
+
+    def __init__(self, excel_upload_id: int):
+        self.excel_upload_id = excel_upload_id
+        self.timings: dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        publish(self.excel_upload_id, {"type": "stage", "stage": name, "state": "started"})
+        started = time.perf_counter()
+        yield
+        self.timings[name] = int((time.perf_counter() - started) * 1000)
+        publish(
+            self.excel_upload_id,
+            {"type": "stage", "stage": name, "state": "done", "duration_ms": self.timings[name]},
+        )
+
+    def status(self, processing_status: str, **extra: Any) -> None:
+        publish_status(self.excel_upload_id, processing_status, timings_ms=dict(self.timings), **extra)
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def stream_events(
+    excel_upload_ids: Iterable[int] | None = None,
+    load_statuses: Callable[[list[int]], Awaitable[dict[int, dict[str, Any]]]] | None = None,
+) -> AsyncIterator[str]:
+    """SSE frames for the given uploads (or every upload when None).
+
+    Subscribes first and then replays the last known status, so nothing published in
+    between is lost. Uploads with no last event in Redis (it expired, or they were never
+    pushed) are replayed from ``load_statuses`` instead; ids it does not know are
+    dropped. A scoped stream ends once every upload reached a terminal status, and any
+    stream ends quietly if Redis fails; EventSource clients reconnect on their own.
+    """
+    client = get_async_redis()
+    ids = list(dict.fromkeys(excel_upload_ids)) if excel_upload_ids is not None else None
+    pubsub = client.pubsub()
+    try:
+        if ids is None:
+            await pubsub.subscribe(ALL_UPLOADS_CHANNEL)
+        else:
+            await pubsub.subscribe(*(channel_for(i) for i in ids))
+
+        pending = set(ids or [])
+        if ids:
+            missing = []
+            for excel_upload_id, raw in zip(ids, await client.mget([_last_key(i) for i in ids])):
+                if raw is None:
+                    missing.append(excel_upload_id)
+                    continue
+                event = json.loads(raw)
+                if event.get("processing_status") in TERMINAL_STATUSES:
+                    pending.discard(excel_upload_id)
+                yield _sse("status", raw.decode() if isinstance(raw, bytes) else raw)
+            if missing and load_statuses is not None:
+                stored = await load_statuses(missing)
+                for excel_upload_id in missing:
+                    row = stored.get(excel_upload_id)
+                    if row is None or row.get("processing_status") in TERMINAL_STATUSES:
+                        pending.discard(excel_upload_id)
+                    if row is not None:
+                        event = {"excel_upload_id": excel_upload_id, "type": "status", "source": "db", **row}
+                        yield _sse("status", json.dumps(event, default=str))
+            if not pending:
+                return
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=SSE_HEARTBEAT_SECONDS)
+            if message is None:
+                # Comment frame keeps proxies from closing an idle connection.
+                yield ": keepalive\n\n"
+                continue
+            data = message["data"].decode() if isinstance(message["data"], bytes) else message["data"]
+            event = json.loads(data)
+            yield _sse(event.get("type", "message"), data)
+            if ids is not None and event.get("processing_status") in TERMINAL_STATUSES:
+                pending.discard(event["excel_upload_id"])
+                if not pending:
+                    return
+    except redis.RedisError:
+        return
+    finally:
+        try:
+            await asyncio.shield(pubsub.aclose())
+        except redis.RedisError:
+            pass
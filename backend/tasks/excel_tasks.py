@@ -1,103 +1,301 @@
 from __future__ import annotations
 
-import asyncio
 import time
+from datetime import datetime, timezone
 from typing import Any
 
 from bson import ObjectId
-from sqlalchemy import text
+from celery import chord, group
+from celery.signals import worker_process_init
+from pymongo import ReturnDocument
 
 from celery_app import celery_app
-from database.mongodb import get_mongo_db, get_gridfs_bucket
-from database.mysql import SessionLocal
+from core import response_cache
+from database import upload_repository
+from database.mongodb import get_sync_gridfs_bucket, get_sync_mongo_client, get_sync_mongo_db
+from database.mysql import autocommit_engine
+from services import alerts_store, extraction_store, item_aggregates, kpi_rollups, status_events
 from services.excel_processor import excel_processor_service
 
 
-async def _download_gridfs_bytes(file_id: str) -> bytes:
-    bucket = get_gridfs_bucket()
-    stream = await bucket.open_download_stream(ObjectId(file_id))
-    return await stream.read()
+@worker_process_init.connect
+def _init_worker_process(**_kwargs) -> None:
+    # Open this child's Mongo pool once, up front, instead of inside the first task.
+    get_sync_mongo_client()
 
 
-async def _insert_extraction_doc(doc: dict[str, Any]) -> str:
-    mongo_db = get_mongo_db()
-    inserted = await mongo_db["excel_extractions"].insert_one(doc)
+def _download_gridfs_bytes(file_id: str) -> bytes:
+    bucket = get_sync_gridfs_bucket()
+    with bucket.open_download_stream(ObjectId(file_id)) as stream:
+        return stream.read()
+
+
+def _insert_extraction_doc(doc: dict[str, Any]) -> str:
+    inserted = get_sync_mongo_db()["excel_extractions"].insert_one(doc)
     return str(inserted.inserted_id)
 
 
+def _upsert_batch_extraction(batch_id: str, doc: dict[str, Any]) -> str:
+    # Keyed by batch and upload, so an acks_late redelivery rewrites the same document.
+    key = {"batch_id": batch_id, "excel_upload_id": doc["excel_upload_id"]}
+    stored = get_sync_mongo_db()["excel_extractions"].find_one_and_replace(
+        key, {**doc, **key}, projection={"_id": 1}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return str(stored["_id"])
+
+
+# What finalize_excel_batch reads back from the stored extraction doc.
+_FINALIZE_FIELDS = ("column_mappings", "anomalies", "warnings", "kpi_rows")
+
+
+def _invalidate_uploads(excel_upload_ids, branches=()) -> None:
+    """Cache hooks: uploads changed state; with ``branches``, their alerts and KPIs changed too."""
+    tags = ["uploads", *(response_cache.upload_tag(i) for i in excel_upload_ids)]
+    if branches:
+        tags += ["alerts", *(response_cache.branch_tag(b) for b in branches)]
+    response_cache.invalidate(*tags)
+
+
+def _finish_sheet_tables(extracted_data: dict[str, Any], writers) -> None:
+    """Close each sheet's Parquet file and put its pointer, schema and stats on the doc."""
+    for sheet in extracted_data["sheets"]:
+        writer = writers.get(sheet["sheet"])
+        if writer is None:
+            continue
+        sheet["parquet_file_id"] = writer.close()
+        sheet["schema"] = extraction_store.table_schema(writer.schema)
+        sheet["stats"] = writer.stats.to_dict()
+
+
+def _extract(
+    excel_upload_id: int,
+    gridfs_id: str,
+    branch: str,
+    file_type: str,
+    started: float,
+    timer: status_events.StageTimer | None = None,
+):
+    """Download and parse one workbook; returns the extraction document and its audit outcome.
+
+    Chunks go to Parquet and to the item/KPI rollups as they are parsed, so the
+    worker never holds more than one chunk of a sheet.
+    """
+    timer = timer or status_events.StageTimer(excel_upload_id)
+    with timer.stage("download"):
+        content = _download_gridfs_bytes(gridfs_id)
+    today = datetime.now(timezone.utc).date().isoformat()
+    writers: dict[str, extraction_store.ParquetSheetWriter] = {}
+    item_rows = item_aggregates.DailyRows(today)
+    kpi_rows = kpi_rollups.DailyContribution(today)
+
+    def on_chunk(sheet_name: str, table) -> None:
+        writer = writers.get(sheet_name)
+        if writer is None:
+            writer = writers[sheet_name] = extraction_store.ParquetSheetWriter(
+                f"{excel_upload_id}-{sheet_name}.parquet",
+                metadata={"excel_upload_id": excel_upload_id, "sheet": sheet_name},
+            )
+        writer.write(table)
+        item_rows.add(table)
+        kpi_rows.add(table)
+
+    try:
+        with timer.stage("parse"):
+            aggregates = item_aggregates.load_branch_aggregates(get_sync_mongo_db(), branch)
+            result = excel_processor_service.process_bytes(
+                content, branch=branch, file_type=file_type, aggregates=aggregates, on_chunk=on_chunk
+            )
+        with timer.stage("store"):
+            _finish_sheet_tables(result.extracted_data, writers)
+            # Keyed by upload, so a retry rewrites this file's contribution instead of adding it twice.
+            item_aggregates.record_extraction(get_sync_mongo_db(), excel_upload_id, branch, item_rows.rows())
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+
+    doc = {
+        "excel_upload_id": excel_upload_id,
+        "branch": branch,
+        "file_type": file_type,
+        "gridfs_file_id": ObjectId(gridfs_id),
+        "overall_confidence": result.audit.get("overall_score"),
+        "field_confidence": result.audit.get("field_confidence"),
+        "column_mappings": result.audit.get("column_mappings"),
+        "extracted_data": result.extracted_data,
+        "anomalies": result.audit.get("anomalies"),
+        "warnings": result.audit.get("warnings"),
+        "sheets": result.audit.get("sheets"),
+        "created_at": time.time(),
+    }
+    score = float(result.audit.get("overall_score") or 0)
+    outcome = {
+        "excel_upload_id": excel_upload_id,
+        "score": score,
+        "status": "completed" if score >= 6.5 else "review_needed",
+        "processing_time": int(time.time() - started),
+        "column_mappings": result.audit.get("column_mappings"),
+        "anomalies": result.audit.get("anomalies"),
+        "warnings": result.audit.get("warnings"),
+        # Applied to the KPI rollups once the upload is finalized.
+        "kpi_rows": kpi_rows.rows(result.audit.get("anomalies")),
+    }
+    return doc, outcome
+
+
 @celery_app.task(bind=True, max_retries=3)
-def process_excel(self, excel_upload_id: int, gridfs_id: str, branch: str, file_type: str):
+def process_excel(
+    self, excel_upload_id: int, gridfs_id: str, branch: str, file_type: str, file_size: int | None = None
+):
+    started = time.time()
+    timer = status_events.StageTimer(excel_upload_id)
+    with autocommit_engine.connect() as conn:
+        try:
+            upload_repository.mark_status(conn, [excel_upload_id], "processing")
+            _invalidate_uploads([excel_upload_id])
+            timer.status("processing")
+
+            doc, outcome = _extract(excel_upload_id, gridfs_id, branch, file_type, started, timer)
+            with timer.stage("audit_insert"):
+                audit_id = _insert_extraction_doc(doc)
+            with timer.stage("finalize"):
+                upload_repository.finalize_uploads(conn, [{**outcome, "audit_id": audit_id}])
+                alerts_store.publish_alerts(get_sync_mongo_db(), excel_upload_id, branch, file_type, outcome["anomalies"] or [])
+                kpi_rollups.record_upload(get_sync_mongo_db(), excel_upload_id, branch, file_type, outcome["kpi_rows"])
+                _invalidate_uploads([excel_upload_id], [branch])
+
+            timer.status(outcome["status"], audit_id=audit_id, score=outcome["score"])
+            return {"excel_upload_id": excel_upload_id, "audit_id": audit_id, "score": outcome["score"]}
+        except Exception as e:
+            upload_repository.mark_status(conn, [excel_upload_id], "failed")
+            _invalidate_uploads([excel_upload_id])
+            # Only the last attempt is terminal for listeners; earlier ones will be retried.
+            final = self.request.retries >= self.max_retries
+            timer.status("failed" if final else "retrying", error=str(e))
+            raise self.retry(exc=e, countdown=5)
+
+
+@celery_app.task
+def parse_excel_batch_item(
+    batch_id: str, excel_upload_id: int, gridfs_id: str, branch: str, file_type: str, file_size: int | None = None
+):
+    """Chord header task: parse one workbook and store its extraction doc.
+
+    Returns ``(excel_upload_id, extraction_id, outcome)``. The outcome only carries
+    plain scalars; anomalies, mappings and KPI rows stay in Mongo rather than travel
+    through the result backend. Errors are returned (extraction_id None) rather than
+    raised so one bad sheet does not cancel the chord.
+    """
     started = time.time()
-    db = SessionLocal()
+    timer = status_events.StageTimer(excel_upload_id)
+    timer.status("processing", batch_id=batch_id)
     try:
-        db.execute(
-            text("UPDATE excel_uploads SET processing_status='processing' WHERE id=:id"),
-            {"id": excel_upload_id},
-        )
-        db.commit()
-
-        content = asyncio.run(_download_gridfs_bytes(gridfs_id))
-        result = excel_processor_service.process_bytes(content, branch=branch, file_type=file_type)
-
-        mongo_db = get_mongo_db()
-        doc = {
-            "excel_upload_id": excel_upload_id,
-            "gridfs_file_id": ObjectId(gridfs_id),
-            "overall_confidence": result.audit.get("overall_score"),
-            "field_confidence": result.audit.get("field_confidence"),
-            "column_mappings": result.audit.get("column_mappings"),
-            "extracted_data": result.extracted_data,
-            "anomalies": result.audit.get("anomalies"),
-            "warnings": result.audit.get("warnings"),
-            "created_at": time.time(),
+        doc, outcome = _extract(excel_upload_id, gridfs_id, branch, file_type, started, timer)
+        doc["kpi_rows"] = outcome["kpi_rows"]
+        with timer.stage("audit_insert"):
+            extraction_id = _upsert_batch_extraction(batch_id, doc)
+        summary = {
+            "score": outcome["score"],
+            "status": outcome["status"],
+            "processing_time": outcome["processing_time"],
+            "branch": branch,
+            "file_type": file_type,
+            "timings_ms": timer.timings,
         }
-        audit_id = asyncio.run(_insert_extraction_doc(doc))
-
-        db.execute(
-            text(
-                """
-                INSERT INTO extraction_audit_log (excel_upload_id, audit_score, column_mappings, anomalies_detected, warnings)
-                VALUES (:excel_upload_id, :audit_score, :column_mappings, :anomalies_detected, :warnings)
-                """
-            ),
-            {
-                "excel_upload_id": excel_upload_id,
-                "audit_score": float(result.audit.get("overall_score") or 0),
-                "column_mappings": __import__("json").dumps(result.audit.get("column_mappings") or []),
-                "anomalies_detected": __import__("json").dumps(result.audit.get("anomalies") or []),
-                "warnings": __import__("json").dumps(result.audit.get("warnings") or []),
-            },
+        return excel_upload_id, extraction_id, summary
+    except Exception as e:
+        return excel_upload_id, None, {"error": str(e), "timings_ms": timer.timings}
+    finally:
+        # A set rather than a counter: acks_late redeliveries must not count an item twice.
+        get_sync_mongo_db()["ingestion_batches"].update_one(
+            {"_id": batch_id}, {"$addToSet": {"parsed_ids": excel_upload_id}}
         )
 
-        processing_time = int(time.time() - started)
-        status = "completed" if float(result.audit.get("overall_score") or 0) >= 6.5 else "review_needed"
-
-        db.execute(
-            text(
-                """
-                UPDATE excel_uploads
-                SET ai_audit_score=:score, ai_audit_id=:audit_id, processing_status=:status, processing_time=:processing_time
-                WHERE id=:id
-                """
-            ),
-            {
-                "score": float(result.audit.get("overall_score") or 0),
-                "audit_id": audit_id,
-                "status": status,
-                "processing_time": processing_time,
-                "id": excel_upload_id,
-            },
+
+@celery_app.task
+def finalize_excel_batch(results: list[list[Any]], batch_id: str):
+    """Chord callback: one read of the stored extractions, one batched write for MySQL."""
+    parsed = [(uid, eid, summary) for uid, eid, summary in results if eid is not None]
+    failed = [(uid, summary) for uid, eid, summary in results if eid is None]
+    failed_ids = [uid for uid, _ in failed]
+
+    docs = {}
+    if parsed:
+        cursor = get_sync_mongo_db()["excel_extractions"].find(
+            {"_id": {"$in": [ObjectId(eid) for _, eid, _ in parsed]}}, {f: 1 for f in _FINALIZE_FIELDS}
         )
-        db.commit()
+        docs = {str(d["_id"]): d for d in cursor}
+    outcomes: list[dict[str, Any]] = [
+        {
+            **{f: docs.get(eid, {}).get(f) for f in _FINALIZE_FIELDS},
+            "excel_upload_id": uid,
+            "audit_id": eid,
+            "score": summary["score"],
+            "status": summary["status"],
+            "processing_time": summary["processing_time"],
+        }
+        for uid, eid, summary in parsed
+    ]
 
-        return {"excel_upload_id": excel_upload_id, "audit_id": audit_id, "score": result.audit.get("overall_score")}
-    except Exception as e:
-        db.rollback()
-        db.execute(
-            text("UPDATE excel_uploads SET processing_status='failed' WHERE id=:id"),
-            {"id": excel_upload_id},
+    with autocommit_engine.connect() as conn:
+        upload_repository.finalize_uploads(conn, outcomes)
+        upload_repository.mark_status(conn, failed_ids, "failed")
+
+    buckets: set = set()
+    for (_, _, summary), o in zip(parsed, outcomes):
+        alerts_store.publish_alerts(
+            get_sync_mongo_db(), o["excel_upload_id"], summary["branch"], summary["file_type"], o["anomalies"] or []
         )
-        db.commit()
-        raise self.retry(exc=e, countdown=5)
-    finally:
-        db.close()
+        buckets |= kpi_rollups.record_upload(
+            get_sync_mongo_db(), o["excel_upload_id"], summary["branch"], summary["file_type"], o["kpi_rows"] or [],
+            refresh=False,
+        )
+    # Uploads in one batch usually share their days; re-sum each bucket once.
+    kpi_rollups.refresh_rollups(get_sync_mongo_db(), buckets)
+    _invalidate_uploads(
+        [o["excel_upload_id"] for o in outcomes] + failed_ids, {summary["branch"] for _, _, summary in parsed}
+    )
+    for (_, _, summary), o in zip(parsed, outcomes):
+        status_events.publish_status(
+            o["excel_upload_id"], o["status"], audit_id=o["audit_id"], score=o["score"], timings_ms=summary["timings_ms"]
+        )
+    errors = [{"excel_upload_id": uid, **summary} for uid, summary in failed]
+    for e in errors:
+        status_events.publish_status(e["excel_upload_id"], "failed", error=e["error"], timings_ms=e["timings_ms"])
+
+    get_sync_mongo_db()["ingestion_batches"].update_one(
+        {"_id": batch_id},
+        {
+            "$set": {
+                "status": "completed" if not failed_ids else "completed_with_errors",
+                "completed": len(outcomes),
+                "failed": len(failed_ids),
+                "errors": errors,
+                "finished_at": time.time(),
+            }
+        },
+    )
+    return {"batch_id": batch_id, "completed": len(outcomes), "failed": len(failed_ids)}
+
+
+class BatchNotQueued(Exception):
+    """The batch chord could not be sent to the broker; nothing was queued."""
+
+
+def start_excel_batch(batch_id: str, items: list[dict[str, Any]]):
+    """Fan the items out as a group and gather them in a chord; items carry process_excel's arguments.
+
+    Raises BatchNotQueued when the broker refuses the chord, in which case the uploads
+    are left pending.
+    """
+    ids = [i["excel_upload_id"] for i in items]
+    header = group(parse_excel_batch_item.s(batch_id=batch_id, **item) for item in items)
+    try:
+        result = chord(header)(finalize_excel_batch.s(batch_id))
+    except Exception as e:
+        raise BatchNotQueued(str(e)) from e
+    # Only rows still pending: a fast chord may already have finalized some of them.
+    with autocommit_engine.connect() as conn:
+        upload_repository.mark_status(conn, ids, "processing", from_status="pending")
+    _invalidate_uploads(ids)
+    return result
@@ -0,0 +1,110 @@
+"""Rebuild the KPI rollups from extractions that were processed before they existed.
+
+Run from backend/:
+    python -m tasks.kpi_backfill [--since 2026-01-01]
+Safe to re-run: every upload's contribution replaces the previous one.
+
+Extractions from before Parquet storage only kept ``extracted_data.records``: the
+first 50 rows of the first sheet, under the workbook's own headers. Those are summed
+through the doc's column mappings and counted in the final report, since their
+rollups cover only those rows.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy import text
+
+from database.mongodb import get_sync_mongo_db
+from database.mysql import autocommit_engine
+from services import extraction_store, kpi_rollups
+
+_KPI_COLUMNS = [*kpi_rollups.METRIC_COLUMNS.values(), *kpi_rollups.DATE_COLUMNS]
+
+
+def _upload_scopes() -> dict[int, tuple[str, str]]:
+    # Extraction docs only carry branch/file_type since the AI context change; older ones need MySQL.
+    with autocommit_engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, branch, file_type FROM excel_uploads WHERE ai_audit_id IS NOT NULL"))
+        return {int(r.id): (r.branch, r.file_type) for r in rows}
+
+
+def _records_table(records: list[dict], column_mappings: list[dict] | None) -> pa.Table:
+    """Legacy ``extracted_data.records`` (raw headers, blanks stored as "") under schema column names."""
+    renames = {m["original"]: m["mapped_to"] for m in column_mappings or [] if m.get("original")}
+    df = pd.DataFrame.from_records(records).rename(columns=renames)
+    df = df[[c for c in dict.fromkeys(df.columns) if c in _KPI_COLUMNS]].replace("", None)
+    return extraction_store.frame_to_table(df)
+
+
+def backfill(since: datetime | None = None, progress_every: int = 500) -> tuple[int, int]:
+    """Returns (uploads recorded, rollup buckets written).
+
+    Uploads with neither Parquet sheets nor legacy records are skipped and reported.
+    """
+    db = get_sync_mongo_db()
+    scopes = _upload_scopes()
+    query = {"created_at": {"$gte": since.timestamp()}} if since else {}
+    # Parquet pointers sit on extracted_data.sheets; the top-level "sheets" is the audit breakdown.
+    projection = {
+        "excel_upload_id": 1,
+        "branch": 1,
+        "file_type": 1,
+        "extracted_data.sheets": 1,
+        "extracted_data.records": 1,
+        "column_mappings": 1,
+        "anomalies": 1,
+        "created_at": 1,
+    }
+
+    buckets: set = set()
+    uploads = legacy = skipped = 0
+    # Oldest first: when an upload was re-processed its latest extraction wins.
+    for doc in db["excel_extractions"].find(query, projection).sort("created_at", 1):
+        upload_id = doc["excel_upload_id"]
+        branch, file_type = doc.get("branch"), doc.get("file_type")
+        if not (branch and file_type):
+            if upload_id not in scopes:
+                continue
+            branch, file_type = scopes[upload_id]
+        extracted = doc.get("extracted_data") or {}
+        tables = [
+            extraction_store.read_columns(sheet["parquet_file_id"], _KPI_COLUMNS)
+            for sheet in extracted.get("sheets") or []
+            if sheet.get("parquet_file_id")
+        ]
+        if not tables:
+            if not extracted.get("records"):
+                skipped += 1
+                continue
+            tables = [_records_table(extracted["records"], doc.get("column_mappings"))]
+            legacy += 1
+        day = datetime.fromtimestamp(doc.get("created_at") or time.time(), timezone.utc).date().isoformat()
+        rows = kpi_rollups.contribution_rows(tables, day, doc.get("anomalies"))
+        buckets |= kpi_rollups.record_upload(db, upload_id, branch, file_type, rows, refresh=False)
+        uploads += 1
+        if progress_every and uploads % progress_every == 0:
+            print(f"{uploads} uploads read")
+    if legacy:
+        print(f"{legacy} uploads only had legacy extracted_data.records; their rollups cover at most 50 rows each")
+    if skipped:
+        print(f"skipped {skipped} uploads with no stored rows")
+    return uploads, kpi_rollups.refresh_rollups(db, buckets)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only extractions created on/after this date")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    since = args.since.replace(tzinfo=args.since.tzinfo or timezone.utc) if args.since else None
+    uploads, written = backfill(since)
+    print(f"backfilled {uploads} uploads into {written} rollup buckets in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
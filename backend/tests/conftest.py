@@ -0,0 +1,95 @@
+"""Fixtures for the worker pipeline against a real, throwaway MongoDB database.
+
+Point TEST_MONGODB_URL at a server (default mongodb://localhost:27017, as in
+docker-compose); without one the tests that need it are skipped. Run from backend/:
+    python -m pytest -q
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import tempfile
+import time
+import uuid
+
+import pandas as pd
+import pytest
+
+TEST_MONGODB_URL = os.getenv("TEST_MONGODB_URL", "mongodb://localhost:27017")
+TEST_DB = f"hugamara_test_{uuid.uuid4().hex[:8]}"
+
+# database.mongodb / database.mysql read these at import time.
+os.environ["MONGODB_URL"] = TEST_MONGODB_URL
+os.environ["MONGODB_DB"] = TEST_DB
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+# Status pushes and cache invalidations are best effort; an unreachable Redis fails fast.
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+# Celery talks to an in-memory broker; tests that need a worker start one in-process.
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+
+
+@pytest.fixture(scope="session")
+def mongo_db():
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    try:
+        MongoClient(TEST_MONGODB_URL, serverSelectionTimeoutMS=1000).admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"MongoDB not reachable at {TEST_MONGODB_URL}")
+
+    from database.mongodb import get_sync_mongo_client, get_sync_mongo_db
+
+    yield get_sync_mongo_db()
+    get_sync_mongo_client().drop_database(TEST_DB)
+
+
+@pytest.fixture
+def db(mongo_db):
+    for name in mongo_db.list_collection_names():
+        mongo_db.drop_collection(name)
+    return mongo_db
+
+
+def workbook_bytes(sheets: dict[str, pd.DataFrame]) -> bytes:
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def extract(db):
+    """Store a workbook in GridFS, run it through the worker's _extract and insert the
+    extraction doc, as process_excel does. Returns ``(doc, outcome)``."""
+    from database.mongodb import get_sync_gridfs_bucket
+    from tasks import excel_tasks
+
+    def run(excel_upload_id: int, branch: str, file_type: str, sheets: dict[str, pd.DataFrame]):
+        gridfs_id = get_sync_gridfs_bucket().upload_from_stream(f"{excel_upload_id}.xlsx", workbook_bytes(sheets))
+        doc, outcome = excel_tasks._extract(excel_upload_id, str(gridfs_id), branch, file_type, time.time())
+        excel_tasks._insert_extraction_doc(doc)
+        return doc, outcome
+
+    return run
+
+
+@pytest.fixture
+def motor(db):
+    """Run ``fn(motor_db)`` on a fresh event loop, for the API-side (Motor) helpers."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    def run(fn):
+        async def main():
+            client = AsyncIOMotorClient(TEST_MONGODB_URL)
+            try:
+                return await fn(client[TEST_DB])
+            finally:
+                client.close()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+
+SALES = pd.DataFrame(
+    {
+        "Date": pd.to_datetime(["2026-01-05", "2026-01-06", "2026-01-07"]),
+        "Revenue": [1000.0, 1500.0, 2000.0],
+        "Covers": [40, 55, 70],
+        "Food Cost": [300.0, 450.0, 600.0],
+        "Labor Cost": [200.0, 250.0, 300.0],
+    }
+)
+PROCUREMENT = pd.DataFrame(
+    {
+        "Supplier": ["Atlantic Seafood", "Gourmet Meats"],
+        "Item Name": ["Salmon Fillet", "Wagyu Ribeye"],
+        "Qty": [10, 4],
+        "Unit Cost": [22.0, 85.0],
+        "Line Total": [220.0, 340.0],
+    }
+)
+
+
+def test_branch_kpis_come_from_stored_sheet_stats(extract, motor):
+    from services import ai_context
+
+    extract(1, "patiobella", "sales", {"Daily": SALES})
+    extract(2, "patiobella", "procurement", {"PO": PROCUREMENT})
+
+    kpis = motor(lambda db: ai_context.compute_branch_kpis(db, "patiobella", days=30))
+
+    assert kpis.uploads == 2
+    assert kpis.revenue == pytest.approx(4500.0)
+    assert kpis.food_cost == pytest.approx(1350.0)
+    assert kpis.labor_cost == pytest.approx(750.0)
+    assert kpis.covers == pytest.approx(165.0)
+    assert kpis.procurement_spend == pytest.approx(560.0)
+    assert kpis.food_cost_pct == pytest.approx(30.0)
+    assert "revenue 4,500" in ai_context.render_context([kpis])
+
+
+def test_branch_kpis_are_scoped_to_the_branch(extract, motor):
+    from services import ai_context
+
+    extract(1, "patiobella", "sales", {"Daily": SALES})
+
+    kpis = motor(lambda db: ai_context.compute_branch_kpis(db, "eateroo", days=30))
+
+    assert kpis.uploads == 0
+    assert kpis.revenue == 0.0
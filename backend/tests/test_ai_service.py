@@ -0,0 +1,133 @@
+"""AIService against a local stub of the OpenAI chat completions API."""
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from openai import AsyncOpenAI
+
+from services import ai_service as ai
+
+
+class Stub:
+    """/v1/chat/completions that answers from ``script`` (status codes, then 200 forever)."""
+
+    def __init__(self):
+        self.script: list[int] = []
+        self.latency = 0.0
+        self.calls: list[float] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self.completions)
+
+    def reset(self, script=(), latency=0.0):
+        self.script, self.latency = list(script), latency
+        self.calls, self.in_flight, self.max_in_flight = [], 0, 0
+
+    async def completions(self, body: dict):
+        self.calls.append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        status = self.script.pop(0) if self.script else 200
+        if status != 200:
+            return JSONResponse({"error": {"message": f"stub {status}"}}, status_code=status)
+        return {
+            "id": f"stub-{len(self.calls)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "Stub insight."}}],
+        }
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    stub = Stub()
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(stub.app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield stub, f"http://127.0.0.1:{port}/v1"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def stub(stub_server, monkeypatch):
+    """A fresh AIService on a client pointed at the stub; returns ``(stub, service)``."""
+    stub, base_url = stub_server
+    stub.reset()
+    monkeypatch.setattr(ai, "client", AsyncOpenAI(api_key="stub", base_url=base_url, max_retries=0))
+    monkeypatch.setattr(ai, "AI_RETRY_BASE_SECONDS", 0.05)
+    monkeypatch.setattr(ai, "AI_MAX_RETRIES", 3)
+    return stub, ai.AIService()
+
+
+def test_repeated_payload_is_served_from_the_cache(stub):
+    stub, service = stub
+
+    async def main():
+        first = await service.generate_insight({"revenue": 100, "growth": 12.5})
+        # Same data in another key order: same cache entry.
+        second = await service.generate_insight({"growth": 12.5, "revenue": 100})
+        return first, second
+
+    assert asyncio.run(main()) == ("Stub insight.", "Stub insight.")
+    assert len(stub.calls) == 1
+    assert service.metrics()["cache_hits"] == 1
+
+
+def test_rate_limits_and_server_errors_are_retried_with_backoff(stub):
+    stub, service = stub
+    stub.reset(script=[429, 503, 500])
+
+    assert asyncio.run(service.generate_insight({"revenue": 1})) == "Stub insight."
+    assert len(stub.calls) == 4
+    gaps = [b - a for a, b in zip(stub.calls, stub.calls[1:])]
+    # base * 2**attempt * (1 + jitter): at least 0.05, 0.1 and 0.2 s.
+    assert all(gap >= 0.05 * 2**i for i, gap in enumerate(gaps))
+
+
+def test_retries_stop_after_the_limit(stub):
+    stub, service = stub
+    stub.reset(script=[503] * 10)
+
+    answer = asyncio.run(service.generate_insight({"revenue": 2}))
+
+    assert answer.startswith("Error generating insight")
+    assert len(stub.calls) == ai.AI_MAX_RETRIES + 1
+    assert service.metrics()["errors"] == 1
+
+
+def test_client_errors_are_not_retried(stub):
+    stub, service = stub
+    stub.reset(script=[400])
+
+    assert asyncio.run(service.generate_insight({"revenue": 3})).startswith("Error generating insight")
+    assert len(stub.calls) == 1
+
+
+def test_semaphore_bounds_concurrent_upstream_calls(stub, monkeypatch):
+    stub, service = stub
+    stub.reset(latency=0.1)
+    monkeypatch.setattr(ai, "AI_MAX_CONCURRENCY", 2)
+
+    async def main():
+        return await asyncio.gather(*(service.generate_insight({"revenue": i}) for i in range(8)))
+
+    assert asyncio.run(main()) == ["Stub insight."] * 8
+    assert len(stub.calls) == 8
+    assert stub.max_in_flight == 2
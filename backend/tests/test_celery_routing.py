@@ -0,0 +1,85 @@
+import pytest
+from celery.contrib.testing.worker import start_worker
+
+from celery_app import DEFAULT_QUEUE, HEAVY_MIN_BYTES, HEAVY_QUEUE, LIGHT_QUEUE, celery_app
+from tasks.excel_tasks import parse_excel_batch_item, process_excel
+
+QUEUES = (DEFAULT_QUEUE, LIGHT_QUEUE, HEAVY_QUEUE)
+
+
+@celery_app.task(name="tests.noop")
+def noop(n):
+    return n
+
+
+@pytest.fixture
+def broker():
+    assert celery_app.conf.broker_url.startswith("memory://")
+    assert not celery_app.conf.task_always_eager
+
+    def purge():
+        with celery_app.connection_for_write() as conn:
+            for queue in QUEUES:
+                conn.default_channel.queue_declare(queue)
+                conn.default_channel.queue_purge(queue)
+
+    purge()
+    yield
+    purge()
+
+
+def _sent_task_names(queue: str) -> list[str]:
+    names = []
+    with celery_app.connection_for_read() as conn:
+        q = conn.SimpleQueue(queue)
+        try:
+            while True:
+                message = q.get(block=False)
+                names.append(message.headers["task"])
+                message.ack()
+        except q.Empty:
+            pass
+        finally:
+            q.close()
+    return names
+
+
+def test_ingestion_tasks_land_on_light_and_heavy_queues(broker):
+    process_excel.delay(1, "f" * 24, "patiobella", "procurement", file_size=10_000)
+    process_excel.delay(2, "f" * 24, "patiobella", "procurement", file_size=HEAVY_MIN_BYTES)
+    process_excel.delay(3, "f" * 24, "eateroo", "sales", file_size=10_000)
+    parse_excel_batch_item.apply_async(
+        kwargs={"batch_id": "b", "excel_upload_id": 4, "gridfs_id": "f" * 24, "branch": "eateroo", "file_type": "petty_cash"}
+    )
+    parse_excel_batch_item.apply_async(
+        kwargs={"batch_id": "b", "excel_upload_id": 5, "gridfs_id": "f" * 24, "branch": "eateroo", "file_type": "inventory"}
+    )
+    noop.delay(0)
+
+    assert _sent_task_names(LIGHT_QUEUE) == [process_excel.name, parse_excel_batch_item.name]
+    assert _sent_task_names(HEAVY_QUEUE) == [process_excel.name, process_excel.name, parse_excel_batch_item.name]
+    assert _sent_task_names(DEFAULT_QUEUE) == [noop.name]
+
+
+def test_worker_profile_applies_prefetch_and_late_acks():
+    assert celery_app.conf.worker_prefetch_multiplier == 1
+    assert celery_app.conf.task_acks_late is True
+    assert celery_app.conf.task_reject_on_worker_lost is True
+    assert process_excel.acks_late is True
+    assert parse_excel_batch_item.acks_late is True
+
+
+def test_worker_drains_both_ingestion_queues(broker):
+    # The memory transport polls; keep its idle interval short for the test.
+    options = celery_app.conf.broker_transport_options
+    celery_app.conf.broker_transport_options = {**options, "polling_interval": 0.001}
+    try:
+        with start_worker(
+            celery_app, pool="solo", concurrency=1, perform_ping_check=False, queues=[LIGHT_QUEUE, HEAVY_QUEUE]
+        ) as worker:
+            # One slot times the multiplier of 1: the worker reserves a single message at a time.
+            assert worker.consumer.qos.value == 1
+            results = [noop.apply_async((i,), queue=HEAVY_QUEUE if i % 2 else LIGHT_QUEUE) for i in range(200)]
+            assert [r.get(timeout=30, interval=0.001) for r in results] == list(range(200))
+    finally:
+        celery_app.conf.broker_transport_options = options
@@ -0,0 +1,32 @@
+from services.column_matcher import ColumnMatcher, is_percentage_header
+from services.excel_processor import CURRENCY_FIELDS, FIELD_ALIASES
+
+SALES_FIELDS = ["date", "revenue", "covers", "avg_check", "food_cost", "labor_cost"]
+
+
+def _mapped(matcher, columns):
+    return {m["mapped_to"]: m["original"] for m in matcher.match(columns, SALES_FIELDS) if m["original"] is not None}
+
+
+def test_percentage_headers_never_map_to_currency_fields():
+    matcher = ColumnMatcher(FIELD_ALIASES, currency_fields=CURRENCY_FIELDS)
+
+    mapped = _mapped(matcher, ["Business Date", "Net Sales (UGX)", "Food Cost %", "Labour Pct", "Wages"])
+
+    assert "food_cost" not in mapped
+    assert mapped["labor_cost"] == "Wages"
+    assert mapped["revenue"] == "Net Sales (UGX)"
+
+
+def test_percentage_headers_still_map_without_currency_fields():
+    mapped = _mapped(ColumnMatcher(FIELD_ALIASES), ["Food Cost %"])
+
+    assert mapped == {"food_cost": "Food Cost %"}
+
+
+def test_is_percentage_header():
+    assert is_percentage_header("Food Cost %")
+    assert is_percentage_header("labour_pct")
+    assert is_percentage_header("GP Percentage")
+    assert not is_percentage_header("Food Cost")
+    assert not is_percentage_header("Receipt No")
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from kombu.utils.json import dumps, loads
+
+from tests.conftest import workbook_bytes
+
+PROCUREMENT = pd.DataFrame(
+    {
+        "Item": ["Tomatoes", "Onions", "Tomatoes"],
+        "Vendor": ["Fresh Farms", "Fresh Farms", "Fresh Farms"],
+        "Quantity": [10, 5, 10],
+        "Unit Price": [2.5, 1.2, 2.5],
+        "Total": [25.0, 6.0, 25.0],
+    }
+)
+
+
+def _store_workbook(sheets):
+    from database.mongodb import get_sync_gridfs_bucket
+
+    return str(get_sync_gridfs_bucket().upload_from_stream("batch.xlsx", workbook_bytes(sheets)))
+
+
+def test_batch_item_stores_its_extraction_and_returns_only_scalars(db):
+    from bson import ObjectId
+    from tasks import excel_tasks
+
+    gridfs_id = _store_workbook({"Purchases": PROCUREMENT})
+    result = excel_tasks.parse_excel_batch_item.run("b1", 11, gridfs_id, "eateroo", "procurement")
+
+    # What finalize_excel_batch receives has been through the result backend's JSON.
+    upload_id, extraction_id, summary = loads(dumps(result))
+    assert upload_id == 11
+    assert set(summary) == {"score", "status", "processing_time", "branch", "file_type", "timings_ms"}
+    assert not any(isinstance(v, np.generic) for v in summary.values())
+
+    doc = db["excel_extractions"].find_one({"_id": ObjectId(extraction_id)})
+    assert doc["batch_id"] == "b1"
+    assert doc["excel_upload_id"] == 11
+    assert doc["anomalies"]
+    assert "kpi_rows" in doc
+
+
+def test_redelivered_batch_item_rewrites_the_same_extraction(db):
+    from tasks import excel_tasks
+
+    gridfs_id = _store_workbook({"Purchases": PROCUREMENT})
+    first = excel_tasks.parse_excel_batch_item.run("b1", 11, gridfs_id, "eateroo", "procurement")
+    second = excel_tasks.parse_excel_batch_item.run("b1", 11, gridfs_id, "eateroo", "procurement")
+
+    assert first[1] == second[1]
+    assert db["excel_extractions"].count_documents({"excel_upload_id": 11}) == 1
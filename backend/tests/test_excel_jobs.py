@@ -0,0 +1,68 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+
+import pytest
+
+from services import excel_jobs
+
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="the stand-in parser is patched in before the pool forks"
+)
+
+
+def _fake_parse(path, filename, branch):
+    # A "crash" workbook takes its pool process down, as a segfault or an OOM kill would.
+    if filename == "crash.xlsx":
+        os._exit(1)
+    return {"filename": filename, "branch": branch}
+
+
+def _run_jobs(filenames):
+    jobs = excel_jobs.ExcelParseJobs(workers=1, max_queue=10, ttl=60)
+
+    async def main():
+        results = []
+        for name in filenames:
+            path = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False).name
+            job = jobs.submit(path, name, "eateroo")
+            await asyncio.gather(*jobs._tasks)
+            results.append(await jobs.get(job["job_id"]))
+        return results
+
+    try:
+        return asyncio.run(main())
+    finally:
+        jobs.shutdown()
+
+
+def test_pool_is_replaced_after_a_child_crash(monkeypatch):
+    monkeypatch.setattr(excel_jobs, "_parse_job", _fake_parse)
+
+    crashed, after = _run_jobs(["crash.xlsx", "ok.xlsx"])
+
+    # The retry on a fresh pool crashes too, so that job fails; the next one still runs.
+    assert crashed["status"] == "failed"
+    assert after["status"] == "completed"
+    assert after["result"] == {"filename": "ok.xlsx", "branch": "eateroo"}
+
+
+def test_job_retries_once_on_a_broken_pool(monkeypatch):
+    monkeypatch.setattr(excel_jobs, "_parse_job", _fake_parse)
+    jobs = excel_jobs.ExcelParseJobs(workers=1, max_queue=10, ttl=60)
+
+    async def main():
+        # Break the pool first; the job itself is fine and must succeed on the retry.
+        with pytest.raises(excel_jobs.BrokenProcessPool):
+            await asyncio.get_running_loop().run_in_executor(jobs._pool(), _fake_parse, "", "crash.xlsx", "")
+        path = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False).name
+        job = jobs.submit(path, "ok.xlsx", "eateroo")
+        await asyncio.gather(*jobs._tasks)
+        return await jobs.get(job["job_id"])
+
+    try:
+        job = asyncio.run(main())
+    finally:
+        jobs.shutdown()
+    assert job["status"] == "completed"
@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+SALES = pd.DataFrame(
+    {
+        "Date": pd.to_datetime(["2026-01-05", "2026-01-06", "2026-01-06"]),
+        "Revenue": [1000.0, 1500.0, 2000.0],
+        "Covers": [40, 55, 70],
+    }
+)
+
+
+@pytest.fixture
+def excel_uploads():
+    from database.mysql import autocommit_engine
+
+    with autocommit_engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS excel_uploads"))
+        conn.execute(
+            text("CREATE TABLE excel_uploads (id INTEGER PRIMARY KEY, branch TEXT, file_type TEXT, ai_audit_id TEXT)")
+        )
+
+
+def test_backfill_rebuilds_rollups_from_stored_extractions(extract, db, excel_uploads):
+    from services import kpi_rollups
+    from tasks import kpi_backfill
+
+    extract(7, "eateroo", "sales", {"Daily": SALES})
+    assert db[kpi_rollups.ROLLUP_COLLECTION].count_documents({}) == 0
+
+    uploads, written = kpi_backfill.backfill()
+
+    assert uploads == 1
+    assert written > 0
+    days = {d["start"]: d for d in db[kpi_rollups.ROLLUP_COLLECTION].find({"period": "day", "branch": "eateroo"})}
+    assert days["2026-01-05"]["revenue"] == pytest.approx(1000.0)
+    assert days["2026-01-06"]["revenue"] == pytest.approx(3500.0)
+    assert days["2026-01-06"]["covers"] == pytest.approx(125.0)
+    week = db[kpi_rollups.ROLLUP_COLLECTION].find_one({"period": "week", "start": "2026-01-05", "branch": "eateroo"})
+    assert week["revenue"] == pytest.approx(4500.0)
+    assert sum(d["uploads"] for d in days.values()) == 1
+
+
+def test_backfill_is_idempotent(extract, db, excel_uploads):
+    from services import kpi_rollups
+    from tasks import kpi_backfill
+
+    extract(7, "eateroo", "sales", {"Daily": SALES})
+    kpi_backfill.backfill()
+    kpi_backfill.backfill()
+
+    week = db[kpi_rollups.ROLLUP_COLLECTION].find_one({"period": "week", "start": "2026-01-05", "branch": "eateroo"})
+    assert week["revenue"] == pytest.approx(4500.0)
+
+
+def test_backfill_reads_legacy_records_through_column_mappings(db, excel_uploads, capsys):
+    from services import kpi_rollups
+    from tasks import kpi_backfill
+
+    # Shape written before Parquet storage: raw headers, blanks as "", no parquet_file_id.
+    db["excel_extractions"].insert_one(
+        {
+            "excel_upload_id": 8,
+            "branch": "eateroo",
+            "file_type": "sales",
+            "column_mappings": [
+                {"original": "Date", "mapped_to": "date", "confidence": 0.95},
+                {"original": "Revenue", "mapped_to": "revenue", "confidence": 0.95},
+                {"original": None, "mapped_to": "covers", "confidence": 0.0},
+            ],
+            "extracted_data": {
+                "records": [
+                    {"Date": "2026-01-05", "Revenue": 1000.0, "Notes": "x"},
+                    {"Date": "2026-01-05", "Revenue": "", "Notes": ""},
+                    {"Date": "2026-01-06", "Revenue": 250.0, "Notes": ""},
+                ],
+                "file_type": "sales",
+            },
+            "anomalies": [],
+            "created_at": 1767600000.0,
+        }
+    )
+    db["excel_extractions"].insert_one({"excel_upload_id": 9, "branch": "eateroo", "file_type": "sales", "extracted_data": {}})
+
+    uploads, _ = kpi_backfill.backfill()
+
+    assert uploads == 1
+    days = {d["start"]: d for d in db[kpi_rollups.ROLLUP_COLLECTION].find({"period": "day", "branch": "eateroo"})}
+    assert days["2026-01-05"]["revenue"] == pytest.approx(1000.0)
+    assert days["2026-01-06"]["revenue"] == pytest.approx(250.0)
+    out = capsys.readouterr().out
+    assert "1 uploads only had legacy extracted_data.records" in out
+    assert "skipped 1 uploads" in out
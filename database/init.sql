@@ -1,3 +1,3 @@
 CREATE DATABASE IF NOT EXISTS hugamara;
 USE hugamara;
--- Initial tables will be added later
+-- Tables are created by the backend migrations: cd backend && alembic upgrade head
@@ -1,2 +1,15 @@
 db = db.getSiblingDB('hugamara_logs');
 db.createCollection('excel_processing_logs');
+db.getCollection('excel_files.files').createIndex({ 'metadata.file_hash': 1 });
+db.getCollection('item_daily').createIndex({ 'key': 1, 'day': 1 });
+db.getCollection('item_aggregates').createIndex({ 'branch': 1, 'item': 1 });
+db.getCollection('alerts').createIndex({ 'branch': 1, 'severity': 1, 'timestamp': -1, '_id': -1 });
+db.getCollection('alerts').createIndex({ 'branch': 1, 'timestamp': -1, '_id': -1 });
+db.getCollection('alerts').createIndex({ 'timestamp': -1, '_id': -1 });
+db.getCollection('alerts').createIndex({ 'excel_upload_id': 1 });
+db.getCollection('excel_extractions').createIndex({ 'branch': 1, 'created_at': -1 });
+db.getCollection('kpi_daily').createIndex({ 'excel_upload_id': 1 });
+db.getCollection('kpi_daily').createIndex({ 'branch': 1, 'file_type': 1, 'day': 1 });
+db.getCollection('kpi_daily').createIndex({ 'branch': 1, 'file_type': 1, 'week': 1 });
+db.getCollection('kpi_rollups').createIndex({ 'period': 1, 'branch': 1, 'start': 1 });
+db.getCollection('kpi_rollups').createIndex({ 'period': 1, 'start': 1 });
@@ -1,13 +1,13 @@
 'use client';
 
-import React, { useEffect, useMemo, useState } from 'react';
+import React, { useEffect, useMemo, useRef, useState } from 'react';
 import DashboardLayout from '@/components/DashboardLayout';
 import UploadZone from '@/components/ingestion/UploadZone';
 import LinkImport from '@/components/ingestion/LinkImport';
 import UploadQueue, { QueueItem } from '@/components/ingestion/UploadQueue';
 import UploadHistoryTable, { UploadHistoryRow } from '@/components/ingestion/UploadHistoryTable';
 import ExtractionAuditModal from '@/components/ingestion/ExtractionAuditModal';
-import { importFromLink, listUploads, uploadExcelFile } from '@/lib/api/ingestion';
+import { importFromLink, listUploads, subscribeUploadEvents, uploadExcelFile } from '@/lib/api/ingestion';
 
 type Branch = 'patiobella' | 'eateroo' | '';
 type DocType = 'procurement' | 'inventory' | 'sales' | 'finance' | 'petty_cash' | '';
@@ -45,16 +45,25 @@ export default function IngestionPage() {
     })();
   }, []);
 
+  const historyRef = useRef<any[]>([]);
+  historyRef.current = history;
+
   useEffect(() => {
-    const t = setInterval(async () => {
-      try {
-        const latest = await listUploads({ limit: 50 });
-        setHistory(latest);
-      } catch {
-        // ignore
+    // Status changes are pushed; the list is only re-fetched when an upload we do not show yet appears.
+    return subscribeUploadEvents((e) => {
+      if (e.type !== 'status') return;
+      if (!historyRef.current.some((r) => r.id === e.excel_upload_id)) {
+        listUploads({ limit: 50 }).then(setHistory).catch(() => undefined);
+        return;
       }
-    }, 5000);
-    return () => clearInterval(t);
+      setHistory((prev) =>
+        prev.map((r) =>
+          r.id === e.excel_upload_id
+            ? { ...r, processing_status: e.processing_status, ai_audit_score: e.score ?? r.ai_audit_score }
+            : r
+        )
+      );
+    });
   }, []);
 
   const historyRows: UploadHistoryRow[] = useMemo(() => {
@@ -44,13 +44,21 @@ export default function AIInsightsPanel({ onClose }: AIInsightsPanelProps) {
     const chatEndRef = useRef<HTMLDivElement>(null);
 
     useEffect(() => {
+        // After the first page, only ask for alerts newer than the newest one we hold.
+        let newest: string | null = null;
         const fetchAlerts = async () => {
             try {
                 const apiUrl = process.env.NEXT_PUBLIC_API_URL || '';
-                const url = apiUrl ? `${apiUrl}/api/ai/alerts` : `/api/ai/alerts`;
+                const base = apiUrl ? `${apiUrl}/api/ai/alerts` : `/api/ai/alerts`;
+                const url = newest ? `${base}?since=${encodeURIComponent(newest)}` : base;
                 const response = await fetch(url);
-                const data = await response.json();
-                setAlerts(data);
+                const data: Alert[] = await response.json();
+                if (data.length > 0) newest = data[0].timestamp;
+                setAlerts((prev) => {
+                    if (prev.length === 0) return data;
+                    const seen = new Set(data.map((a) => a.id));
+                    return [...data, ...prev.filter((a) => !seen.has(a.id))];
+                });
             } catch (err) {
                 console.error("Failed to fetch alerts:", err);
             } finally {
@@ -75,14 +83,35 @@ export default function AIInsightsPanel({ onClose }: AIInsightsPanelProps) {
 
         try {
             const apiUrl = process.env.NEXT_PUBLIC_API_URL || '';
-            const url = apiUrl ? `${apiUrl}/api/ai/query` : `/api/ai/query`;
+            const url = apiUrl ? `${apiUrl}/api/ai/query/stream` : `/api/ai/query/stream`;
             const response = await fetch(url, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ query: userMsg }),
             });
-            const data = await response.json();
-            setChatHistory(prev => [...prev, { role: 'ai', content: data.response }]);
+            if (!response.ok || !response.body) throw new Error(`HTTP ${response.status}`);
+
+            // Append tokens to one AI message as the server streams them (SSE frames over fetch).
+            setChatHistory(prev => [...prev, { role: 'ai', content: '' }]);
+            const appendToAnswer = (text: string) =>
+                setChatHistory(prev => [...prev.slice(0, -1), { ...prev[prev.length - 1], content: prev[prev.length - 1].content + text }]);
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const frames = buffer.split('\n\n');
+                buffer = frames.pop() ?? '';
+                for (const frame of frames) {
+                    const event = frame.match(/^event: (.*)$/m)?.[1];
+                    const data = frame.match(/^data: (.*)$/m)?.[1];
+                    if (!data) continue;
+                    if (event === 'token') appendToAnswer(JSON.parse(data).text);
+                    if (event === 'error') throw new Error(JSON.parse(data).detail);
+                }
+            }
         } catch (err) {
             setChatHistory(prev => [...prev, { role: 'ai', content: "Connection to Neural Hub lost. Please retry." }]);
         } finally {
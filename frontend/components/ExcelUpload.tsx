@@ -45,7 +45,15 @@ export default function ExcelUpload() {
                 method: 'POST',
                 body: formData,
             });
-            const data = await response.json();
+            let data = await response.json();
+            // Parsing runs server-side as a job; poll its handle until it settles.
+            while (data.status_url && (data.status === 'queued' || data.status === 'running')) {
+                await new Promise((r) => setTimeout(r, 1000));
+                data = await (await fetch(`${apiUrl}${data.status_url}`)).json();
+            }
+            if (data.job_id) {
+                data = data.result ?? { status: 'error', message: data.error || 'Parsing failed' };
+            }
             setProgress(100);
             setTimeout(() => {
                 setResult(data);
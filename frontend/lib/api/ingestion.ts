@@ -94,6 +94,37 @@ export async function listUploads(params?: { limit?: number; branch?: Branch; fi
   return res.json();
 }
 
+export async function listUploadsPage(params?: {
+  limit?: number;
+  branch?: Branch;
+  fileType?: FileType;
+  status?: string;
+  dateFrom?: string;
+  dateTo?: string;
+  cursor?: string;
+}) {
+  const q = new URLSearchParams();
+  if (params?.limit) q.set('limit', String(params.limit));
+  if (params?.branch) q.set('branch', params.branch);
+  if (params?.fileType) q.set('file_type', params.fileType);
+  if (params?.status) q.set('processing_status', params.status);
+  if (params?.dateFrom) q.set('date_from', params.dateFrom);
+  if (params?.dateTo) q.set('date_to', params.dateTo);
+  if (params?.cursor) q.set('cursor', params.cursor);
+
+  const res = await fetch(api(`/api/ingestion/uploads?${q.toString()}`), {
+    headers: {
+      Authorization: `Bearer ${getToken()}`,
+    },
+  });
+
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(text || 'Failed to load uploads');
+  }
+  return { items: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+}
+
 export async function getExtractionAudit(excelUploadId: number) {
   const res = await fetch(api(`/api/ingestion/audit/${excelUploadId}`), {
     headers: {
@@ -107,3 +138,27 @@ export async function getExtractionAudit(excelUploadId: number) {
   }
   return res.json();
 }
+
+export type UploadStatusEvent = {
+  excel_upload_id: number;
+  type: 'status' | 'stage';
+  ts: number;
+  processing_status?: string;
+  stage?: string;
+  state?: 'started' | 'done';
+  duration_ms?: number;
+  timings_ms?: Record<string, number>;
+  score?: number;
+  audit_id?: string;
+  error?: string;
+};
+
+// Server-Sent Events pushed by the worker; pass ids to follow specific uploads, or none for all.
+export function subscribeUploadEvents(onEvent: (e: UploadStatusEvent) => void, ids?: number[]) {
+  const q = ids && ids.length ? `?ids=${ids.join(',')}` : '';
+  const source = new EventSource(api(`/api/ingestion/events${q}`));
+  const handler = (msg: MessageEvent) => onEvent(JSON.parse(msg.data));
+  source.addEventListener('status', handler);
+  source.addEventListener('stage', handler);
+  return () => source.close();
+}